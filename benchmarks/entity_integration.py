@@ -0,0 +1,78 @@
+"""
+Time advancing many movers with `EntityStore.integrate` against doing the same one entity at a time in python,
+as `MovableEntity.update_effective_speed` and `move_in_direction` do.
+Run from the root of the repository with `python -m benchmarks.entity_integration`
+"""
+import sys
+import time
+import numpy as np
+from entity import EntityStore
+
+NUMBER_OF_MOVERS = [100, 1000, 10000, 100000]
+
+
+def build_store(number_of_movers):
+    store = EntityStore()
+    random = np.random.default_rng(0)
+
+    for entity_id in range(1, number_of_movers + 1):
+        store.add(entity_id, random.uniform(0, 800), random.uniform(0, 600), 20, 20)
+
+    store["base_speed"][:] = 4
+    store["max_acceleration"][:] = 8
+    store["acceleration_rate"][:] = 0.5
+    directions = random.integers(-1, 2, size = (number_of_movers, 2))
+    store["direction_x"][:] = directions[:, 0]
+    store["direction_y"][:] = directions[:, 1]
+
+    return store
+
+
+def integrate_one_at_a_time(store):
+    """
+    The per entity python equivalent of `EntityStore.integrate`
+    """
+    for slot in range(len(store)):
+        speed = store["speed"][slot]
+        base_speed = store["base_speed"][slot]
+        direction_x = store["direction_x"][slot]
+        direction_y = store["direction_y"][slot]
+
+        if speed < base_speed:
+            speed += 1
+        else:
+            acceleration = store["acceleration"][slot]
+            if direction_x != 0 or direction_y != 0:
+                acceleration += base_speed * store["acceleration_rate"][slot]
+            else:
+                acceleration = 0
+            acceleration = min(acceleration, store["max_acceleration"][slot])
+            store["acceleration"][slot] = acceleration
+            speed = base_speed + acceleration
+
+        store["speed"][slot] = speed
+        store["x"][slot] += direction_x * speed
+        store["y"][slot] += direction_y * speed
+        store.update_bounds(np.array([slot]))
+
+
+def main(ticks = 10):
+    print(f"{'movers':>10} {'batched':>12} {'one by one':>12}")
+
+    for number_of_movers in NUMBER_OF_MOVERS:
+        store = build_store(number_of_movers)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            store.integrate()
+        batched = (time.perf_counter() - start) / ticks
+
+        store = build_store(number_of_movers)
+        start = time.perf_counter()
+        integrate_one_at_a_time(store)
+        one_by_one = time.perf_counter() - start
+
+        print(f"{number_of_movers:>10} {batched * 1000:>10.2f}ms {one_by_one * 1000:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,106 @@
+"""
+Report the memory used by 100k entities, slotted with their bounding points worked out when asked for and their
+position, size, movement and tick kept in the entity store, against the same attributes kept in an instance `__dict__`
+with the bounding points stored, as `Entity` used to.
+Run from the root of the repository with `python -m benchmarks.entity_memory`
+"""
+import sys
+import tracemalloc
+from consts import Colour
+from entity import Entity, EntityStore
+from grid import Grid
+from benchmarks.grid_memory import format_bytes
+
+NUMBER_OF_ENTITIES = 100000
+TILE_SIZE = 25
+
+
+class UnslottedEntity:
+    """
+    The attributes `Entity` used to keep in its `__dict__`, including the nine bounding points refreshed on every move
+    """
+
+    def __init__(self, entity_id, x, y, height, width):
+        self.id = entity_id
+        self.x = x
+        self.y = y
+        self.original_x = x
+        self.original_y = y
+        self.last_x = x
+        self.last_y = y
+        self.height = height
+        self.width = width
+        self.half_height = height / 2
+        self.half_width = width / 2
+        self.base_colour = Colour.WHITE.value
+        self.last_tick = None
+        self.tick_rate = 0.5
+        self.is_solid = False
+        self.on_collide = None
+        self.entity_type_id = 0
+        self.grid_layer = 0
+        self.is_static = False
+        self.top_left = (x - self.half_width, y - self.half_height)
+        self.top_middle = (x, y - self.half_height)
+        self.top_right = (x + self.half_width, y - self.half_height)
+        self.bottom_left = (x - self.half_width, y + self.half_height)
+        self.bottom_middle = (x, y + self.half_height)
+        self.bottom_right = (x + self.half_width, y + self.half_height)
+        self.middle_right = (x + self.half_width, y)
+        self.middle_left = (x - self.half_width, y)
+        self.middle = (x, y)
+        self.grid_pixels = (x, y)
+        self.clip_distance = width * 0.8
+        self.shape_sprite = None
+
+
+def measure(build):
+    """
+    :param build: function that builds and returns the entities
+    :return: bytes allocated by build that are still held, the entities
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    entities = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename")), entities
+
+
+def main(number_of_entities = NUMBER_OF_ENTITIES):
+    columns = 400
+    rows = number_of_entities // columns + 1
+
+    Entity.grid = Grid(columns + 1, rows + 1, TILE_SIZE, 1, compact = True)
+    # made up front so that its columns aren't counted with the slotted entities, which are views over it
+    Entity.store = EntityStore(number_of_entities)
+
+    positions = [
+        Entity.grid.get_pixel_center(row, column)
+        for row, column in zip(
+            [i // columns for i in range(number_of_entities)], [i % columns for i in range(number_of_entities)]
+        )
+    ]
+
+    def build_unslotted():
+        return [UnslottedEntity(i + 1, x, y, TILE_SIZE - 2, TILE_SIZE - 2) for i, (x, y) in enumerate(positions)]
+
+    def build_slotted():
+        return [Entity(x, y, TILE_SIZE - 2, TILE_SIZE - 2, Colour.WHITE, is_solid = False) for x, y in positions]
+
+    unslotted_bytes, unslotted = measure(build_unslotted)
+    del unslotted
+    slotted_bytes, slotted = measure(build_slotted)
+
+    # the position, size, movement and tick the slotted entities keep in the store
+    store_bytes = Entity.store.memory_footprint()["total"]
+
+    print(f"{'representation':>16} {'total':>10} {'per entity':>12}")
+    print(f"{'__dict__':>16} {format_bytes(unslotted_bytes):>10} {unslotted_bytes / number_of_entities:>10.1f}B")
+    print(f"{'__slots__':>16} {format_bytes(slotted_bytes):>10} {slotted_bytes / number_of_entities:>10.1f}B")
+    print(f"{'store':>16} {format_bytes(store_bytes):>10} {store_bytes / number_of_entities:>10.1f}B")
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
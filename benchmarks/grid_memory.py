@@ -0,0 +1,51 @@
+"""
+Report the memory footprint of a `Grid` for increasing grid sizes, with and without `compact`, and of an
+empty `SparseGrid`.
+Run from the root of the repository with `python -m benchmarks.grid_memory`
+"""
+import sys
+from grid import Grid, SparseGrid
+
+GRID_SIZES = [(33, 25), (256, 256), (1024, 1024), (4096, 4096)]
+
+# beyond this many tiles building the non compact grid takes many GB of memory so we skip it
+MAX_NON_COMPACT_TILES = 1024 * 1024
+
+
+def format_bytes(value):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if value < 1024:
+            return f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}TB"
+
+
+def main(number_of_layers = 4):
+    print(f"{'size':>12} {'mode':>8} {'data':>10} {'centers':>10} {'tree':>10} {'total':>10}")
+
+    for x_max, y_max in GRID_SIZES:
+        for mode in ["dense", "compact", "sparse"]:
+            if mode == "dense" and x_max * y_max > MAX_NON_COMPACT_TILES:
+                continue
+
+            if mode == "sparse":
+                grid = SparseGrid(x_max, y_max, 25, number_of_layers)
+            else:
+                grid = Grid(x_max, y_max, 25, number_of_layers, compact = mode == "compact")
+            footprint = grid.memory_footprint()
+
+            centers = footprint["x_mesh"] + footprint["y_mesh"] + \
+                footprint["map_pixel_center_positions"] + footprint["flat_pixel_positions"]
+            tree = footprint.get("tree_data", 0) + footprint.get("tree_indices", 0)
+
+            print(
+                f"{f'{x_max}x{y_max}':>12} {mode:>8} "
+                f"{format_bytes(footprint['data'] + footprint.get('quadtrees', 0)):>10} {format_bytes(centers):>10} "
+                f"{format_bytes(tree):>10} {format_bytes(footprint['total']):>10}"
+            )
+
+            del grid
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,4 @@
+from .swept_aabb import swept_aabb, get_swept_bounds
+from .sweep_and_prune import sweep_and_prune
+from .collision_world import CollisionWorld, CONTACT_DTYPE
+from .collision_matrix import CollisionMatrix
@@ -0,0 +1,109 @@
+from enum import Enum
+import numpy as np
+from consts import Layer, EntityType
+
+
+class CollisionMatrix:
+    """
+    Which pairs of layers and entity types can collide, and any callbacks for when they do. Two things can collide
+    only if both their layers and their entity types can, everything can collide unless it's been set otherwise.
+    Kept as tables indexed by the layer and entity type values so that many pairs can be checked at once.
+    """
+
+    def __init__(self, number_of_layers = len(Layer), number_of_entity_types = len(EntityType)):
+        """
+        :param number_of_layers:
+        :param number_of_entity_types:
+        """
+        self.layers = np.ones((number_of_layers, number_of_layers), dtype = bool)
+        self.entity_types = np.ones((number_of_entity_types, number_of_entity_types), dtype = bool)
+
+        # callbacks keyed by (Layer or EntityType, Layer or EntityType)
+        self.callbacks = {}
+
+    def get_table(self, key):
+        """
+        :param key: Layer or EntityType
+        :return: The table for the type of key
+        """
+        if isinstance(key, Layer):
+            return self.layers
+        if isinstance(key, EntityType):
+            return self.entity_types
+
+        raise ValueError(f"Can only set collisions between Layers or EntityTypes, not {key}")
+
+    def set_interaction(self, first: Enum, second: Enum, interacts: bool = True, callback = None):
+        """
+        Set if a pair of layers or entity types can collide
+        :param first: Layer or EntityType
+        :param second: the same type as `first`
+        :param interacts:
+        :param callback: (optional) function(entity, other) called when an entity of `first` is collided with by
+        an entity of `second`
+        :return:
+        """
+        if type(first) != type(second):
+            raise ValueError(f"Can't set collisions between {first} and {second}")
+
+        table = self.get_table(first)
+        table[first.value, second.value] = interacts
+        table[second.value, first.value] = interacts
+
+        if callback is not None:
+            self.callbacks[(first, second)] = callback
+
+    @staticmethod
+    def lookup(table, first, second):
+        """
+        Look up pairs in a table, anything not in the table can collide
+        :param table:
+        :param first:
+        :param second:
+        :return:
+        """
+        first = np.asarray(first, dtype = int)
+        second = np.asarray(second, dtype = int)
+        size = len(table)
+
+        is_known = (first >= 0) & (first < size) & (second >= 0) & (second < size)
+        return np.where(is_known, table[np.where(is_known, first, 0), np.where(is_known, second, 0)], True)
+
+    def can_interact(self, layer, entity_type, other_layers, other_entity_types):
+        """
+        Can things on a layer and of an entity type collide with others, for many pairs at once
+        :param layer: layer value or numpy array of them
+        :param entity_type: entity type value or numpy array of them
+        :param other_layers: numpy array of layer values
+        :param other_entity_types: numpy array of entity type values
+        :return: numpy array of bool
+        """
+        return self.lookup(self.layers, layer, other_layers) & \
+            self.lookup(self.entity_types, entity_type, other_entity_types)
+
+    def can_entities_interact(self, entity, other):
+        """
+        :param entity: Entity
+        :param other: Entity
+        :return: bool
+        """
+        return bool(self.can_interact(entity.grid_layer, entity.entity_type_id, other.grid_layer, other.entity_type_id))
+
+    def get_callbacks(self, entity, other):
+        """
+        Get the callbacks for when `entity` is collided with by `other`
+        :param entity: Entity
+        :param other: Entity
+        :return: List of callbacks
+        """
+        if not self.callbacks:
+            return []
+
+        keys = [
+            (Layer(entity.grid_layer) if entity.grid_layer in Layer._value2member_map_ else None,
+             Layer(other.grid_layer) if other.grid_layer in Layer._value2member_map_ else None),
+            (EntityType(entity.entity_type_id) if entity.entity_type_id in EntityType._value2member_map_ else None,
+             EntityType(other.entity_type_id) if other.entity_type_id in EntityType._value2member_map_ else None),
+        ]
+
+        return [self.callbacks[key] for key in keys if key in self.callbacks]
@@ -0,0 +1,260 @@
+import numpy as np
+from .swept_aabb import swept_aabb, get_swept_bounds
+from .sweep_and_prune import sweep_and_prune
+
+
+# a contact between two boxes during a sweep, `first` is the id of the box that was moving and the normal is
+# of the surface of `second` that it touched
+CONTACT_DTYPE = np.dtype([
+    ("first", np.int64),
+    ("second", np.int64),
+    ("time", np.float64),
+    ("normal_x", np.float64),
+    ("normal_y", np.float64),
+])
+
+# with no more boxes than this it's cheaper to check every one of them than to keep them sorted
+BRUTE_FORCE_COUNT = 64
+
+
+class CollisionWorld:
+    """
+    The axis aligned bounding boxes of everything that can move or be moved into, by id. Static solids such as
+    walls are not kept here, see `Grid.get_static_collision`.
+    The boxes are kept sorted along x, resorting from the previous order when they change, so that finding
+    what a box could touch only needs to look at those nearby along x. Until there are more than
+    `BRUTE_FORCE_COUNT` boxes they're all checked instead.
+    The layer and entity type of each box is kept alongside it, so that pairs the collision matrix says can't
+    collide are dropped here rather than after looking up their entities.
+    The arrays have room for more boxes than there are, doubling when they're full, only the first `count` are used.
+    """
+
+    def __init__(self, collision_matrix = None, capacity = 64):
+        """
+        :param collision_matrix: (optional) CollisionMatrix, if not given everything can collide
+        :param capacity: how many boxes to make room for, grows as needed
+        """
+        self.collision_matrix = collision_matrix
+        self.count = 0
+        self.capacity = capacity
+        self.ids = np.zeros(capacity, dtype = np.int64)
+        self.bounds = np.zeros((capacity, 4))
+        self.layers = np.zeros(capacity, dtype = np.int32)
+        self.entity_types = np.zeros(capacity, dtype = np.int32)
+        # where each id is in `ids` and `bounds`
+        self.slots = {}
+
+        # the indexes of the boxes sorted by min_x, None when they need resorting
+        self.order = None
+        self.previous_order = None
+        self.sorted_min_x = None
+        self.max_width = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.slots
+
+    def grow(self):
+        """
+        Double the capacity of the arrays
+        :return:
+        """
+        self.capacity *= 2
+        self.ids = np.resize(self.ids, self.capacity)
+        self.bounds = np.resize(self.bounds, (self.capacity, 4))
+        self.layers = np.resize(self.layers, self.capacity)
+        self.entity_types = np.resize(self.entity_types, self.capacity)
+
+    def set_bounds(self, entity_id, min_x, min_y, max_x, max_y, layer = 0, entity_type = 0):
+        """
+        Add or move the box of an id
+        :param entity_id:
+        :param min_x:
+        :param min_y:
+        :param max_x:
+        :param max_y:
+        :param layer: the grid layer of the id
+        :param entity_type: the entity type of the id
+        :return:
+        """
+        slot = self.slots.get(entity_id)
+
+        if slot is None:
+            if self.count == self.capacity:
+                self.grow()
+
+            slot = self.count
+            self.count += 1
+            self.slots[entity_id] = slot
+            self.ids[slot] = entity_id
+            self.previous_order = None
+
+        self.bounds[slot] = (min_x, min_y, max_x, max_y)
+        self.layers[slot] = layer
+        self.entity_types[slot] = entity_type
+        self.order = None
+
+    def remove(self, entity_id):
+        """
+        Remove the box of an id, the last box is moved into its place
+        :param entity_id:
+        :return:
+        """
+        slot = self.slots.pop(entity_id, None)
+        if slot is None:
+            return
+
+        last = self.count - 1
+        if slot != last:
+            self.ids[slot] = self.ids[last]
+            self.bounds[slot] = self.bounds[last]
+            self.layers[slot] = self.layers[last]
+            self.entity_types[slot] = self.entity_types[last]
+            self.slots[int(self.ids[slot])] = slot
+
+        self.count = last
+        self.order = None
+        self.previous_order = None
+
+    def sort(self):
+        """
+        Sort the boxes along x if anything has changed since they were last sorted
+        :return:
+        """
+        if self.order is not None:
+            return
+
+        order = self.previous_order
+        if order is None or len(order) != self.count:
+            order = np.arange(self.count)
+
+        bounds = self.bounds[:self.count]
+        self.order = order[np.argsort(bounds[order, 0], kind = "stable")]
+        self.previous_order = self.order
+        self.sorted_min_x = bounds[self.order, 0]
+        self.max_width = np.max(bounds[:, 2] - bounds[:, 0]) if self.count > 0 else 0
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """
+        Get the slots of the boxes that overlap or touch the given bounds
+        :param min_x:
+        :param min_y:
+        :param max_x:
+        :param max_y:
+        :return: numpy array of slots
+        """
+        if self.count <= BRUTE_FORCE_COUNT:
+            candidates = self.bounds[:self.count]
+            return np.flatnonzero(
+                (candidates[:, 0] <= max_x) & (candidates[:, 2] >= min_x) &
+                (candidates[:, 1] <= max_y) & (candidates[:, 3] >= min_y)
+            )
+
+        self.sort()
+
+        # no box wider than `max_width` that starts before this can reach us
+        start = np.searchsorted(self.sorted_min_x, min_x - self.max_width, side = "left")
+        end = np.searchsorted(self.sorted_min_x, max_x, side = "right")
+        slots = self.order[start:end]
+
+        candidates = self.bounds[slots]
+        is_overlapping = (candidates[:, 2] >= min_x) & (candidates[:, 1] <= max_y) & (candidates[:, 3] >= min_y)
+
+        return slots[is_overlapping]
+
+    def sweep(self, entity_id, x_displacement, y_displacement):
+        """
+        Get what the box of an id would touch moving by the displacement, with everything else staying where it is
+        :param entity_id:
+        :param x_displacement:
+        :param y_displacement:
+        :return: numpy array of `CONTACT_DTYPE` ordered by time
+        """
+        slot = self.slots.get(entity_id)
+        if slot is None:
+            return np.zeros(0, dtype = CONTACT_DTYPE)
+
+        # for a single box this is quicker with python floats than with `get_swept_bounds`
+        min_x, min_y, max_x, max_y = self.bounds[slot].tolist()
+        others = self.query(
+            min_x + min(x_displacement, 0), min_y + min(y_displacement, 0),
+            max_x + max(x_displacement, 0), max_y + max(y_displacement, 0)
+        )
+        others = others[others != slot]
+
+        # most of the time there's nothing near enough, so we can skip looking at the pairs
+        if len(others) == 0:
+            return np.zeros(0, dtype = CONTACT_DTYPE)
+
+        others = others[self.can_interact(slot, others)]
+        bounds = self.bounds[slot:slot + 1]
+        displacement = np.array([[x_displacement, y_displacement]], dtype = float)
+
+        times, normals = swept_aabb(
+            np.repeat(bounds, len(others), axis = 0), np.repeat(displacement, len(others), axis = 0),
+            self.bounds[others]
+        )
+
+        return self.build_contacts(np.full(len(others), slot), others, times, normals)
+
+    def get_contacts(self, displacements):
+        """
+        Get every contact between boxes for a whole tick in one batch, with everything moving at once
+        :param displacements: dict of id to (x, y) displacement, ids not given aren't moving
+        :return: numpy array of `CONTACT_DTYPE` ordered by time, with a contact for each of the pair
+        """
+        all_displacements = np.zeros((self.count, 2))
+        for entity_id, displacement in displacements.items():
+            slot = self.slots.get(entity_id)
+            if slot is not None:
+                all_displacements[slot] = displacement
+
+        swept_bounds = get_swept_bounds(self.bounds[:self.count], all_displacements)
+        first, second, self.previous_order = sweep_and_prune(swept_bounds, self.previous_order)
+        self.order = None
+
+        is_interacting = self.can_interact(first, second)
+        first, second = first[is_interacting], second[is_interacting]
+
+        # from the point of view of each of the pair
+        first, second = np.concatenate([first, second]), np.concatenate([second, first])
+        times, normals = swept_aabb(
+            self.bounds[first], all_displacements[first], self.bounds[second], all_displacements[second]
+        )
+
+        return self.build_contacts(first, second, times, normals)
+
+    def can_interact(self, first, second):
+        """
+        Which pairs of boxes can collide according to the collision matrix
+        :param first: slot or numpy array of slots
+        :param second: numpy array of slots
+        :return: numpy array of bool
+        """
+        if self.collision_matrix is None:
+            return np.ones(len(second), dtype = bool)
+
+        return self.collision_matrix.can_interact(
+            self.layers[first], self.entity_types[first], self.layers[second], self.entity_types[second]
+        )
+
+    def build_contacts(self, first, second, times, normals):
+        """
+        :param first: slots of the moving boxes
+        :param second: slots of the boxes touched
+        :param times:
+        :param normals:
+        :return: numpy array of `CONTACT_DTYPE` for the pairs that touch, ordered by time
+        """
+        is_hit = times < np.inf
+
+        contacts = np.zeros(np.count_nonzero(is_hit), dtype = CONTACT_DTYPE)
+        contacts["first"] = self.ids[first[is_hit]]
+        contacts["second"] = self.ids[second[is_hit]]
+        contacts["time"] = times[is_hit]
+        contacts["normal_x"] = normals[is_hit, 0]
+        contacts["normal_y"] = normals[is_hit, 1]
+
+        return contacts[np.argsort(contacts["time"], kind = "stable")]
@@ -0,0 +1,36 @@
+import numpy as np
+
+
+def sweep_and_prune(bounds, order = None):
+    """
+    Find the pairs of axis aligned boxes that overlap or touch. The boxes are sorted along x so that each box only
+    needs comparing with those that start before it ends, then those pairs are checked for overlap along y.
+    :param bounds: numpy array of (min_x, min_y, max_x, max_y) with shape (n, 4)
+    :param order: (optional) the indexes of the boxes in a previous sort, as boxes move little between ticks sorting
+    from the previous order is close to linear
+    :return: first, second, order - the indexes of each pair with first < second, and the order to pass next time
+    """
+    bounds = np.asarray(bounds, dtype = float).reshape(-1, 4)
+
+    if order is None or len(order) != len(bounds):
+        order = np.arange(len(bounds))
+
+    order = order[np.argsort(bounds[order, 0], kind = "stable")]
+    sorted_bounds = bounds[order]
+
+    # for each box in order, the boxes after it that start before it ends
+    ends = np.searchsorted(sorted_bounds[:, 0], sorted_bounds[:, 2], side = "right")
+    starts = np.arange(len(bounds)) + 1
+    counts = np.maximum(ends - starts, 0)
+
+    first = np.repeat(np.arange(len(bounds)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = np.repeat(starts, counts) + offsets
+
+    is_overlapping = (sorted_bounds[first, 1] <= sorted_bounds[second, 3]) & \
+                     (sorted_bounds[second, 1] <= sorted_bounds[first, 3])
+
+    first = order[first[is_overlapping]]
+    second = order[second[is_overlapping]]
+
+    return np.minimum(first, second), np.maximum(first, second), order
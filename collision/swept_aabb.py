@@ -0,0 +1,81 @@
+import numpy as np
+
+
+def get_swept_bounds(bounds, displacements):
+    """
+    Get the bounds covering where axis aligned boxes start and end after moving by their displacements
+    :param bounds: numpy array of (min_x, min_y, max_x, max_y) with shape (n, 4)
+    :param displacements: numpy array of (x, y) with shape (n, 2)
+    :return: numpy array of (min_x, min_y, max_x, max_y) with shape (n, 4)
+    """
+    bounds = np.asarray(bounds, dtype = float)
+    displacements = np.asarray(displacements, dtype = float)
+
+    result = bounds.copy()
+    result[:, 0:2] += np.minimum(displacements, 0)
+    result[:, 2:4] += np.maximum(displacements, 0)
+
+    return result
+
+
+def get_entry_exit_times(moving_min, moving_max, other_min, other_max, displacement):
+    """
+    For a single axis, when does the moving interval start and stop overlapping the other interval, as a fraction
+    of the displacement. Intervals that don't move are overlapping forever or never
+    :return: entry times, exit times
+    """
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        entry = np.where(
+            displacement > 0, (other_min - moving_max) / displacement, (other_max - moving_min) / displacement
+        )
+        exit = np.where(
+            displacement > 0, (other_max - moving_min) / displacement, (other_min - moving_max) / displacement
+        )
+
+    is_still = displacement == 0
+    is_overlapping = (moving_max > other_min) & (moving_min < other_max)
+
+    entry = np.where(is_still, np.where(is_overlapping, -np.inf, np.inf), entry)
+    exit = np.where(is_still, np.where(is_overlapping, np.inf, -np.inf), exit)
+
+    return entry, exit
+
+
+def swept_aabb(bounds, displacements, other_bounds, other_displacements = None):
+    """
+    Find when pairs of moving axis aligned boxes first touch during their displacements.
+    Boxes that already overlap at the start are not a contact, so that things can move apart again.
+    :param bounds: numpy array of (min_x, min_y, max_x, max_y) with shape (n, 4)
+    :param displacements: numpy array of (x, y) with shape (n, 2)
+    :param other_bounds: numpy array of (min_x, min_y, max_x, max_y) with shape (n, 4)
+    :param other_displacements: (optional) numpy array of (x, y) with shape (n, 2), defaults to not moving
+    :return: times, normals - times are the fraction of the displacement at which the boxes touch, between 0 and 1,
+    or inf if they don't. Normals are (x, y) of the surface of the other box that was touched, with shape (n, 2)
+    """
+    bounds = np.asarray(bounds, dtype = float).reshape(-1, 4)
+    other_bounds = np.asarray(other_bounds, dtype = float).reshape(-1, 4)
+    relative = np.asarray(displacements, dtype = float).reshape(-1, 2)
+
+    if other_displacements is not None:
+        relative = relative - np.asarray(other_displacements, dtype = float).reshape(-1, 2)
+
+    entry_x, exit_x = get_entry_exit_times(
+        bounds[:, 0], bounds[:, 2], other_bounds[:, 0], other_bounds[:, 2], relative[:, 0]
+    )
+    entry_y, exit_y = get_entry_exit_times(
+        bounds[:, 1], bounds[:, 3], other_bounds[:, 1], other_bounds[:, 3], relative[:, 1]
+    )
+
+    entry = np.maximum(entry_x, entry_y)
+    exit = np.minimum(exit_x, exit_y)
+
+    is_hit = (entry <= exit) & (entry >= 0) & (entry <= 1)
+    times = np.where(is_hit, entry, np.inf)
+
+    # the normal is along the axis we entered on last, facing back against the movement
+    normals = np.zeros((len(times), 2))
+    is_x_axis = entry_x >= entry_y
+    normals[:, 0] = np.where(is_hit & is_x_axis, -np.sign(relative[:, 0]), 0)
+    normals[:, 1] = np.where(is_hit & ~is_x_axis, -np.sign(relative[:, 1]), 0)
+
+    return times, normals
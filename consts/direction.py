@@ -34,3 +34,8 @@ DIRECTION_INVERSE = {
     MovementDirection.SOUTH_WEST: MovementDirection.NORTH_EAST,
     MovementDirection.WEST: MovementDirection.EAST,
 }
+
+
+# (row, column) offsets of the neighbours of a grid position, the first four are the 4-connected neighbours.
+# The index of the offset is the bit used for it in `Grid.get_neighbour_masks`
+NEIGHBOUR_OFFSETS = ((0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1),)
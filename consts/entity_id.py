@@ -0,0 +1,20 @@
+# entity ids are generational, the low bits are the index of the entity in the registry and the high bits are the
+# generation of that index. When an entity is despawned its index can be reused with the next generation, so an id
+# kept for a despawned entity is never mistaken for whatever took its place.
+# ids fit within an int32 so they can be kept in compact grids
+INDEX_BITS = 20
+INDEX_MASK = (1 << INDEX_BITS) - 1
+GENERATION_BITS = 11
+GENERATION_MASK = (1 << GENERATION_BITS) - 1
+
+
+def make_entity_id(index, generation):
+    return ((generation & GENERATION_MASK) << INDEX_BITS) | index
+
+
+def get_entity_index(entity_id):
+    return entity_id & INDEX_MASK
+
+
+def get_entity_generation(entity_id):
+    return (entity_id >> INDEX_BITS) & GENERATION_MASK
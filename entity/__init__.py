@@ -1,4 +1,6 @@
 from .entity import Entity
+from .entity_store import EntityStore, ENTITY_STORE_FIELDS
+from .entity_registry import EntityRegistry
 from .moveable_entity import MovableEntity
 from consts.movement_type import MovementType
 from .scouting_entity import ScoutingEntity
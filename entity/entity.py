@@ -1,28 +1,44 @@
+import weakref
+import numpy as np
 from warnings import warn
 from consts.colour import Colour
 from consts.direction import MovementDirection, DIRECTION_INVERSE
 from typing import List
 from shape_sprite import ShapeSprite
+from entity.entity_registry import EntityRegistry
+from entity.entity_store import EntityStore, store_property
 
 
 class Entity:
-    id = 0  # Each entity (and derived instances) has a unique id this is a class variable for keeping track
-    all = {}  # Every entity that is created is added to this class dictionary, entity access if by their unique id
+    __slots__ = [
+        "id", "entity_store", "original_x", "original_y", "last_x", "last_y", "height", "width", "tick_rate_scale",
+        "base_colour", "is_solid", "on_collide", "entity_type_id", "grid_layer", "is_static", "grid_pixels",
+        "clip_distance", "shape_sprite", "bounding_points", "__weakref__",
+    ]
+    
+    all = EntityRegistry()  # Every live entity by its unique generational id, held weakly
+    store = EntityStore()  # The position, size, movement and tick of every entity, which our properties read and write
     grid = None  # Reference to the game grid for entities
+    collision_world = None  # The boxes of everything that isn't static, for moving entities to sweep against
+    collision_matrix = None  # Which layers and entity types can collide, if not set everything can
+    scheduler = None  # Decides when entities are due to think, if not set each entity keeps track itself
+    cache_bounding_points = False  # Keep the bounding points we've worked out until we move
     
     def __init__(
             self,
             x: int, y: int, height: int, width: int,
             base_colour: Colour, tick_rate: float = 0.5,
             is_solid: bool = True, parent_collection: List = None,
-            grid_layer: int = 0, entity_type_id: int = 0
+            grid_layer: int = 0, entity_type_id: int = 0, is_static: bool = False
     ):
         
-        Entity.id += 1
-        self.id = Entity.id
+        self.id = Entity.all.spawn(self)
+        
+        # hold on to the store we were added to, in case it's replaced, and leave it when we're gone
+        self.entity_store = Entity.store
+        self.entity_store.add(self.id, x, y, width, height, tick_rate)
+        weakref.finalize(self, self.entity_store.remove, self.id)
         
-        self.x = x
-        self.y = y
         self.original_x = x
         self.original_y = y
         self.last_x = None
@@ -30,25 +46,20 @@ class Entity:
         
         self.height = height
         self.width = width
-        self.half_height = height / 2
-        self.half_width = width / 2
         self.base_colour = base_colour.value
-        self.last_tick = None
-        self.tick_rate = tick_rate
+        # stretches our tick rate without changing it, such as for being far from the player
+        self.tick_rate_scale = 1
         self.is_solid = is_solid
         self.on_collide = None
         self.entity_type_id = entity_type_id
         self.grid_layer = grid_layer
+        # a solid that never moves, such as a wall, which fills its tile. Moving things collide with it through
+        # the grid's static solids rather than by querying for it
+        self.is_static = is_static
+        Entity.grid.set_entity_type(self.id, entity_type_id)
         
-        self.top_left = None
-        self.top_right = None
-        self.middle_left = None
-        self.middle = None
-        self.middle_right = None
-        self.bottom_left = None
-        self.bottom_right = None
-        self.top_middle = None
-        self.bottom_middle = None
+        # our bounding points, such as `top_left`, are worked out when they're asked for
+        self.bounding_points = None
         self.grid_pixels = None
         self.clip_distance = None
         
@@ -58,8 +69,84 @@ class Entity:
         
         if parent_collection is not None:
             parent_collection.append(self)
+    
+    x = store_property("x")
+    y = store_property("y")
+    half_width = store_property("half_width")
+    half_height = store_property("half_height")
+    tick_rate = store_property("tick_rate")
+    
+    @property
+    def last_tick(self):
+        # the store can't hold None, so it uses nan for not having ticked yet
+        last_tick = self.entity_store.get(self.id, "last_tick")
+        return None if last_tick != last_tick else last_tick
+    
+    @last_tick.setter
+    def last_tick(self, value):
+        self.entity_store.set(self.id, "last_tick", float("nan") if value is None else value)
+    
+    def get_bounding_point(self, x_side, y_side):
+        """
+        Work out a point on our bounds from our position and size. If `Entity.cache_bounding_points` is set the
+        points are kept until we move
+        :param x_side: -1 for the left, 0 for the middle, 1 for the right
+        :param y_side: -1 for the top, 0 for the middle, 1 for the bottom
+        :return: Tuple[float, float] - the pixel point
+        """
+        x = self.x
+        y = self.y
+        
+        if not Entity.cache_bounding_points:
+            return x + (x_side * self.half_width), y + (y_side * self.half_height)
+        
+        if self.bounding_points is None or self.bounding_points[0] != (x, y):
+            self.bounding_points = ((x, y), {})
         
-        Entity.all[self.id] = self
+        cached_points = self.bounding_points[1]
+        point = cached_points.get((x_side, y_side))
+        
+        if point is None:
+            point = (x + (x_side * self.half_width), y + (y_side * self.half_height))
+            cached_points[(x_side, y_side)] = point
+        
+        return point
+    
+    @property
+    def top_left(self):
+        return self.get_bounding_point(-1, -1)
+    
+    @property
+    def top_middle(self):
+        return self.get_bounding_point(0, -1)
+    
+    @property
+    def top_right(self):
+        return self.get_bounding_point(1, -1)
+    
+    @property
+    def middle_left(self):
+        return self.get_bounding_point(-1, 0)
+    
+    @property
+    def middle(self):
+        return self.get_bounding_point(0, 0)
+    
+    @property
+    def middle_right(self):
+        return self.get_bounding_point(1, 0)
+    
+    @property
+    def bottom_left(self):
+        return self.get_bounding_point(-1, 1)
+    
+    @property
+    def bottom_middle(self):
+        return self.get_bounding_point(0, 1)
+    
+    @property
+    def bottom_right(self):
+        return self.get_bounding_point(1, 1)
     
     def __str__(self):
         """
@@ -88,7 +175,17 @@ class Entity:
                 return
         
         existing_ids = Entity.grid[(self.x, self.y, self.grid_layer)]
-        matches = existing_ids[(existing_ids != 0) & (existing_ids != self.id)]
+        is_match = (existing_ids != 0) & (existing_ids != self.id)
+        
+        # skip what we can't collide with before looking it up, the ids are in layer order. our own layer is
+        # always checked as only one thing can be in each layer of a tile
+        if Entity.collision_matrix is not None and np.any(is_match):
+            existing_layers = np.arange(len(existing_ids))
+            is_match &= Entity.collision_matrix.can_interact(
+                self.grid_layer, self.entity_type_id, existing_layers, Entity.grid.get_entity_types(existing_ids)
+            ) | (existing_layers == self.grid_layer)
+        
+        matches = existing_ids[is_match]
         
         if len(matches) > 0:
             for i in matches:
@@ -103,15 +200,6 @@ class Entity:
                     if self.last_y:
                         self.y = self.last_y
         
-        self.top_left = (self.x - self.half_width, self.y - self.half_height)
-        self.top_middle = (self.x, self.y - self.half_height)
-        self.top_right = (self.x + self.half_width, self.y - self.half_height)
-        self.bottom_left = (self.x - self.half_width, self.y + self.half_height)
-        self.bottom_middle = (self.x, self.y + self.half_height)
-        self.bottom_right = (self.x + self.half_width, self.y + self.half_height)
-        self.middle_right = (self.x + self.half_width, self.y)
-        self.middle_left = (self.x - self.half_width, self.y)
-        self.middle = (self.x, self.y)
         self.grid_pixels = Entity.grid.get_pos_for_pixels(self.x, self.y)
         self.clip_distance = self.width * 0.8
         
@@ -122,6 +210,16 @@ class Entity:
         Entity.grid - self.id
         Entity.grid[(self.x, self.y, self.grid_layer)] = self.id
         
+        if self.is_static and self.is_solid:
+            Entity.grid.set_static_solid(self.id, self.x, self.y)
+        elif Entity.collision_world is not None:
+            top_left = self.top_left
+            bottom_right = self.bottom_right
+            Entity.collision_world.set_bounds(
+                self.id, top_left[0], top_left[1], bottom_right[0], bottom_right[1],
+                self.grid_layer, self.entity_type_id
+            )
+        
         # update our cached x,y
         self.last_x = self.x
         self.last_y = self.y
@@ -148,7 +246,8 @@ class Entity:
     def collide(self, other_id, distance):
         """
         Check that we've collided with another entity and if so, call the method associated to the
-        on_collide property of the other entity
+        on_collide property of the other entity, and any callbacks the collision matrix has for the pair.
+        Nothing happens if the collision matrix says we can't collide
         
         TODO: there is a limitation that we'll only collide with a maximum of one entity
         
@@ -159,6 +258,19 @@ class Entity:
         if other_id != self.id:
             if other_id in Entity.all:
                 other_entity = Entity.all[other_id]
+                
+                if Entity.collision_matrix is not None:
+                    if not Entity.collision_matrix.can_entities_interact(other_entity, self):
+                        return []
+                    
+                    if distance < other_entity.half_width:
+                        for callback in Entity.collision_matrix.get_callbacks(other_entity, self):
+                            callback(other_entity, self)
+                
+                # being collided with wakes things that are asleep
+                if Entity.scheduler is not None:
+                    Entity.scheduler.wake(other_id)
+                
                 if other_entity.on_collide is not None:
                     # TODO: this should be an other_entiy property for how much overlap we allow before we react
                     if distance < other_entity.half_width:
@@ -195,20 +307,50 @@ class Entity:
         """
         return self.get_point_for_direction(DIRECTION_INVERSE[direction])
     
+    def set_tick_rate(self, tick_rate):
+        """
+        Change how often we think, letting the scheduler know if there is one
+        :param tick_rate:
+        :return:
+        """
+        self.tick_rate = tick_rate
+        
+        if Entity.scheduler is not None:
+            Entity.scheduler.reschedule(self.id, self.get_tick_rate())
+    
+    def set_tick_rate_scale(self, tick_rate_scale):
+        """
+        Stretch how often we think without changing our tick rate, letting the scheduler know if there is one
+        :param tick_rate_scale: 1 for our own tick rate
+        :return:
+        """
+        self.tick_rate_scale = tick_rate_scale
+        
+        if Entity.scheduler is not None:
+            Entity.scheduler.reschedule(self.id, self.get_tick_rate())
+    
     def get_tick_rate(self):
         """
-        What is the entity's tick rate
+        What is the entity's tick rate, stretched by its scale
         :return:
         """
-        return self.tick_rate
+        return self.tick_rate * self.tick_rate_scale
     
     def can_think(self, frame_count):
         """
         Check if sufficient time has elapsed for this entity to make another decision.
-        Also update the `last_tick` with `frame_count`
+        Also update the `last_tick` with `frame_count`. If we're scheduled the scheduler decides when we're due,
+        and we can think once each time it has us due, see `ThinkScheduler.take_due`
         :param frame_count:
         :return:
         """
+        if Entity.scheduler is not None and self.id in Entity.scheduler:
+            if not Entity.scheduler.take_due(self.id):
+                return False
+            
+            self.last_tick = 0
+            return True
+        
         if self.last_tick is None:
             self.last_tick = frame_count
             return True
@@ -231,3 +373,11 @@ class Entity:
             return False
         
         return True
+    
+    def is_idle(self):
+        """
+        Do we have nothing to do until something happens to us, such as being collided with? If so the scheduler can
+        put us to sleep. It's expected you'd override this in classes inheriting from Entity that do things
+        :return: bool
+        """
+        return True
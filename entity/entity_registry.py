@@ -0,0 +1,121 @@
+import weakref
+from collections import deque
+from consts.entity_id import INDEX_MASK, GENERATION_MASK, make_entity_id, get_entity_index, get_entity_generation
+
+
+class EntityRegistry:
+    """
+    Every live entity by its generational id, see `consts.entity_id`.
+    Entities are held weakly in a list by the index of their id, so looking one up is indexing a list and checking
+    its generation, and an id for an entity that's gone is found in O(1). When an entity is despawned, or is no longer
+    referenced anywhere else, its index goes on the free list to be reused with the next generation.
+    """
+
+    def __init__(self):
+        # index 0 is never used, as 0 is an empty tile in the grid
+        self.entities = [None]
+        self.generations = [0]
+        self.free = deque()
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, entity_id):
+        return self.get(entity_id) is not None
+
+    def __getitem__(self, entity_id):
+        entity = self.get(entity_id)
+
+        if entity is None:
+            raise IndexError(f"Entity {entity_id} has been despawned or never existed")
+
+        return entity
+
+    def __iter__(self):
+        """
+        :return: iterator of the live entities
+        """
+        for reference in self.entities:
+            if reference is not None:
+                entity = reference()
+                if entity is not None:
+                    yield entity
+
+    def get(self, entity_id, default = None):
+        """
+        :param entity_id:
+        :param default: returned if the id isn't a live entity
+        :return: Entity
+        """
+        entity_id = int(entity_id)
+        index = entity_id & INDEX_MASK
+
+        if index >= len(self.entities) or self.generations[index] != get_entity_generation(entity_id):
+            return default
+
+        reference = self.entities[index]
+        entity = reference() if reference is not None else None
+
+        return default if entity is None else entity
+
+    def is_alive(self, entity_id):
+        """
+        :param entity_id:
+        :return: bool
+        """
+        return entity_id in self
+
+    def spawn(self, entity):
+        """
+        Give an entity an id
+        :param entity:
+        :return: the id of the entity
+        """
+        if self.free:
+            index = self.free.popleft()
+        else:
+            index = len(self.entities)
+            if index > INDEX_MASK:
+                raise OverflowError(f"Can't have more than {INDEX_MASK} entities")
+            self.entities.append(None)
+            self.generations.append(0)
+
+        entity_id = make_entity_id(index, self.generations[index])
+        # if nothing else holds on to the entity we let its index go
+        self.entities[index] = weakref.ref(entity, lambda reference: self.release(entity_id, reference))
+        self.count += 1
+
+        return entity_id
+
+    def despawn(self, entity_id):
+        """
+        Remove an entity, its id will no longer be found
+        :param entity_id:
+        :return: bool - was the entity alive
+        """
+        entity_id = int(entity_id)
+
+        if entity_id not in self:
+            return False
+
+        return self.release(entity_id, self.entities[get_entity_index(entity_id)])
+
+    def release(self, entity_id, reference):
+        """
+        Let the index of an id go to be reused with the next generation
+        :param entity_id:
+        :param reference: the weak reference the id was spawned with, so an old reference can't release a new id
+        :return: bool - was the index released
+        """
+        index = get_entity_index(entity_id)
+
+        if self.generations[index] != get_entity_generation(entity_id) or self.entities[index] is not reference:
+            return False
+
+        self.entities[index] = None
+        self.generations[index] = (self.generations[index] + 1) & GENERATION_MASK
+        self.free.append(index)
+        self.count -= 1
+
+        return True
@@ -0,0 +1,274 @@
+import numpy as np
+
+
+# the columns of the store, each is its own array so that a step over every entity only touches the
+# columns it needs
+ENTITY_STORE_FIELDS = {
+    "id": np.int64,
+    "x": np.float64,
+    "y": np.float64,
+    "direction_x": np.float64,
+    "direction_y": np.float64,
+    "speed": np.float64,
+    "base_speed": np.float64,
+    "acceleration": np.float64,
+    "max_acceleration": np.float64,
+    "acceleration_rate": np.float64,
+    "half_width": np.float64,
+    "half_height": np.float64,
+    "last_tick": np.float64,
+    "tick_rate": np.float64,
+}
+
+
+def store_property(name):
+    """
+    An attribute of an entity that is kept in its `entity_store` rather than on the entity
+    :param name: the name of a field in `ENTITY_STORE_FIELDS`
+    :return: property
+    """
+    def get_field(entity):
+        store = entity.entity_store
+        return store.columns[name].item(store.slots[entity.id])
+
+    def set_field(entity, value):
+        store = entity.entity_store
+        store.columns[name][store.slots[entity.id]] = value
+
+    return property(get_field, set_field)
+
+
+class EntityStore:
+    """
+    The state of many entities kept as numpy arrays, one for each field, so that every mover can be advanced, and
+    their bounds recomputed, at once with `integrate` rather than one at a time.
+    Entities are views over their slot, their position, size, movement and tick are properties that read and write
+    the store, see `store_property`. After stepping them in a batch it's up to the caller to refresh the entities
+    that moved, so the grid and collision world catch up.
+    When an entity is removed the last slot is moved into its place so that the arrays stay packed.
+    """
+
+    def __init__(self, capacity = 64):
+        """
+        :param capacity: how many entities to make room for, grows as needed
+        """
+        self.count = 0
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype = dtype) for name, dtype in ENTITY_STORE_FIELDS.items()}
+        # min_x, min_y, max_x, max_y of each entity
+        self.bounds = np.zeros((capacity, 4))
+        # where each id is in the arrays
+        self.slots = {}
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, entity_id):
+        return entity_id in self.slots
+
+    def __getitem__(self, name):
+        """
+        :param name: the name of a field
+        :return: numpy array of the field for every entity in the store
+        """
+        return self.columns[name][:self.count]
+
+    def grow(self):
+        """
+        Double the capacity of the arrays
+        :return:
+        """
+        self.capacity *= 2
+
+        for name, column in self.columns.items():
+            self.columns[name] = np.resize(column, self.capacity)
+
+        self.bounds = np.resize(self.bounds, (self.capacity, 4))
+
+    def add(self, entity_id, x, y, width, height, tick_rate = 0.5):
+        """
+        Add an entity to the store, it starts not moving
+        :param entity_id:
+        :param x:
+        :param y:
+        :param width:
+        :param height:
+        :param tick_rate:
+        :return: the slot of the entity
+        """
+        if entity_id in self.slots:
+            raise ValueError(f"Entity {entity_id} is already in the store")
+
+        if self.count == self.capacity:
+            self.grow()
+
+        slot = self.count
+        self.count += 1
+        self.slots[entity_id] = slot
+
+        for column in self.columns.values():
+            column[slot] = 0
+
+        self.columns["id"][slot] = entity_id
+        self.columns["x"][slot] = x
+        self.columns["y"][slot] = y
+        self.columns["half_width"][slot] = width / 2
+        self.columns["half_height"][slot] = height / 2
+        self.columns["last_tick"][slot] = np.nan
+        self.columns["tick_rate"][slot] = tick_rate
+        self.update_bounds(np.array([slot]))
+
+        return slot
+
+    def remove(self, entity_id):
+        """
+        Remove an entity from the store, the last slot is moved into its place
+        :param entity_id:
+        :return:
+        """
+        slot = self.slots.pop(entity_id, None)
+        if slot is None:
+            return
+
+        last = self.count - 1
+        if slot != last:
+            for column in self.columns.values():
+                column[slot] = column[last]
+            self.bounds[slot] = self.bounds[last]
+            self.slots[int(self.columns["id"][slot])] = slot
+
+        self.count = last
+
+    def get(self, entity_id, name):
+        """
+        :param entity_id:
+        :param name: the name of a field
+        :return: the value of the field for the entity as a python value
+        """
+        return self.columns[name][self.slots[entity_id]].item()
+
+    def set(self, entity_id, name, value):
+        """
+        :param entity_id:
+        :param name: the name of a field
+        :param value:
+        :return:
+        """
+        self.columns[name][self.slots[entity_id]] = value
+
+    def get_slots(self, ids = None):
+        """
+        :param ids: (optional) ids to get the slots of, defaults to every entity
+        :return: numpy array of slots
+        """
+        if ids is None:
+            return np.arange(self.count)
+
+        return np.array([self.slots[entity_id] for entity_id in ids], dtype = np.int64)
+
+    def update_bounds(self, slots = None):
+        """
+        Recompute the bounds from the position and size
+        :param slots: (optional) numpy array of slots, defaults to every entity
+        :return:
+        """
+        if slots is None:
+            slots = np.arange(self.count)
+
+        x = self.columns["x"][slots]
+        y = self.columns["y"][slots]
+        half_width = self.columns["half_width"][slots]
+        half_height = self.columns["half_height"][slots]
+
+        self.bounds[slots] = np.stack([x - half_width, y - half_height, x + half_width, y + half_height], axis = 1)
+
+    def update_entity_bounds(self, entity_id):
+        """
+        Recompute the bounds of a single entity
+        :param entity_id:
+        :return:
+        """
+        self.update_bounds(np.array([self.slots[entity_id]]))
+
+    def get_bounds(self, ids = None):
+        """
+        Entities move one at a time as well as with `integrate`, so the bounds are brought up to date first
+        :param ids: (optional) ids to get the bounds of, defaults to every entity
+        :return: numpy array of (min_x, min_y, max_x, max_y) with shape (n, 4)
+        """
+        slots = self.get_slots(ids)
+        self.update_bounds(slots)
+
+        return self.bounds[slots]
+
+    def integrate(self, delta_time = 1, ids = None):
+        """
+        Advance movers along their direction in one step, speeding them up as `MovableEntity.update_effective_speed`
+        does, then recompute their bounds. This doesn't check for collisions or update the grid, it's up to the caller
+        to refresh the entities that need it
+        :param delta_time: how many steps to advance by
+        :param ids: (optional) the ids of the movers to advance, defaults to every entity that has a direction
+        :return: numpy array of the ids that moved
+        """
+        columns = self.columns
+
+        if ids is None:
+            slots = np.flatnonzero((self["direction_x"] != 0) | (self["direction_y"] != 0))
+        else:
+            slots = self.get_slots(ids)
+
+        speed = columns["speed"][slots]
+        base_speed = columns["base_speed"][slots]
+        acceleration = columns["acceleration"][slots]
+        direction_x = columns["direction_x"][slots]
+        direction_y = columns["direction_y"][slots]
+        is_moving = (direction_x != 0) | (direction_y != 0)
+
+        # below our base speed we speed up by a pixel, otherwise we accelerate while moving
+        is_below_base = speed < base_speed
+        acceleration = np.where(
+            is_below_base, acceleration,
+            np.where(is_moving, acceleration + (base_speed * columns["acceleration_rate"][slots]), 0)
+        )
+        acceleration = np.where(
+            is_below_base, acceleration, np.minimum(acceleration, columns["max_acceleration"][slots])
+        )
+        speed = np.where(is_below_base, speed + 1, base_speed + acceleration)
+
+        columns["acceleration"][slots] = acceleration
+        columns["speed"][slots] = speed
+        columns["x"][slots] += direction_x * speed * delta_time
+        columns["y"][slots] += direction_y * speed * delta_time
+
+        self.update_bounds(slots)
+
+        return columns["id"][slots[is_moving]]
+
+    def advance_ticks(self, delta_time, ids = None):
+        """
+        Advance the tick of entities by the elapsed time, as `Entity.can_think` does for a single entity
+        :param delta_time:
+        :param ids: (optional) the ids to advance, defaults to every entity
+        :return: numpy array of the ids that can think
+        """
+        slots = self.get_slots(ids)
+        last_tick = self.columns["last_tick"][slots]
+
+        is_first = np.isnan(last_tick)
+        last_tick = np.where(is_first, delta_time, last_tick + delta_time)
+        can_think = is_first | (last_tick > self.columns["tick_rate"][slots])
+        last_tick = np.where(can_think & ~is_first, 0, last_tick)
+
+        self.columns["last_tick"][slots] = last_tick
+
+        return self.columns["id"][slots[can_think]]
+
+    def memory_footprint(self):
+        """
+        :return: dict of the number of bytes used by each array and the total
+        """
+        footprint = {name: column.nbytes for name, column in self.columns.items()}
+        footprint["bounds"] = self.bounds.nbytes
+        footprint["total"] = sum(footprint.values())
+
+        return footprint
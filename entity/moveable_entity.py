@@ -1,3 +1,4 @@
+import math
 from warnings import warn
 from random import choice, randint
 from typing import List, Tuple
@@ -6,14 +7,21 @@ from consts.colour import Colour
 from consts.direction import MovementDirection, DIRECTION_MAGNITUDES
 from consts.movement_type import MovementType
 from entity import Entity
-from pathfinding import astar
+from entity.entity_store import store_property
 
 
 class MovableEntity(Entity):
     """
     An entity that can move
     """
+    __slots__ = [
+        "destination", "last_destination", "movement_type", "target", "target_offset", "original_target_offset",
+        "movement_direction", "last_movement_direction", "path", "path_step", "find_path_if_stuck",
+        "max_path_iterations", "path_indexes", "path_version", "plan_key", "planned_path",
+    ]
+    
     width_aspect_ratio = 1
+    max_path_iterations_cap = None  # The most any mover looks for a path, such as when the game is over budget
     
     def __init__(self,
                  x: int, y: int, height: int, width: int,
@@ -41,7 +49,21 @@ class MovableEntity(Entity):
         self.acceleration_rate = 0.01
         self.path = None
         self.path_step = None
+        # where each cell is on our path, and the version of the grid's walkability it was found for
+        self.path_indexes = None
+        self.path_version = None
+        # what the last path we planned depended on and what we got, see `plan_path`
+        self.plan_key = None
+        self.planned_path = None
         self.find_path_if_stuck = False
+        # how hard we look for a path before settling for part of one, None for the grid's default
+        self.max_path_iterations = None
+    
+    speed = store_property("speed")
+    base_speed = store_property("base_speed")
+    acceleration = store_property("acceleration")
+    max_acceleration = store_property("max_acceleration")
+    acceleration_rate = store_property("acceleration_rate")
     
     def think(self, frame_count):
         """
@@ -51,6 +73,13 @@ class MovableEntity(Entity):
         if super().think(frame_count):
             self.move()
     
+    def is_idle(self):
+        """
+        We're always looking for somewhere to move to
+        :return:
+        """
+        return False
+    
     @staticmethod
     def need_to_move_in_plane(current, lower_bound, middle, upper_bound):
         """
@@ -167,15 +196,20 @@ class MovableEntity(Entity):
         :return:
         """
         if self.find_path_if_stuck:
-            destination_entity = Entity.all[self.target]
+            destination_entity = Entity.all.get(self.target)
+            if destination_entity is None:
+                return
 
             if not result:
-                if not self.path or destination_entity.grid_pixels not in self.path:
-                    path_to_target = self.get_path(destination_entity.grid_pixels[0], destination_entity.grid_pixels[1])
-                    if path_to_target is not None and destination_entity.grid_pixels in path_to_target:
+                # only look for a path again if we, our target or the grid have changed since we last looked
+                target_cell = destination_entity.grid_pixels
+                if not self.is_on_path(target_cell):
+                    changed, path_to_target = self.plan_path(target_cell)
+                    if path_to_target is not None and target_cell in path_to_target:
                         self.reset_path(path_to_target)
-                    else:
+                    elif changed or not self.path:
                         # warn("couldn’t get back on track")
+                        # if we're already following the same partial path keep going rather than start it again
                         if self.is_try_to_follow_find_path():
                             self.reset_path(path_to_target)
             else:
@@ -225,7 +259,7 @@ class MovableEntity(Entity):
             following our existing path
             :return:
             """
-            new_path = self.get_path(final_destination[0], final_destination[1])
+            new_path = self.plan_path(final_destination)[1]
             
             # this is a hack in the case of path-finding timing out
             if new_path is not None and final_destination in new_path:
@@ -237,12 +271,21 @@ class MovableEntity(Entity):
         if self.movement_type == MovementType.NONE:
             return None
 
+        # the walls have changed since we found our path, so it may go through one now
+        if self.path and not self.is_path_valid():
+            self.reset_path()
+
         destination = None
         destination_entity = self.get_destination_target()
         
         if destination_entity and self.movement_type in [MovementType.CHASE, MovementType.PATH]:
             destination = destination_entity.grid_pixels
         
+        if self.movement_type == MovementType.PATH and destination_entity is None:
+            # what we were following has been despawned
+            self.reset_path()
+            return None
+        
         if self.movement_type == MovementType.PATH:
             # set the target offset to 0 s that we move along points
             # having a target offset may mean we don’t progress to the next point
@@ -263,7 +306,7 @@ class MovableEntity(Entity):
                 get_path_to_destination()
             
             if self.path:
-                if final_destination not in self.path:
+                if not self.is_on_path(final_destination):
                     # continue on our current path as it will probably get as closer to the
                     # destination anyways TODO: Make this a configurable setting?
                     if self.path_step < len(self.path) - 1:
@@ -322,9 +365,68 @@ class MovableEntity(Entity):
         if new_path is None:
             self.path = None
             self.path_step = None
+            self.path_indexes = None
+            self.path_version = None
         else:
             self.path = new_path
             self.path_step = 0
+            self.path_indexes = {cell: index for index, cell in enumerate(new_path)}
+            self.path_version = Entity.grid.walkability_version
+    
+    def is_on_path(self, point):
+        """
+        Is a cell's pixel center on our path, without scanning the path for it
+        :param point: (x, y)
+        :return: bool
+        """
+        return self.path_indexes is not None and point in self.path_indexes
+    
+    def is_path_valid(self):
+        """
+        Was our path found for the grid's walkability as it is now
+        :return: bool
+        """
+        return self.path_version == Entity.grid.walkability_version
+    
+    def get_plan_key(self, destination):
+        """
+        What a path we plan depends on, our target and the cell it's in, the cell we're in, how hard we look and the
+        grid's walkability
+        :param destination: the pixel center of the cell we're planning to
+        :return: Tuple
+        """
+        return (
+            self.target, destination, self.grid_pixels, self.get_max_path_iterations(),
+            Entity.grid.walkability_version
+        )
+    
+    def plan_path(self, destination):
+        """
+        Get a path to `destination`, only looking for one if something the path depends on has changed since we last
+        planned. Otherwise we'd get the same path, or fail to get one again, so we get what we got last time
+        :param destination: (x, y)
+        :return: Tuple of whether we looked for a path, and the path as a List of (x, y) or None if there isn't one
+        """
+        plan_key = self.get_plan_key(destination)
+        if plan_key == self.plan_key:
+            return False, self.planned_path
+        
+        self.plan_key = plan_key
+        self.planned_path = self.get_path(destination[0], destination[1])
+        
+        return True, self.planned_path
+    
+    def get_max_path_iterations(self):
+        """
+        How hard we look for a path, our own `max_path_iterations` unless the game has capped it lower for everyone
+        :return: int or None for the grid's default
+        """
+        max_iterations = self.max_path_iterations
+        if MovableEntity.max_path_iterations_cap is not None:
+            if max_iterations is None or max_iterations > MovableEntity.max_path_iterations_cap:
+                max_iterations = MovableEntity.max_path_iterations_cap
+        
+        return max_iterations
     
     def get_path(self, x, y):
         """
@@ -336,11 +438,13 @@ class MovableEntity(Entity):
         
         # TODO this will fail if any of thses are 0
         if start_row and start_column and end_row and end_column:
-            path = astar(Entity.grid.grid_for_pathing(), (start_row, start_column), (end_row, end_column))
+            path = Entity.grid.find_path(
+                (start_row, start_column), (end_row, end_column), max_iterations = self.get_max_path_iterations()
+            )
             
             if path:
                 # convert from row,col to pixels
-                return [Entity.grid.get_pixel_center(p[0], p[1]) for p in path]
+                return Entity.grid.convert_path_to_pixels(path)
         
         return None
     
@@ -428,6 +532,11 @@ class MovableEntity(Entity):
             self.update_effective_speed()
         
         self.movement_direction = direction
+        
+        # so that the store can move us along with everything else, see `EntityStore.integrate`
+        direction_x, direction_y = DIRECTION_MAGNITUDES.get(direction, (0, 0))
+        self.entity_store.set(self.id, "direction_x", direction_x)
+        self.entity_store.set(self.id, "direction_y", direction_y)
     
     def update_effective_speed(self):
         """
@@ -436,18 +545,22 @@ class MovableEntity(Entity):
         :return:
         """
         
-        if self.speed < self.base_speed:
-            self.speed += 1
+        # each of these is a read from the entity store, so only read them once
+        speed = self.speed
+        base_speed = self.base_speed
+        
+        if speed < base_speed:
+            self.speed = speed + 1
         else:
             if self.movement_direction != MovementDirection.NONE:
-                self.acceleration += self.base_speed * self.acceleration_rate
+                acceleration = self.acceleration + base_speed * self.acceleration_rate
             else:
-                self.acceleration = 0
+                acceleration = 0
             
-            if self.acceleration > self.max_acceleration:
-                self.acceleration = self.max_acceleration
+            acceleration = min(acceleration, self.max_acceleration)
             
-            self.speed = self.base_speed + self.acceleration
+            self.acceleration = acceleration
+            self.speed = base_speed + acceleration
     
     def move_left(self):
         """
@@ -550,7 +663,7 @@ class MovableEntity(Entity):
         we ignore self.target_offset and return 0
         :return:
         """
-        if self.path and self.destination in self.path:
+        if self.is_on_path(self.destination):
             return 0
         
         return self.target_offset
@@ -610,55 +723,134 @@ class MovableEntity(Entity):
         """
         result = []
         
+        # static solids fill their tile so we can work out if we'd run into one from the grid alone
+        static_collision = None
+        if direction != MovementDirection.NONE:
+            static_collision = Entity.grid.get_static_collision(search_x, search_y, x_magnitude, y_magnitude)
+        
+        # everything else we sweep our whole box against, if we're in the collision world
+        if Entity.collision_world is not None and self.id in Entity.collision_world:
+            return self.check_collision_sweep(direction, x_magnitude, y_magnitude, static_collision)
+        
+        if static_collision is not None:
+            clamp_x, clamp_y, collision_id = static_collision
+            self.clamp_position(direction, clamp_x, clamp_y)
+            return self.collide(collision_id, 0)
+        
         # based on our direction which x,y deltas do we need to be looking in?
         magnitudes = DIRECTION_MAGNITUDES[direction]
-        collision_items = Entity.grid.query(
-            search_x + (magnitudes[0]), search_y + (magnitudes[1]), k = 8, distance_upper_bound = self.width
+        collision_ids, collision_layers, collision_distances, _ = Entity.grid.query_tiles(
+            search_x + (magnitudes[0]), search_y + (magnitudes[1]), k = 8, distance_upper_bound = self.width,
+            exclude_static = True, exclude_empty = True
         )
-        
-        if collision_items is not None:
-            # todo probably a list comprehension here
-            for collision_item in collision_items:
-                if not collision_item:
-                    continue
-                if collision_item[0]:
-                    if collision_item[0] == 0:
+
+        is_other = collision_ids != self.id
+        if Entity.collision_matrix is not None:
+            is_other &= Entity.collision_matrix.can_interact(
+                self.grid_layer, self.entity_type_id, collision_layers, Entity.grid.get_entity_types(collision_ids)
+            )
+
+        for collision_id, distance in zip(collision_ids[is_other].tolist(), collision_distances[is_other].tolist()):
+            collision_entity: Entity = Entity.all[collision_id]
+            
+            if collision_entity.is_solid and direction != MovementDirection.NONE:
+                collision_point = collision_entity.get_point_for_approaching_direction(direction)
+                
+                # clamp but leave 1px difference
+                clamp_x = collision_point[0] - search_x + (DIRECTION_MAGNITUDES[direction][0] * -1)
+                clamp_y = collision_point[1] - search_y + (DIRECTION_MAGNITUDES[direction][1] * -1)
+                
+                # if our clamp distance is greater than our magnitude distance
+                # it means we're close but not yet colliding
+                if direction in [MovementDirection.NORTH, MovementDirection.SOUTH]:
+                    if clamp_y != 0 and abs(clamp_y) > abs(y_magnitude):
                         continue
-                    if collision_item[0] == self.id:
+                
+                elif direction in [MovementDirection.EAST, MovementDirection.WEST]:
+                    if clamp_x != 0 and abs(clamp_x) > abs(x_magnitude):
                         continue
-                    
-                    collision_entity: Entity = Entity.all[collision_item[0]]
-                    
-                    if collision_entity.is_solid and direction != MovementDirection.NONE:
-                        collision_point = collision_entity.get_point_for_approaching_direction(direction)
-                        
-                        # clamp but leave 1px difference
-                        clamp_x = collision_point[0] - search_x + (DIRECTION_MAGNITUDES[direction][0] * -1)
-                        clamp_y = collision_point[1] - search_y + (DIRECTION_MAGNITUDES[direction][1] * -1)
-                        
-                        # if our clamp distance is greater than our magnitude distance
-                        # it means we're close but not yet colliding
-                        if direction in [MovementDirection.NORTH, MovementDirection.SOUTH]:
-                            if clamp_y != 0 and abs(clamp_y) > abs(y_magnitude):
-                                continue
-                            
-                            self.set_y(self.y + clamp_y)
-                        
-                        elif direction in [MovementDirection.EAST, MovementDirection.WEST]:
-                            if clamp_x != 0 and abs(clamp_x) > abs(x_magnitude):
-                                continue
-                            
-                            self.set_x(self.x + clamp_x)
-                        
-                        # set direction to none and refresh since we've clamped
-                        self.destination = (self.x, self.y,)
-                        self.set_direction(MovementDirection.NONE)
-                        self.refresh_dimensions()
-                    
-                    return self.collide(collision_item[0], collision_item[1])
+                
+                self.clamp_position(direction, clamp_x, clamp_y)
+            
+            return self.collide(collision_id, distance)
         
         return result
     
+    def check_collision_sweep(self, direction: MovementDirection, x_magnitude, y_magnitude, static_collision = None):
+        """
+        Sweep our box along the magnitudes through the collision world. We stop at the first solid thing we'd touch,
+        or static solid if that's first, and collide with it. Anything that isn't solid that we'd pass through on the
+        way is collided with too, with how far our leading edge would get past its middle, so that like items found
+        by `check_collision_point` they only react once we're over them rather than as soon as we touch them
+        :param direction:
+        :param x_magnitude:
+        :param y_magnitude:
+        :param static_collision: (optional) the result of `Grid.get_static_collision` for the same movement
+        :return:
+        """
+        contacts = Entity.collision_world.sweep(self.id, x_magnitude, y_magnitude)
+        
+        # how far we get, and what stops us
+        move_x = x_magnitude
+        move_y = y_magnitude
+        stopped_by = None
+        passed_through = []
+        
+        if static_collision is not None:
+            move_x, move_y, stopped_by = static_collision
+        
+        for collision_id, contact_time, normal_x, normal_y in zip(
+                contacts["second"].tolist(), contacts["time"].tolist(),
+                contacts["normal_x"].tolist(), contacts["normal_y"].tolist()
+        ):
+            # clamp but leave 1px difference
+            clamp_x = (x_magnitude * contact_time) + normal_x
+            clamp_y = (y_magnitude * contact_time) + normal_y
+            
+            # is a static solid in the way first
+            if static_collision is not None and \
+                    abs(static_collision[0]) + abs(static_collision[1]) < abs(clamp_x) + abs(clamp_y):
+                break
+            
+            if Entity.all[collision_id].is_solid:
+                move_x, move_y, stopped_by = clamp_x, clamp_y, collision_id
+                break
+            
+            passed_through.append(collision_id)
+        
+        leading_x, leading_y = self.get_point_for_direction(direction) if direction != MovementDirection.NONE \
+            else self.middle
+        
+        for collision_id in passed_through:
+            other_x, other_y = Entity.all[collision_id].middle
+            self.collide(collision_id, math.hypot(leading_x + move_x - other_x, leading_y + move_y - other_y))
+        
+        if stopped_by is None:
+            return []
+        
+        if direction != MovementDirection.NONE:
+            self.clamp_position(direction, move_x, move_y)
+        
+        return self.collide(stopped_by, 0)
+    
+    def clamp_position(self, direction: MovementDirection, clamp_x, clamp_y):
+        """
+        We've run into something solid, move up to it along the direction we're going and stop
+        :param direction:
+        :param clamp_x:
+        :param clamp_y:
+        :return:
+        """
+        if direction in [MovementDirection.NORTH, MovementDirection.SOUTH]:
+            self.set_y(self.y + clamp_y)
+        elif direction in [MovementDirection.EAST, MovementDirection.WEST]:
+            self.set_x(self.x + clamp_x)
+        
+        # set direction to none and refresh since we've clamped
+        self.destination = (self.x, self.y,)
+        self.set_direction(MovementDirection.NONE)
+        self.refresh_dimensions()
+    
     def move_to_point(self, destination_x, destination_y):
         """
         For a destination determine the nearest grid center position and set our direction towards it so that
@@ -1,4 +1,5 @@
 from typing import List
+import numpy as np
 from .entity import Entity
 from .moveable_entity import MovableEntity
 from consts.movement_type import MovementType
@@ -6,12 +7,20 @@ from consts.colour import Colour
 
 
 class ScoutingEntity(MovableEntity):
+    __slots__ = [
+        "search_for_entity_types", "search_distance", "search_tile_range", "use_line_of_sight",
+        "original_movement_type", "original_target",
+    ]
+    
+    is_scouting_deferred = False  # Keep after what we've got rather than look around, such as when over budget
+    
     def __init__(
             self, x: int, y: int, height: int, width: int,
             base_colour: Colour, tick_rate: float = 5,
             is_solid: bool = True, parent_collection: List = None,
             grid_layer: int = 0, entity_type_id: int = 0, movement_type: MovementType = MovementType.PATROL,
-            target = None, target_offset = 0, search_for_entity_types: List[int] = None, search_tile_range = 1
+            target = None, target_offset = 0, search_for_entity_types: List[int] = None, search_tile_range = 1,
+            use_line_of_sight: bool = False
     ):
         super().__init__(
             x, y, height, width, base_colour, tick_rate, is_solid, parent_collection, grid_layer, entity_type_id,
@@ -20,6 +29,8 @@ class ScoutingEntity(MovableEntity):
         
         self.search_for_entity_types = None
         self.search_distance = Entity.grid.tile_size * search_tile_range
+        self.search_tile_range = search_tile_range
+        self.use_line_of_sight = use_line_of_sight
         self.set_search_for_entity_types(search_for_entity_types)
         
         self.original_movement_type = movement_type
@@ -28,6 +39,22 @@ class ScoutingEntity(MovableEntity):
     def set_search_for_entity_types(self, value):
         self.search_for_entity_types = value
     
+    def get_visible(self, entity_ids):
+        """
+        Filter `entity_ids` to those that we can see from our current grid position
+        :param entity_ids:
+        :return:
+        """
+        # the index returned from the tree is the position in the flattened grid
+        grid_index = Entity.grid.query_tree(self.x, self.y)[1]
+        row, column = divmod(int(grid_index), Entity.grid.max_columns)
+        visible = Entity.grid.get_visible_positions(row, column, self.search_tile_range)
+        
+        return [
+            x for x in entity_ids if
+            visible[Entity.grid.query_tree(Entity.all[int(x)].x, Entity.all[int(x)].y)[1]]
+        ]
+    
     def get_destination_target(self):
         """
         If we have a path check and ends in grid position of an entity of interest.
@@ -35,32 +62,42 @@ class ScoutingEntity(MovableEntity):
         If is then return the first as our target.
 
         Need to handle the case of multiple candidates.
-        Currently doesn't have a notion of line of sight.
+        If `use_line_of_sight` then entities of interest hidden behind solid tiles are ignored.
         :return:
         """
+        # if what we were after has been despawned, such as a carrot that's been eaten, go back to our original target
+        if self.target is not None and self.target not in Entity.all:
+            self.target = self.original_target
+        
+        if ScoutingEntity.is_scouting_deferred:
+            return super().get_destination_target()
+        
         # first check if we have a path, does it end in a entity of interest
         
-        def get_nearby_interesting(results, search_for_entity_types):
-
-            if not search_for_entity_types:
+        def get_nearby_interesting(x, y, k, distance_upper_bound = np.inf):
+            """
+            the grid only returns entities of the types we're searching for
+            """
+            if not self.search_for_entity_types:
                 return list()
 
-            return [
-                x[0] for x in results if
-                x[0] > 0 and Entity.all[int(x[0])].entity_type_id in search_for_entity_types
-            ]
+            return Entity.grid.query_tiles(
+                x, y, k = k, distance_upper_bound = distance_upper_bound,
+                entity_types = self.search_for_entity_types
+            )[0].tolist()
         
         if self.path:
             last_step = self.path[-1]
-            last_step_match = Entity.grid.query(last_step[0], last_step[1], k = 1)
-            last_step_nearby_match = get_nearby_interesting(last_step_match, self.search_for_entity_types)
+            last_step_nearby_match = get_nearby_interesting(last_step[0], last_step[1], k = 1)
             if len(last_step_nearby_match) > 0:
-                self.target = int(last_step_nearby_match[0])
+                self.target = last_step_nearby_match[0]
                 return Entity.all[last_step_nearby_match[0]]
         
         # look for things of interest that are in range
-        nearby = Entity.grid.query(self.x, self.y, k = 16, distance_upper_bound = self.search_distance)
-        nearby_interesting = get_nearby_interesting(nearby, self.search_for_entity_types)
+        nearby_interesting = get_nearby_interesting(self.x, self.y, k = 16, distance_upper_bound = self.search_distance)
+        
+        if self.use_line_of_sight and len(nearby_interesting) > 0:
+            nearby_interesting = self.get_visible(nearby_interesting)
         
         self.movement_type = self.original_movement_type
         self.target_offset = self.original_target_offset
@@ -79,7 +116,7 @@ class ScoutingEntity(MovableEntity):
                 if self.movement_type != self.original_movement_type and self.path:
                     # given we've already not found anything interesting call the super version
                     destination_entity = super().get_destination_target()
-                    if destination_entity.grid_pixels not in self.path:
+                    if not self.is_on_path(destination_entity.grid_pixels):
                         self.reset_path()
                     return destination_entity
         
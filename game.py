@@ -1,7 +1,11 @@
+import io
 import sys
+import time
 from typing import List
 from threading import Timer
 from grid import Grid
+from collision import CollisionWorld, CollisionMatrix
+from simulation import ThinkScheduler, AiLod, LoadGovernor
 from entity import MovableEntity, Entity, ScoutingEntity
 from consts.direction import MovementDirection
 from shape_sprite import ShapeSprite
@@ -16,7 +20,7 @@ from consts import Keys
 class Game:
     def __init__(
             self, width, height, tile_size, width_aspect_ratio: float = 1.0,
-            grid_layers: int = 3, flip_x: bool = False, flip_y: bool = False
+            grid_layers: int = 3, flip_x: bool = False, flip_y: bool = False, frame_budget: float = 1 / 40
     ):
         """
         Initialise our game
@@ -27,6 +31,7 @@ class Game:
         :param grid_layers: How many layers are there in our grid? First layer is assumed to have the collision tiles
         :param flip_x: Do we want to flip the position of x pixels, default 0 is left increasing towards the right
         :param flip_y: Do we want to flip the position of y pixels, default 0 is the top increasing towards the bottom
+        :param frame_budget: How many seconds updating the game can take each frame before we start doing less
         """
         self.is_running: bool = False
         self.exit: bool = False
@@ -47,10 +52,17 @@ class Game:
         self.timers = {}
         self.score: int = 0
         self.held_carrots: int = 0
+        self.player_placed_carrots = set()  # ids of the carrots the player has dropped, which they can't pick up
         self.game_message: str = ""
         self.debug_message: str = ""
         
         self.grid: Grid = None
+        # (level, walls, snapshot of the grid once the walls were added) so restarting the level doesn't add them again
+        self.level_snapshot = None
+        self.scheduler: ThinkScheduler = None
+        self.ai_lod: AiLod = None
+        self.collision_matrix: CollisionMatrix = self.setup_collision_matrix()
+        self.load_governor: LoadGovernor = self.setup_load_governor(frame_budget)
         
         MovableEntity.width_aspect_ratio = width_aspect_ratio
         
@@ -86,6 +98,59 @@ class Game:
         self.menu.add_button("Restart", None, self.menu_reset_game)
         self.menu.add_button("Quit", None, self.quit)
 
+    def setup_collision_matrix(self):
+        """
+        Which layers can collide with each other, items only do something when picked up so they don't need to
+        collide with each other or the world
+        :return: CollisionMatrix
+        """
+        collision_matrix = CollisionMatrix()
+        collision_matrix.set_interaction(Layer.ITEMS, Layer.ITEMS, False)
+        collision_matrix.set_interaction(Layer.ITEMS, Layer.WORLD, False)
+        
+        return collision_matrix
+
+    def setup_load_governor(self, frame_budget):
+        """
+        What we stop doing when updating the game goes over budget, in the order we stop doing it. Npcs think less
+        often, then stop looking around for things of interest, then settle for part of a path sooner
+        :param frame_budget: seconds
+        :return: LoadGovernor
+        """
+        load_governor = LoadGovernor(frame_budget)
+        
+        def set_npc_tick_rate_scale(scale):
+            if self.scheduler is not None:
+                self.scheduler.set_group_tick_rate_scale(1, scale)
+        
+        def set_scouting_deferred(is_deferred):
+            ScoutingEntity.is_scouting_deferred = is_deferred
+        
+        def set_max_path_iterations_cap(cap):
+            MovableEntity.max_path_iterations_cap = cap
+        
+        load_governor.add_step(
+            "stretch npc tick rate", lambda: set_npc_tick_rate_scale(2), lambda: set_npc_tick_rate_scale(1)
+        )
+        load_governor.add_step(
+            "defer scouting", lambda: set_scouting_deferred(True), lambda: set_scouting_deferred(False)
+        )
+        load_governor.add_step(
+            "cap path expansions", lambda: set_max_path_iterations_cap(50), lambda: set_max_path_iterations_cap(None)
+        )
+        
+        return load_governor
+
+    def schedule(self, entity: Entity, group: int):
+        """
+        Have an entity think when it's due
+        :param entity:
+        :param group: the order things think in a frame, 0 for items, 1 for npcs, 2 for the player
+        :return:
+        """
+        # things with nothing to do, such as items, sleep until they're collided with or woken
+        self.scheduler.add(entity.id, entity.get_tick_rate(), group, is_asleep = entity.is_idle())
+    
     def reset_game(self):
         """
         Restart the game and reset the game level
@@ -102,6 +167,7 @@ class Game:
         self.timers = {}
         self.score = 0
         self.held_carrots = 0
+        self.player_placed_carrots = set()
         self.game_message = ""
         self.debug_message = ""
         
@@ -109,8 +175,16 @@ class Game:
         x_max = (self.width // self.tile_size) + 1
         y_max = (self.height // self.tile_size) + 1
         
+        # start the level doing everything, the governor will shed again if it needs to
+        self.load_governor.restore_all()
+        
         self.grid = Grid(x_max, y_max, self.tile_size, self.grid_layers, self.flip_x, self.flip_y)
         Entity.grid = self.grid
+        self.scheduler = ThinkScheduler()
+        Entity.scheduler = self.scheduler
+        self.ai_lod = AiLod()
+        Entity.collision_matrix = self.collision_matrix
+        Entity.collision_world = CollisionWorld(self.collision_matrix)
 
     def menu_reset_game(self, button):
         """
@@ -136,18 +210,30 @@ class Game:
         if self.menu and self.menu.is_visible and self.menu.is_modal:
             return False
 
-        items = self.items.copy()
-        for item in items:
-            item.think(delta_time)
+        started = time.perf_counter()
+
+        # let the grid know where things are moving so it can keep the data around them loaded
+        self.grid.update_residency([(npc.x, npc.y) for npc in self.npcs] + [(self.player.x, self.player.y)])
 
-        del items
+        # npcs further from the player do less
+        self.ai_lod.update(self.player.x, self.player.y)
 
-        npcs = self.npcs.copy()
-        for npc in npcs:
-            npc.think(delta_time)
-        del npcs
+        # only those that are due think, items first then npcs then the player
+        for entity_id in self.scheduler.advance(delta_time):
+            entity = Entity.all.get(entity_id)
+            
+            # something that thought before us this frame may have removed it
+            if entity is not None:
+                entity.think(delta_time)
+                
+                if entity.is_idle():
+                    self.scheduler.sleep(entity_id)
 
-        self.player.think(delta_time)
+        # if we're over budget do less, or if there's room again go back to normal
+        changed_step = self.load_governor.record_frame(time.perf_counter() - started)
+        if changed_step is not None:
+            shed = ", ".join(step.name for step in self.load_governor.get_active_steps())
+            self.debug_message = f"shedding: {shed}" if shed else ""
 
         return True
 
@@ -161,11 +247,12 @@ class Game:
         with open(f"resources/level/{self.level:02}/layout.txt") as f:
             wall_lines = f.readlines()
         
+        # the walls go in first so that the grid can be snapshotted with just them
+        self.load_walls(wall_lines)
+        
         for row_index, row_value in enumerate(wall_lines):
             for col_index, col_value in enumerate(row_value):
-                if col_value == "#":
-                    self.add_wall(row_index, col_index)
-                elif col_value == "@":
+                if col_value == "@":
                     self.add_player(row_index, col_index)
                 elif col_value == "&":
                     self.add_rabbit(row_index, col_index)
@@ -178,7 +265,6 @@ class Game:
                 elif col_value == "X":
                     self.add_end(row_index, col_index)
         
-        self.start_rabbit()
         self.is_running = True
     
     def add_player(self, row, column):
@@ -202,6 +288,7 @@ class Game:
         self.player.max_acceleration = 10
         self.player.acceleration_rate = 0.25
         self.player.load_shape_sprite("player", 3)
+        self.schedule(self.player, 2)
     
     def add_rabbit(self, row, column):
         """
@@ -218,13 +305,15 @@ class Game:
             target = self.player.id, target_offset = self.tile_size * 2,
             grid_layer = Layer.NPC.value, entity_type_id = EntityType.RABBIT.value,
             movement_type = MovementType.CHASE,
-            search_for_entity_types = [EntityType.CARROT.value], search_tile_range = 3
+            search_for_entity_types = [EntityType.CARROT.value], search_tile_range = 3,
+            use_line_of_sight = True
         )
         self.rabbit.base_speed = 4
         self.rabbit.max_acceleration = 8
-        self.rabbit.movement_speed = 4
         self.rabbit.acceleration_rate = 0.5
         self.rabbit.load_shape_sprite("rabbit", 3)
+        self.schedule(self.rabbit, 1)
+        self.ai_lod.add(self.rabbit)
     
     def remove_item(self, item):
         """
@@ -233,6 +322,9 @@ class Game:
         :return:
         """
         self.grid - item.id
+        Entity.collision_world.remove(item.id)
+        self.scheduler.remove(item.id)
+        Entity.all.despawn(item.id)
         if item in self.items:
             self.items.remove(item)
     
@@ -250,6 +342,7 @@ class Game:
         )
         item.on_collide = self.apply_speed_down
         item.load_shape_sprite("speed_down", 3)
+        self.schedule(item, 0)
     
     def apply_speed_down(self, apply_from, apply_to):
         """
@@ -281,6 +374,7 @@ class Game:
         )
         item.on_collide = self.apply_speed_up
         item.load_shape_sprite("speed_up", 2)
+        self.schedule(item, 0)
     
     def apply_speed_up(self, apply_from, apply_to):
         """
@@ -306,8 +400,7 @@ class Game:
         :return:
         """
         x, y = self.grid.get_pixel_center(row, column)
-        carrot = self.place_carrot(x, y)
-        carrot.player_placed = False
+        self.place_carrot(x, y)
 
     def place_carrot(self, x, y):
         """
@@ -322,6 +415,7 @@ class Game:
         )
         item.on_collide = self.eat_carrot
         item.load_shape_sprite("carrot", 3)
+        self.schedule(item, 0)
         return item
 
     def player_drop_carrot(self):
@@ -333,7 +427,7 @@ class Game:
             self.held_carrots -= 1
             x, y = self.player.grid_pixels
             carrot = self.place_carrot(x, y)
-            carrot.player_placed = True
+            self.player_placed_carrots.add(carrot.id)
 
     def eat_carrot(self, carrot, eater):
         """
@@ -348,7 +442,7 @@ class Game:
         if eater.id == self.rabbit.id:
             self.score += 1
         elif eater.id == self.player.id:
-            if carrot.player_placed:
+            if carrot.id in self.player_placed_carrots:
                 return
             self.held_carrots += 1
 
@@ -368,6 +462,7 @@ class Game:
         )
         item.on_collide = self.check_end
         item.load_shape_sprite("exit", 3)
+        self.schedule(item, 0)
     
     def check_end(self, goal, other):
         """
@@ -398,13 +493,6 @@ class Game:
         self.level += 1
         self.load_level()
     
-    def start_rabbit(self):
-        """
-        Make the rabbit follow the player, set the rabbits target to be the player and set it's `target_offset`
-        :return:
-        """
-        self.rabbit.movement_speed = 3
-    
     def add_wall(self, row, column):
         """
         Add a wall to the game world
@@ -412,12 +500,51 @@ class Game:
         :param column:
         :return:
         """
+        self.add_walls([row], [column])
+    
+    def load_walls(self, wall_lines):
+        """
+        Add the walls of the level. The first time a level is loaded the grid is snapshotted once they're in, restarting
+        the level loads the snapshot and keeps the walls rather than adding them one at a time again
+        :param wall_lines: the lines of the level layout
+        :return:
+        """
+        if self.level_snapshot is not None and self.level_snapshot[0] == self.level:
+            _, self.walls, snapshot = self.level_snapshot
+            snapshot.seek(0)
+            self.grid = Grid.load(snapshot)
+            Entity.grid = self.grid
+            return
+        
+        wall_rows = []
+        wall_columns = []
+        
+        for row_index, row_value in enumerate(wall_lines):
+            for col_index, col_value in enumerate(row_value):
+                if col_value == "#":
+                    wall_rows.append(row_index)
+                    wall_columns.append(col_index)
+        
+        self.add_walls(wall_rows, wall_columns)
+        
+        snapshot = io.BytesIO()
+        self.grid.save(snapshot)
+        self.level_snapshot = (self.level, self.walls, snapshot)
+    
+    def add_walls(self, rows, columns):
+        """
+        Add many walls to the game world
+        :param rows:
+        :param columns:
+        :return:
+        """
         # add_at_grid_position
-        x, y = self.grid.get_pixel_center(row, column)
-        Entity(
-            x, y, int(self.tile_size), int(self.tile_size), Colour.BROWN, 5,
-            True, self.walls, grid_layer = Layer.WORLD.value
-        )
+        wall_x, wall_y = self.grid.get_pixel_centers(rows, columns)
+        for x, y in zip(wall_x.tolist(), wall_y.tolist()):
+            Entity(
+                x, y, int(self.tile_size), int(self.tile_size), Colour.BROWN, 5,
+                True, self.walls, grid_layer = Layer.WORLD.value, is_static = True
+            )
     
     def get_grid_data(self, x, y):
         """
@@ -477,9 +604,9 @@ class Game:
         if self.debug:
             # debug stuffs
             if key == Keys.PERIOD:
-                player.tick_rate -= 1
+                player.set_tick_rate(player.tick_rate - 1)
             elif key == Keys.COMMA:
-                player.tick_rate += 1
+                player.set_tick_rate(player.tick_rate + 1)
             elif key == Keys.W:
                 rabbit.movement_type = MovementType.NONE
                 rabbit.target = None
@@ -496,8 +623,6 @@ class Game:
                 rabbit.movement_type = MovementType.NONE
                 rabbit.target = None
                 rabbit.move_down()
-            elif key == Keys.X:
-                self.start_rabbit()
 
     def on_key_release(self, key):
         """
@@ -1 +1,4 @@
 from .grid import Grid
+from .chunked_grid import ChunkedGrid
+from .sparse_grid import SparseGrid
+from .query_result import QueryResult
@@ -0,0 +1,459 @@
+import os
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+from itertools import count
+import numpy as np
+from .grid import Grid
+from .layer_view import LayerView
+
+
+class ChunkedGrid(Grid):
+    """
+    A grid for worlds too large to keep in memory. The data is split into square chunks of `chunk_size` tiles
+    which are stored on disk, one memory mapped file per chunk. Chunks are loaded as things move near them and
+    least recently used chunks are evicted once there are more than `max_resident_chunks` loaded, chunks with
+    something moving nearby are never evicted.
+
+    Chunks that have never been written to are not created on disk and read as 0s.
+    As the grid is always `compact` there is no KDTree, tile centers are worked out as they are needed.
+
+    Arrays with a value for every tile, such as `walkable`, `get_path_distances` and `get_fields`, are memory mapped
+    from a scratch directory rather than kept in memory, only the parts of them being used are resident.
+    The scratch directory, and the chunk directory if we made it, are removed by `close` or when the grid is garbage
+    collected. Use it as a context manager to close it when done.
+    """
+
+    def __init__(
+            self, x_max, y_max, tile_size, number_of_layers = 3, flip_x = False, flip_y = False,
+            journal_size = 4096, dtype = np.int32, chunk_size = 64, chunk_directory = None,
+            max_resident_chunks = 64, load_radius = 1
+    ):
+        """
+        :param x_max:
+        :param y_max:
+        :param tile_size:
+        :param number_of_layers:
+        :param flip_x:
+        :param flip_y:
+        :param journal_size: How many changes to the grid data do we keep for `get_changes_since`
+        :param dtype: The data type of the data layers
+        :param chunk_size: How many tiles wide and high is each chunk
+        :param chunk_directory: Where the chunks are stored, existing chunks in the directory are used.
+        If not given a temporary directory is used
+        :param max_resident_chunks: How many chunks can be loaded before we start evicting them
+        :param load_radius: How many chunks around something moving are kept loaded
+        """
+        self.chunk_size = chunk_size
+        self.chunk_rows = -(-y_max // chunk_size)
+        self.chunk_columns = -(-x_max // chunk_size)
+        self.chunk_directory = chunk_directory if chunk_directory is not None else tempfile.mkdtemp(prefix = "grid_")
+        # remove the chunk directory when we're done with it, if we made it and it hasn't been saved
+        self.chunk_directory_finalizer = None
+        if chunk_directory is None:
+            self.chunk_directory_finalizer = weakref.finalize(self, shutil.rmtree, self.chunk_directory, True)
+
+        # where the tile arrays are kept, made on first use see `create_tile_array`
+        self.scratch_directory = None
+        self.scratch_directory_finalizer = None
+        self.tile_array_ids = count()
+
+        self.max_resident_chunks = max_resident_chunks
+        self.load_radius = load_radius
+
+        # loaded chunks by (chunk row, chunk column), ordered from least to most recently used
+        self.chunks = OrderedDict()
+        # the chunks that have something moving nearby and should not be evicted
+        self.pinned_chunks = set()
+
+        os.makedirs(self.chunk_directory, exist_ok = True)
+
+        super().__init__(
+            x_max, y_max, tile_size, number_of_layers, flip_x, flip_y, journal_size,
+            compact = True, dtype = dtype
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Write the loaded chunks to disk and let go of them and the tile arrays, removing the scratch directory and
+        the chunk directory if we made it and it hasn't been saved. The grid can't be used afterwards
+        :return:
+        """
+        self.flush()
+        self.chunks.clear()
+        self.pinned_chunks = set()
+
+        self.walkable = None
+        self.neighbour_masks = None
+        self.walkable_at_version = None
+        self.path_distances = None
+        self.static_solids = None
+        self.field_cache.clear()
+
+        for finalizer in (self.scratch_directory_finalizer, self.chunk_directory_finalizer):
+            if finalizer is not None:
+                finalizer()
+
+    def create_data(self, dtype):
+        """
+        There is no dense data, only chunks
+        :param dtype:
+        :return:
+        """
+        self.dtype = np.dtype(dtype)
+        return None
+
+    def create_tile_array(self, name, shape, dtype, fill_value = 0):
+        """
+        Tile arrays are memory mapped from a file in the scratch directory, which is removed once the array is
+        no longer used
+        :param name: what the array is for
+        :param shape:
+        :param dtype:
+        :param fill_value:
+        :return: memory mapped numpy array
+        """
+        if self.scratch_directory is None:
+            self.scratch_directory = tempfile.mkdtemp(prefix = "grid_scratch_")
+            self.scratch_directory_finalizer = weakref.finalize(self, shutil.rmtree, self.scratch_directory, True)
+
+        path = os.path.join(self.scratch_directory, f"{name}_{next(self.tile_array_ids)}.npy")
+        array = np.lib.format.open_memmap(path, mode = "w+", dtype = dtype, shape = shape)
+        weakref.finalize(array, remove_file, path)
+
+        # a new file is already all 0s
+        if fill_value != 0:
+            array.fill(fill_value)
+
+        return array
+
+    def get_row_bands(self):
+        """
+        A band for each row of chunks
+        :return: List of (first row, last row + 1)
+        """
+        return [
+            (top, min(top + self.chunk_size, self.max_rows)) for top in range(0, self.max_rows, self.chunk_size)
+        ]
+
+    def get_chunk_path(self, chunk):
+        """
+        :param chunk: (chunk row, chunk column)
+        :return: The file path of the chunk
+        """
+        return os.path.join(self.chunk_directory, f"chunk_{chunk[0]}_{chunk[1]}.npy")
+
+    def get_chunk_and_offset(self, index):
+        """
+        For an index into the flattened grid which chunk is it in and where in the chunk
+        :param index:
+        :return: (chunk row, chunk column), index into the flattened chunk
+        """
+        row, column = divmod(int(index), self.max_columns)
+        chunk_row, chunk_offset_row = divmod(row, self.chunk_size)
+        chunk_column, chunk_offset_column = divmod(column, self.chunk_size)
+
+        return (chunk_row, chunk_column), (chunk_offset_row * self.chunk_size) + chunk_offset_column
+
+    def get_chunk(self, chunk, create = False):
+        """
+        Get a chunk loading it if needed
+        :param chunk: (chunk row, chunk column)
+        :param create: If the chunk doesn't exist on disk then create it, otherwise None is returned
+        :return: memory mapped array with shape (number_of_layers, chunk_size * chunk_size) or None
+        """
+        data = self.chunks.get(chunk)
+        if data is not None:
+            self.chunks.move_to_end(chunk)
+            return data
+
+        path = self.get_chunk_path(chunk)
+
+        if os.path.exists(path):
+            data = np.load(path, mmap_mode = "r+")
+        elif create:
+            data = np.lib.format.open_memmap(
+                path, mode = "w+", dtype = self.dtype,
+                shape = (self.number_of_layers, self.chunk_size * self.chunk_size)
+            )
+        else:
+            return None
+
+        self.chunks[chunk] = data
+        self.evict_chunks()
+
+        return data
+
+    def evict_chunks(self):
+        """
+        Evict the least recently used chunks that have nothing nearby, until we're within `max_resident_chunks`
+        :return:
+        """
+        if len(self.chunks) <= self.max_resident_chunks:
+            return
+
+        for chunk in list(self.chunks.keys()):
+            if len(self.chunks) <= self.max_resident_chunks:
+                break
+
+            if chunk in self.pinned_chunks:
+                continue
+
+            data = self.chunks.pop(chunk)
+            data.flush()
+            del data
+
+    def update_residency(self, positions):
+        """
+        Load the chunks within `load_radius` chunks of the pixel positions and keep them loaded, any others
+        can be evicted
+        :param positions: List of (x, y) pixel positions
+        :return:
+        """
+        pinned_chunks = set()
+
+        if len(positions) > 0:
+            positions = np.asarray(positions)
+            rows, columns = self.get_rows_columns_for_pixels(positions[:, 0], positions[:, 1])
+            chunks = set(zip((rows // self.chunk_size).tolist(), (columns // self.chunk_size).tolist()))
+        else:
+            chunks = set()
+
+        for chunk_row, chunk_column in chunks:
+            for near_row in range(chunk_row - self.load_radius, chunk_row + self.load_radius + 1):
+                for near_column in range(chunk_column - self.load_radius, chunk_column + self.load_radius + 1):
+                    if 0 <= near_row < self.chunk_rows and 0 <= near_column < self.chunk_columns:
+                        pinned_chunks.add((near_row, near_column))
+
+        self.pinned_chunks = pinned_chunks
+
+        for chunk in pinned_chunks:
+            self.get_chunk(chunk)
+
+        self.evict_chunks()
+
+    def get_snapshot_arrays(self):
+        """
+        The chunks are already stored in `chunk_directory`, so they're flushed and the snapshot records where they
+        are rather than the data itself. So the chunk directory is kept after we're closed, even if we made it
+        :return: dict of name to numpy array
+        """
+        self.flush()
+
+        if self.chunk_directory_finalizer is not None:
+            self.chunk_directory_finalizer.detach()
+            self.chunk_directory_finalizer = None
+
+        arrays = super().get_snapshot_arrays()
+        del arrays["data"]
+        arrays["chunk_directory"] = np.array(os.path.abspath(self.chunk_directory))
+        arrays["chunk_size"] = np.array(self.chunk_size)
+        arrays["number_of_layers"] = np.array(self.number_of_layers)
+        arrays["dtype"] = np.array(self.dtype.str)
+
+        return arrays
+
+    @classmethod
+    def load(cls, path, mmap = True, journal_size = 4096, max_resident_chunks = 64, load_radius = 1):
+        """
+        Load a grid saved with `ChunkedGrid.save`, it uses the chunks in the `chunk_directory` it was saved with so
+        changes made to the grid are written to them
+        :param path:
+        :param mmap: the chunks are always memory mapped
+        :param journal_size:
+        :param max_resident_chunks:
+        :param load_radius:
+        :return: ChunkedGrid
+        """
+        with np.load(path) as snapshot:
+            x_max, y_max = snapshot["dimensions"].tolist()
+            flip_x, flip_y = snapshot["flip"].tolist()
+
+            grid = cls(
+                x_max, y_max, snapshot["tile_size"].item(), int(snapshot["number_of_layers"]), flip_x, flip_y,
+                journal_size, dtype = np.dtype(str(snapshot["dtype"])), chunk_size = int(snapshot["chunk_size"]),
+                chunk_directory = str(snapshot["chunk_directory"]), max_resident_chunks = max_resident_chunks,
+                load_radius = load_radius
+            )
+            grid.restore_snapshot_extras(snapshot)
+
+        grid.rebuild_locations()
+
+        return grid
+
+    def flush(self):
+        """
+        Write all of the loaded chunks to disk
+        :return:
+        """
+        for data in self.chunks.values():
+            data.flush()
+
+    def get_data(self, layer, index):
+        """
+        Get the value in the data from the chunk it's in, loading the chunk if it isn't resident
+        :param layer:
+        :param index: index into the flattened grid
+        :return: the value, 0 if its chunk has never been written to
+        """
+        chunk, offset = self.get_chunk_and_offset(index)
+        data = self.get_chunk(chunk)
+
+        if data is None:
+            return self.dtype.type(0)
+
+        return data[layer][offset]
+
+    def get_cell_data(self, indexes, layers = None):
+        """
+        Get the values in every layer for the `indexes` into the flattened grid, reading each chunk once
+        :param indexes:
+        :param layers: (optional) only get the values in these layers
+        :return: numpy array with shape (number_of_layers or len(layers), len(indexes))
+        """
+        if layers is None:
+            layers = list(range(self.number_of_layers))
+
+        layers = np.asarray(layers, dtype = int)
+        indexes = np.asarray(indexes, dtype = int)
+        result = np.zeros((len(layers), len(indexes)), dtype = self.dtype)
+
+        rows, columns = np.divmod(indexes, self.max_columns)
+        chunk_rows, offset_rows = np.divmod(rows, self.chunk_size)
+        chunk_columns, offset_columns = np.divmod(columns, self.chunk_size)
+        offsets = (offset_rows * self.chunk_size) + offset_columns
+
+        # read each chunk once for all of the indexes in it
+        chunk_ids = (chunk_rows * self.chunk_columns) + chunk_columns
+        order = np.argsort(chunk_ids, kind = "stable")
+        unique_chunk_ids, starts = np.unique(chunk_ids[order], return_index = True)
+
+        for chunk_id, positions in zip(unique_chunk_ids.tolist(), np.split(order, starts[1:])):
+            data = self.get_chunk(divmod(chunk_id, self.chunk_columns))
+
+            if data is not None:
+                result[:, positions] = data[np.ix_(layers, offsets[positions])]
+
+        return result
+
+    def store_data(self, layer, index, value):
+        """
+        Store the value in the chunk it's in, use `set_data` so that changes are recorded.
+        A chunk is only created on disk when a value other than 0 is stored in it
+        :param layer:
+        :param index: index into the flattened grid
+        :param value:
+        :return:
+        """
+        chunk, offset = self.get_chunk_and_offset(index)
+        data = self.get_chunk(chunk, create = value != 0)
+
+        # a chunk that doesn't exist is already all 0s
+        if data is not None:
+            data[layer][offset] = value
+
+    def rebuild_locations(self):
+        """
+        If the chunks have been changed directly, rebuild where everything is from the chunks on disk
+        :return:
+        """
+        self.flush()
+        self.locations = {}
+
+        for chunk_row in range(self.chunk_rows):
+            for chunk_column in range(self.chunk_columns):
+                path = self.get_chunk_path((chunk_row, chunk_column))
+                if not os.path.exists(path):
+                    continue
+
+                data = np.load(path, mmap_mode = "r")
+                layers, offsets = np.nonzero(data)
+
+                for layer, offset, value in zip(layers, offsets, data[layers, offsets].tolist()):
+                    chunk_offset_row, chunk_offset_column = divmod(int(offset), self.chunk_size)
+                    row = (chunk_row * self.chunk_size) + chunk_offset_row
+                    column = (chunk_column * self.chunk_size) + chunk_offset_column
+                    self.locations[value] = (int(layer), (row * self.max_columns) + column)
+
+    def build_walkable(self):
+        """
+        Fill the inside of the `walkable` border from the 0 layer of every chunk on disk, without loading them
+        :return:
+        """
+        self.flush()
+        self.walkable[1:-1, 1:-1] = True
+
+        for chunk_row in range(self.chunk_rows):
+            for chunk_column in range(self.chunk_columns):
+                path = self.get_chunk_path((chunk_row, chunk_column))
+                if not os.path.exists(path):
+                    continue
+
+                layer = np.load(path, mmap_mode = "r")[0].reshape((self.chunk_size, self.chunk_size))
+
+                top = chunk_row * self.chunk_size
+                left = chunk_column * self.chunk_size
+                bottom = min(top + self.chunk_size, self.max_rows)
+                right = min(left + self.chunk_size, self.max_columns)
+
+                self.walkable[top + 1:bottom + 1, left + 1:right + 1] = layer[:bottom - top, :right - left] == 0
+
+    def build_fields(self, row, column):
+        """
+        Work out the fields a band of rows at a time into tile arrays, rather than from the pixel centers of every tile
+        :param row:
+        :param column:
+        :return: distances, angles
+        """
+        x, y = self.get_pixel_center(row, column)
+        distances = self.create_tile_array("field_distances", (self.max_rows * self.max_columns,), np.float32)
+        angles = self.create_tile_array("field_angles", (self.max_rows * self.max_columns,), np.float32)
+
+        for top, bottom in self.get_row_bands():
+            band = slice(top * self.max_columns, bottom * self.max_columns)
+            center_y, center_x = self.tree.get_centers(*np.divmod(np.arange(band.start, band.stop), self.max_columns))
+            row_distances = center_y - y
+            column_distances = center_x - x
+
+            distances[band] = np.sqrt((column_distances * column_distances) + (row_distances * row_distances))
+            angles[band] = np.degrees(np.arctan2(row_distances, column_distances) % (2 * np.pi))
+
+        return distances, angles
+
+    def grid_for_pathing(self):
+        """
+        return a view of the 0 layer which is expected to contain the solid and non-solid tiles for
+        pathing, where > 0 means a solid tile. Chunks are loaded as they're looked at.
+        :return: LayerView
+        """
+        return LayerView(self, 0)
+
+    def memory_footprint(self):
+        """
+        As for `Grid`, with the chunks that are resident
+        :return: dict of bytes for each array, with the sum under `total`
+        """
+        result = super().memory_footprint()
+        result["resident_chunks"] = sum(data.nbytes for data in self.chunks.values())
+        result["total"] += result["resident_chunks"]
+
+        return result
+
+
+def remove_file(path):
+    """
+    Remove a file if it's still there
+    :param path:
+    :return:
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
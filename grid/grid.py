@@ -1,13 +1,30 @@
+import os
 import numpy as np
 import math
+import struct
+import zipfile
+from collections import deque, OrderedDict
 from scipy.spatial import KDTree
 from typing import Tuple
 from warnings import warn
+from .visibility import Visibility
+from .lattice_tree import LatticeTree
+from .query_result import QueryResult
+from consts.direction import NEIGHBOUR_OFFSETS
+from consts.entity_id import get_entity_index
+from pathfinding import astar
 
 
 class Grid:
+    # the pixel positions and KDTree only depend on the size of the grid, so grids of the same size share them
+    # keyed by (x_max, y_max, tile_size, flip_x, flip_y), least recently used first
+    pixel_positions_cache = OrderedDict()
+    pixel_positions_cache_size = 4
     
-    def __init__(self, x_max, y_max, tile_size, number_of_layers = 3, flip_x = False, flip_y = False):
+    def __init__(
+            self, x_max, y_max, tile_size, number_of_layers = 3, flip_x = False, flip_y = False,
+            journal_size = 4096, compact = False, dtype = None, data = None, field_cache_size = 32
+    ):
         """
         Initiaise a grid
         :param x_max:
@@ -15,10 +32,125 @@ class Grid:
         :param tile_size:
         :param flip_x:
         :param flip_y:
+        :param journal_size: How many changes to the grid data do we keep for `get_changes_since`
+        :param compact: For large grids, don't store the pixel centers of every tile or a KDTree of them,
+        work them out as they are needed instead
+        :param dtype: The data type of the data layers, defaults to int32 if `compact` otherwise float64
+        :param data: (optional) Existing data layers to use rather than starting with 0s, see `load`
+        :param field_cache_size: How many tiles do we keep the distance and direction fields for, see `get_fields`
         """
 
         self.max_rows = y_max
         self.max_columns = x_max
+        self.flip_x = flip_x
+        self.flip_y = flip_y
+        self.compact = compact
+
+        # we want to store the center value in pixels for
+        # our tiles
+        self.tile_size = tile_size
+        self.half_tile_size = (self.tile_size / 2.0)
+
+        self.max_x = (x_max * self.tile_size) - self.half_tile_size
+        self.max_y = (y_max * self.tile_size) - self.half_tile_size
+
+        if compact:
+            # the centers are worked out when they're needed rather than stored
+            self.x_mesh = None
+            self.y_mesh = None
+            self.map_pixel_center_positions = None
+            self.flat_pixel_positions = None
+            self.tree = LatticeTree(y_max, x_max, tile_size, flip_x, flip_y)
+        else:
+            self.build_pixel_positions()
+
+        # for data storage in our grid - initialised to 0s
+        # TODO: how to handle many things at a grid position?
+        # perhaps a dictionary?
+        self.number_of_layers = number_of_layers
+
+        if dtype is None:
+            dtype = np.int32 if compact else np.float64
+
+        # where is each item in the data, as (layer, index) so that we don't need to search the data for it
+        self.locations = {}
+
+        # the entity type of each id indexed by the id, -1 if not known. So that queries can filter by entity type
+        # without looking each id up, see `set_entity_type`
+        self.entity_type_ids = np.full(64, -1, dtype = np.int32)
+
+        # the id of the static solid, such as a wall, filling each tile or 0. Created when the first is added
+        # see `set_static_solid`
+        self.static_solids = None
+
+        if data is None:
+            self.data = self.create_data(dtype)
+        else:
+            self.data = data
+            self.rebuild_locations()
+
+        # every change to the data increments `version` and is recorded in the `journal` as
+        # (version, layer, (row, column), old value, new value) so that anything derived from the data
+        # can catch up on what has changed. `layer_versions` are the version of the last change to each layer
+        self.version = 0
+        self.layer_versions = [0] * number_of_layers
+        self.journal = deque(maxlen = journal_size)
+
+        # let's keep the last row, column values to minimise repeated lookups
+        self.last_x = None
+        self.last_y = None
+        
+        # let's keep the last x and y distances
+        self.last_x_distances = None
+        self.last_y_distances = None
+
+        # the last pixel position we looked up the nearest tile for, and (distance, index) of that tile. Moving an
+        # entity looks up the same position a few times in a row, see `query_tree`
+        self.last_nearest_position = None
+        self.last_nearest = None
+
+        # for recently used source tiles the float32 distances and directions from them to every tile, least
+        # recently used first. They only depend on the size of the grid so never need invalidating
+        self.field_cache = OrderedDict()
+        self.field_cache_size = field_cache_size
+        self.field_cache_hits = 0
+        self.field_cache_misses = 0
+
+        # the last result of `get_path_distances`, as ((row, column, walkability version), distances)
+        self.path_distances = None
+
+        # table of relative row, column offsets with their distances and angles for field of view lookups
+        # it's built on first use see `build_fov_offsets`
+        self.fov_row_range = 0
+        self.fov_column_range = 0
+        self.fov_distances = None
+        self.fov_angles = None
+
+        # line of sight over the solid tiles, created on first use see `get_visible_positions`
+        self.visibility = None
+
+        # a bitmap of the walkable tiles padded with a border of unwalkable tiles, and for every tile a bitmask of
+        # which of its `NEIGHBOUR_OFFSETS` are walkable. Kept up to date with the 0 layer see `refresh_walkable`
+        self.walkable = None
+        self.neighbour_masks = None
+        self.walkable_at_version = None
+    
+    def build_pixel_positions(self):
+        """
+        Build and store the pixel centers for every tile, and a KDTree of them for reverse lookups.
+        If we've already built them for a grid of the same size then those are reused.
+        :return:
+        """
+        y_max = self.max_rows
+        x_max = self.max_columns
+
+        cache_key = (x_max, y_max, self.tile_size, self.flip_x, self.flip_y)
+        if cache_key in Grid.pixel_positions_cache:
+            Grid.pixel_positions_cache.move_to_end(cache_key)
+            (
+                self.x_mesh, self.y_mesh, self.map_pixel_center_positions, self.flat_pixel_positions, self.tree
+            ) = Grid.pixel_positions_cache[cache_key]
+            return
 
         # generate the indicies for our grid size
         # the indicies are the positions of our grid
@@ -27,28 +159,20 @@ class Grid:
         x_mesh = x_mesh + 1
         y_mesh = y_mesh + 1
 
-        if flip_x:
+        if self.flip_x:
             x_mesh = np.flip(x_mesh)
-        if flip_y:
+        if self.flip_y:
             y_mesh = np.flip(y_mesh)
 
-        # we want to store the center value in pixels for
-        # our tiles
-        self.tile_size = tile_size
-        self.half_tile_size = (self.tile_size / 2.0)
-        
         self.x_mesh = (x_mesh * self.tile_size) - self.half_tile_size
         self.y_mesh = (y_mesh * self.tile_size) - self.half_tile_size
-        
+
         # let's persist center positions
         pixel_center_positions = np.squeeze(np.dstack([self.y_mesh.ravel(), self.x_mesh.ravel()]))
-        
+
         # property `map_pixel_center_positions` is for assisting human lookups of the grid
         self.map_pixel_center_positions = np.squeeze(np.reshape(pixel_center_positions, (y_max, x_max, 2)))
-        
-        self.max_x = np.max(self.x_mesh)
-        self.max_y = np.max(self.y_mesh)
-        
+
         # property `flat_pixel_positions` is for assisting computer lookup of the grid and
         # reverse lookups for pixels to positions
         flat_pixel_positions = pixel_center_positions.flatten()
@@ -57,20 +181,195 @@ class Grid:
         # to find a position based on pixel position we'll use the scipy.spatial.KDTree data type
         self.tree = KDTree(self.flat_pixel_positions)
 
-        # for data storage in our grid - initialised to 0s
-        # TODO: how to handle many things at a grid position?
-        # perhaps a dictionary?
-        self.number_of_layers = number_of_layers
-        self.data = np.reshape(np.zeros((y_max * x_max) * number_of_layers), (number_of_layers, (y_max * x_max)))
+        Grid.pixel_positions_cache[cache_key] = (
+            self.x_mesh, self.y_mesh, self.map_pixel_center_positions, self.flat_pixel_positions, self.tree
+        )
+        while len(Grid.pixel_positions_cache) > Grid.pixel_positions_cache_size:
+            Grid.pixel_positions_cache.popitem(last = False)
+
+    def save(self, path):
+        """
+        Save the data layers, dimensions and flip flags of the grid, along with the static solids and entity types,
+        to an uncompressed `.npz` file, which can be inspected with `numpy.load` or loaded back with `Grid.load`
+        :param path: should end in `.npz`, or a file like object such as `io.BytesIO` to keep the snapshot in memory
+        :return:
+        """
+        np.savez(path, **self.get_snapshot_arrays())
+
+    def get_snapshot_arrays(self):
+        """
+        The arrays that `save` writes, grids that store their data layers differently replace `data` with their own
+        :return: dict of name to numpy array
+        """
+        arrays = {
+            "data": self.data,
+            "dimensions": np.array([self.max_columns, self.max_rows]),
+            "tile_size": np.array(self.tile_size),
+            "flip": np.array([self.flip_x, self.flip_y]),
+            "compact": np.array(self.compact),
+            "entity_type_ids": self.entity_type_ids,
+        }
+
+        if self.static_solids is not None:
+            arrays["static_solids"] = self.static_solids
+
+        return arrays
+
+    def restore_snapshot_extras(self, snapshot):
+        """
+        Restore what `save` keeps alongside the data layers
+        :param snapshot: the opened `.npz`
+        :return:
+        """
+        # older snapshots don't have these
+        if "entity_type_ids" in snapshot.files:
+            self.entity_type_ids = np.array(snapshot["entity_type_ids"])
+
+        self.static_solids = None
+        if "static_solids" in snapshot.files:
+            self.static_solids = self.create_tile_array("static_solids", (self.max_rows, self.max_columns), np.int32)
+            self.static_solids[:] = snapshot["static_solids"]
+
+    @classmethod
+    def load(cls, path, mmap = True, journal_size = 4096):
+        """
+        Load a grid saved with `Grid.save`
+        :param path: or a file like object, which is read from its current position
+        :param mmap: Map the data layers from the file rather than reading them in, changes made to the grid are not
+        written back to the file. Only for paths
+        :param journal_size:
+        :return: Grid
+        """
+        with np.load(path) as snapshot:
+            x_max, y_max = snapshot["dimensions"].tolist()
+            tile_size = snapshot["tile_size"].item()
+            flip_x, flip_y = snapshot["flip"].tolist()
+            compact = bool(snapshot["compact"])
+
+            data = None
+            if mmap and isinstance(path, (str, os.PathLike)):
+                data = map_npz_array(path, "data")
+            if data is None:
+                data = snapshot["data"]
+
+            grid = cls(
+                x_max, y_max, tile_size, data.shape[0], flip_x, flip_y, journal_size,
+                compact = compact, dtype = data.dtype, data = data
+            )
+            grid.restore_snapshot_extras(snapshot)
+
+        return grid
+
+    def create_data(self, dtype):
+        """
+        Create the storage for the data layers
+        :param dtype:
+        :return: numpy array with shape (number_of_layers, max_rows * max_columns)
+        """
+        return np.zeros((self.number_of_layers, (self.max_rows * self.max_columns)), dtype = dtype)
+
+    def create_tile_array(self, name, shape, dtype, fill_value = 0):
+        """
+        Create an array with a value for every tile, such as `walkable` or the result of `get_path_distances`.
+        Grids too large to keep these in memory can store them elsewhere
+        :param name: what the array is for
+        :param shape:
+        :param dtype:
+        :param fill_value:
+        :return: numpy array
+        """
+        return np.full(shape, fill_value, dtype = dtype)
+
+    def get_row_bands(self):
+        """
+        The ranges of rows to work through whole tile arrays in, so that the temporary arrays along the way are the
+        size of a band rather than the whole grid
+        :return: List of (first row, last row + 1)
+        """
+        return [(0, self.max_rows)]
+
+    def get_data(self, layer, index):
+        """
+        Get the value in the data
+        :param layer:
+        :param index: index into the flattened grid
+        :return:
+        """
+        return self.data[layer][index]
+
+    def get_cell_data(self, indexes, layers = None):
+        """
+        Get the values in every layer for the `indexes` into the flattened grid
+        :param indexes:
+        :param layers: (optional) only get the values in these layers
+        :return: numpy array with shape (number_of_layers or len(layers), len(indexes))
+        """
+        if layers is None:
+            return self.data[0:self.number_of_layers, indexes]
+
+        return self.data[np.ix_(layers, np.asarray(indexes, dtype = int))]
+
+    def store_data(self, layer, index, value):
+        """
+        Store the value in the data, use `set_data` so that changes are recorded
+        :param layer:
+        :param index: index into the flattened grid
+        :param value:
+        :return:
+        """
+        self.data[layer][index] = value
+
+    def update_residency(self, positions):
+        """
+        Let the grid know where the things that are moving around are, for grids that only keep the data near
+        them in memory. The data of this grid is always in memory so there is nothing to do.
+        :param positions: List of (x, y) pixel positions
+        :return:
+        """
+        pass
+
+    def get_flat_pixel_positions(self):
+        """
+        Get the (y, x) pixel centers for every tile in the flattened grid, if we're `compact` these are
+        worked out each time
+        :return:
+        """
+        if self.flat_pixel_positions is not None:
+            return self.flat_pixel_positions
+
+        rows, columns = np.divmod(np.arange(self.max_rows * self.max_columns), self.max_columns)
+        return np.column_stack(self.tree.get_centers(rows, columns))
+
+    def memory_footprint(self):
+        """
+        How many bytes are used by the arrays of the grid
+        :return: dict of bytes for each array, with the sum under `total`
+        """
+        arrays = {
+            "x_mesh": self.x_mesh,
+            "y_mesh": self.y_mesh,
+            "map_pixel_center_positions": self.map_pixel_center_positions,
+            "flat_pixel_positions": self.flat_pixel_positions,
+            "data": self.data,
+            "fov_distances": self.fov_distances,
+            "fov_angles": self.fov_angles,
+            "static_solids": self.static_solids,
+        }
+
+        if isinstance(self.tree, KDTree):
+            # the tree keeps its own copy of the positions and the ordering of them,
+            # the nodes themselves are not counted
+            arrays["tree_data"] = self.tree.data
+            arrays["tree_indices"] = self.tree.indices
+
+        result = {name: (0 if value is None else value.nbytes) for name, value in arrays.items()}
+        result["field_cache"] = sum(
+            distances.nbytes + angles.nbytes for distances, angles in self.field_cache.values()
+        )
+        result["total"] = sum(result.values())
+
+        return result
 
-        # let's keep the last row, column values to minimise repeated lookups
-        self.last_x = None
-        self.last_y = None
-        
-        # let's keep the last x and y distances
-        self.last_x_distances = None
-        self.last_y_distances = None
-    
     def __getitem__(self, item: Tuple[int, int]):
         """
         Get the data stored nearest to x, y
@@ -87,11 +386,7 @@ class Grid:
         if not query_result:
             raise ValueError(f"Pixel positions not found in grid! {x}, {y}")
 
-        result = []
-        for i in range(0, self.number_of_layers):
-            result.append(self.data[i][query_result[1]])
-
-        return np.array(result).flatten()
+        return self.get_cell_data([query_result[1]]).flatten()
     
     def __setitem__(self, key: Tuple[int, int, int], value):
         """
@@ -114,7 +409,7 @@ class Grid:
 
         # query_result[0] - The distances to the nearest neighbour
         # query_result[1] - The locations of the neighbours        
-        self.data[layer][query_result[1]] = value
+        self.set_data(layer, query_result[1], value)
         return
     
     def __sub__(self, item):
@@ -123,17 +418,146 @@ class Grid:
         :param item:
         :return:
         """
-        matches = np.where(self.data == item)
-        if len(matches[0]) > 0:
-            try:
-                assert(len(matches[0]) == 1)
-                assert(len(matches[1]) == 1)
-            except AssertionError as e:
-                print("There can be only one result in any layers")
-                raise e
+        # there can be only one result in any layers
+        location = self.locations.get(item)
+        if location is not None:
+            self.set_data(location[0], location[1], 0)
+
+    def set_data(self, layer, index, value):
+        """
+        Set the value in the data, keeping track of where it is and the change made
+        :param layer:
+        :param index: index into the flattened grid
+        :param value:
+        :return:
+        """
+        old_value = self.get_data(layer, index)
+        if old_value != 0 and self.locations.get(old_value) == (layer, index):
+            del self.locations[old_value]
 
-            self.data[matches[0][0]][matches[1][0]] = 0.0
+        self.record_change(layer, index, value)
+        self.store_data(layer, index, value)
+
+        if value != 0:
+            self.locations[value] = (layer, index)
+
+    def rebuild_locations(self):
+        """
+        If the data has been changed directly, rebuild where everything is
+        :return:
+        """
+        layers, indexes = np.nonzero(self.data)
+        self.locations = {
+            value: (int(layer), int(index)) for layer, index, value in
+            zip(layers, indexes, self.data[layers, indexes].tolist())
+        }
         
+    def set_entity_type(self, entity_id, entity_type):
+        """
+        Keep track of the entity type of an id so that queries can filter by it, by the index part of the id as
+        only one live entity has each index
+        :param entity_id:
+        :param entity_type:
+        :return:
+        """
+        index = get_entity_index(int(entity_id))
+        if index >= len(self.entity_type_ids):
+            size = len(self.entity_type_ids)
+            while size <= index:
+                size *= 2
+            entity_type_ids = np.full(size, -1, dtype = np.int32)
+            entity_type_ids[:len(self.entity_type_ids)] = self.entity_type_ids
+            self.entity_type_ids = entity_type_ids
+
+        self.entity_type_ids[index] = entity_type
+
+    def get_entity_types(self, ids):
+        """
+        Get the entity types of ids, as set with `set_entity_type`
+        :param ids: numpy array of ids
+        :return: numpy array of entity types the same shape as ids, -1 where not known
+        """
+        ids = np.asarray(ids).astype(np.int64)
+        indexes = get_entity_index(ids)
+        known = (ids > 0) & (indexes < len(self.entity_type_ids))
+        return np.where(known, self.entity_type_ids[np.where(known, indexes, 0)], -1)
+
+    def set_static_solid(self, entity_id, x, y):
+        """
+        Mark the tile at the pixel position as filled by a solid that never moves, such as a wall.
+        Movement is resolved against these with `get_static_collision` rather than by querying for them
+        :param entity_id:
+        :param x:
+        :param y:
+        :return:
+        """
+        if self.static_solids is None:
+            self.static_solids = self.create_tile_array("static_solids", (self.max_rows, self.max_columns), np.int32)
+
+        row, column = self.get_column_row_for_pixels(x, y)
+        self.static_solids[row, column] = entity_id
+
+    def get_static_collision(self, x, y, x_magnitude, y_magnitude):
+        """
+        Check if moving the point x, y along one axis by the magnitudes would run into a static solid tile, looking
+        at each tile the point would pass through in turn, so only a few reads of `static_solids` are needed.
+        Outside the grid is not solid.
+        :param x: the pixel position of the leading edge of what's moving
+        :param y:
+        :param x_magnitude:
+        :param y_magnitude:
+        :return: None or (clamp_x, clamp_y, entity_id) where the clamps are how far we can move to stop 1 pixel
+        short of the first static solid, which may be negative if we're already overlapping it
+        """
+        if self.static_solids is None or (x_magnitude == 0 and y_magnitude == 0):
+            return None
+
+        is_horizontal = x_magnitude != 0
+        edge = x if is_horizontal else y
+        magnitude = x_magnitude if is_horizontal else y_magnitude
+        step = 1 if magnitude > 0 else -1
+
+        # the tiles in pixel order, before any flipping, that the leading edge would pass into
+        first_tile = int(math.floor((edge + step) / self.tile_size))
+        last_tile = int(math.floor((edge + magnitude + step) / self.tile_size))
+
+        # and the tile we're in on the other axis
+        other_tile = int(math.floor((y if is_horizontal else x) / self.tile_size))
+        other_max = self.max_rows if is_horizontal else self.max_columns
+        if not (0 <= other_tile < other_max):
+            return None
+
+        tile_max = self.max_columns if is_horizontal else self.max_rows
+        is_flipped = self.flip_x if is_horizontal else self.flip_y
+        is_other_flipped = self.flip_y if is_horizontal else self.flip_x
+        if is_other_flipped:
+            other_tile = other_max - other_tile - 1
+
+        for tile in range(first_tile, last_tile + step, step):
+            if not (0 <= tile < tile_max):
+                continue
+
+            grid_tile = tile_max - tile - 1 if is_flipped else tile
+            if is_horizontal:
+                entity_id = self.static_solids[other_tile, grid_tile]
+            else:
+                entity_id = self.static_solids[grid_tile, other_tile]
+
+            if entity_id == 0:
+                continue
+
+            # the near side of the tile, leaving 1px difference
+            if step > 0:
+                clamp = (tile * self.tile_size) - edge - 1
+            else:
+                clamp = ((tile + 1) * self.tile_size) - edge + 1
+
+            if is_horizontal:
+                return clamp, 0, int(entity_id)
+            return 0, clamp, int(entity_id)
+
+        return None
+
     def __add__(self, other: Tuple[int, int, int], layer = 0):
         """
         Add to data layer, expected to be a Tuple
@@ -142,6 +566,53 @@ class Grid:
         """
         self.__setitem__((other[1], other[2], layer), other[0])
     
+    @property
+    def walkability_version(self):
+        """
+        The version of the 0 layer, anything derived from `grid_for_pathing` is stale when this changes
+        :return:
+        """
+        return self.layer_versions[0]
+
+    def record_change(self, layer, index, value):
+        """
+        Record in the journal that the value at `index` in `layer` is about to change to `value`
+        :param layer:
+        :param index: index into the flattened grid
+        :param value:
+        :return:
+        """
+        old_value = self.get_data(layer, index)
+        if old_value == value:
+            return
+
+        self.version += 1
+        self.layer_versions[layer] = self.version
+        self.journal.append((
+            self.version, int(layer), divmod(int(index), self.max_columns), old_value, value
+        ))
+
+    def get_changes_since(self, version, layers = None):
+        """
+        Get the changes made to the grid data after `version`
+        :param version: The `version` (or one of the `layer_versions`) the caller last saw
+        :param layers: (optional) Only return the changes to these layers
+        :return: List of (version, layer, (row, column), old value, new value) or None if the journal no
+        longer goes back far enough, in which case the caller should rebuild from the data
+        """
+        if version >= self.version:
+            return []
+
+        if len(self.journal) == 0 or self.journal[0][0] > version + 1:
+            return None
+
+        changes = [change for change in self.journal if change[0] > version]
+
+        if layers is not None:
+            changes = [change for change in changes if change[1] in layers]
+
+        return changes
+
     def convert_position_to_pixels(self, row, column):
         """
         Convert a row, column to y, x (respective) values
@@ -160,6 +631,10 @@ class Grid:
         :param column:
         :return:
         """
+        if self.compact:
+            y, x = self.tree.get_centers(row, column)
+            return x, y
+
         result = self.map_pixel_center_positions[row][column]
         return result[1], result[0]
     
@@ -170,26 +645,58 @@ class Grid:
         :param y:
         :return:
         """
-        # get the center values for the x,y
-        center_x, center_y = self.get_pos_for_pixels(x, y)
-        
-        # find the intersection of the x and y values in our grid returns and array of array of array of bool
-        match = (self.map_pixel_center_positions[:, :, 1] == center_x) & \
-                (self.map_pixel_center_positions[:, :, 0] == center_y)
-        
-        # be we need the indexes
-        result_index = np.where(match)
+        # the index returned from the tree is the position in the flattened grid
+        return divmod(int(self.query_tree(x, y)[1]), self.max_columns)
 
-        # this assmues there is a match and only one match :/
-        # TODO: handle != 1 match
-        row = result_index[0]
-        column = result_index[1]
-        
-        if len(row) > 0 and len(column) > 0:
-            return row[0], column[0]
-        else:
-            print(f"cannot find xy: {x},{y} in grid")
-            return None, None
+    def get_rows_columns_for_pixels(self, x, y):
+        """
+        Get the row, column for many x, y pixel positions at once
+        :param x: array like of x pixel positions
+        :param y: array like of y pixel positions
+        :return: numpy arrays of rows, columns
+        """
+        indexes = self.tree.query(np.column_stack([np.ravel(y), np.ravel(x)]))[1]
+        return np.divmod(indexes, self.max_columns)
+
+    def get_positions_for_pixels(self, x, y):
+        """
+        Reverse lookup of the grid pixel centres for many x, y pixel positions at once
+        :param x: array like of x pixel positions
+        :param y: array like of y pixel positions
+        :return: numpy arrays of the x, y pixel centers
+        """
+        rows, columns = self.get_rows_columns_for_pixels(x, y)
+        return self.get_pixel_centers(rows, columns)
+
+    def get_pixel_centers(self, rows, columns):
+        """
+        Get the pixel centers for many grid positions at once
+        :param rows: array like of rows
+        :param columns: array like of columns
+        :return: numpy arrays of the x, y pixel centers
+        """
+        rows = np.asarray(rows, dtype = int)
+        columns = np.asarray(columns, dtype = int)
+
+        if self.compact:
+            y, x = self.tree.get_centers(rows, columns)
+            return x, y
+
+        result = self.map_pixel_center_positions[rows, columns]
+        return result[..., 1], result[..., 0]
+
+    def convert_path_to_pixels(self, path):
+        """
+        Convert a path of row, columns (such as from `astar`) to a path of x, y pixel centers in one go
+        :param path: List of (row, column)
+        :return: List of (x, y)
+        """
+        if not path:
+            return []
+
+        path = np.asarray(path, dtype = int)
+        x, y = self.get_pixel_centers(path[:, 0], path[:, 1])
+        return list(zip(x.tolist(), y.tolist()))
 
     def grid_for_pathing(self):
         """
@@ -202,6 +709,104 @@ class Grid:
         
         return path_grid
     
+    def find_path(self, start, end, allow_diagonal_movement = False, max_iterations = None):
+        """
+        Find a path between row, column positions over the walkable tiles
+        :param start: (row, column)
+        :param end: (row, column)
+        :param allow_diagonal_movement:
+        :param max_iterations: (optional) give up after this many steps of the search, returning the path so far
+        :return: List of (row, column) or None
+        """
+        return astar(
+            self.grid_for_pathing(), start, end, allow_diagonal_movement,
+            neighbour_masks = self.get_neighbour_masks(), max_iterations = max_iterations
+        )
+
+    def get_walkable(self):
+        """
+        Get the bitmap of walkable tiles, that is where the 0 layer is 0. It's padded with a border of unwalkable
+        tiles so the tile at row, column is at [row + 1, column + 1] and looking at the neighbours of any tile in the
+        grid never needs a bounds check
+        :return: numpy array of bool with shape (max_rows + 2, max_columns + 2)
+        """
+        self.refresh_walkable()
+        return self.walkable
+
+    def get_neighbour_masks(self):
+        """
+        Get for every tile a bitmask of which of its neighbours are walkable, bit `i` is set if the neighbour at
+        `NEIGHBOUR_OFFSETS[i]` is walkable. So the 4-connected neighbours are the lower 4 bits
+        :return: numpy array of uint8 with shape (max_rows, max_columns)
+        """
+        self.refresh_walkable()
+        return self.neighbour_masks
+
+    def refresh_walkable(self):
+        """
+        Bring `walkable` and `neighbour_masks` up to date with the 0 layer, if we can use the journal only
+        the tiles that have changed and their neighbours are updated
+        :return:
+        """
+        if self.walkable is not None and self.walkable_at_version == self.walkability_version:
+            return
+
+        changes = None
+        if self.walkable is not None:
+            changes = self.get_changes_since(self.walkable_at_version, layers = [0])
+
+        if changes is None:
+            # drop the old ones first, so grids that store them elsewhere can reuse the space
+            self.walkable = None
+            self.neighbour_masks = None
+
+            self.walkable = self.create_tile_array("walkable", (self.max_rows + 2, self.max_columns + 2), bool)
+            self.build_walkable()
+
+            self.neighbour_masks = self.create_tile_array(
+                "neighbour_masks", (self.max_rows, self.max_columns), np.uint8
+            )
+            for top, bottom in self.get_row_bands():
+                masks = self.neighbour_masks[top:bottom]
+                for bit, (row_offset, column_offset) in enumerate(NEIGHBOUR_OFFSETS):
+                    neighbours = self.walkable[
+                        top + 1 + row_offset:bottom + 1 + row_offset,
+                        1 + column_offset:self.max_columns + 1 + column_offset
+                    ]
+                    masks |= neighbours.astype(np.uint8) << bit
+        else:
+            # the last change to a tile is what it is now
+            changed = {}
+            for version, layer, position, old_value, new_value in changes:
+                changed[position] = new_value == 0
+
+            rows = np.array([position[0] for position in changed.keys()], dtype = int)
+            columns = np.array([position[1] for position in changed.keys()], dtype = int)
+            self.walkable[rows + 1, columns + 1] = list(changed.values())
+
+            # the changed tiles are a neighbour of each of their neighbours
+            for bit, (row_offset, column_offset) in enumerate(NEIGHBOUR_OFFSETS):
+                neighbour_rows = rows - row_offset
+                neighbour_columns = columns - column_offset
+                in_grid = (neighbour_rows >= 0) & (neighbour_rows < self.max_rows) & \
+                          (neighbour_columns >= 0) & (neighbour_columns < self.max_columns)
+
+                neighbour_rows = neighbour_rows[in_grid]
+                neighbour_columns = neighbour_columns[in_grid]
+                is_walkable = self.walkable[rows[in_grid] + 1, columns[in_grid] + 1]
+
+                self.neighbour_masks[neighbour_rows, neighbour_columns] &= np.uint8(~(1 << bit) & 0xFF)
+                self.neighbour_masks[neighbour_rows, neighbour_columns] |= is_walkable.astype(np.uint8) << bit
+
+        self.walkable_at_version = self.walkability_version
+
+    def build_walkable(self):
+        """
+        Fill the inside of the `walkable` border from the 0 layer
+        :return:
+        """
+        self.walkable[1:-1, 1:-1] = self.grid_for_pathing() == 0
+
     def get_pos_for_pixels(self, x, y):
         """
         Reverse lookup for grid pixel centre based on given x,y position
@@ -215,6 +820,10 @@ class Grid:
         
         # query_result[0] - The distances to the nearest neighbour
         # query_result[1] - The locations of the neighbours
+        if self.compact:
+            row, column = divmod(query_result[1], self.max_columns)
+            return self.get_pixel_center(row, column)
+
         yx = self.flat_pixel_positions[query_result[1]]
         return yx[1], yx[0]
     
@@ -229,51 +838,121 @@ class Grid:
         """
         # query_result[0] - The distances to the nearest neighbour
         # query_result[1] - The index locations of the neighbours
-        query_result = self.tree.query([y, x], k = k, distance_upper_bound = distance_upper_bound)
-        return query_result
+        if k != 1:
+            return self.tree.query([y, x], k = k, distance_upper_bound = distance_upper_bound)
+
+        # the nearest tile doesn't depend on the upper bound, only whether it's found does
+        if (x, y) != self.last_nearest_position:
+            self.last_nearest = self.tree.query([y, x])
+            self.last_nearest_position = (x, y)
+
+        if self.last_nearest[0] >= distance_upper_bound:
+            return np.inf, self.tree.n
+
+        return self.last_nearest
     
-    def query(self, x, y, k = 1, distance_upper_bound = np.inf):
+    def query_tiles(
+            self, x, y, k = 1, distance_upper_bound = np.inf, layers = None, entity_types = None,
+            exclude_static = False, exclude_empty = False
+    ):
+        """
+        Get what is in the `k` nearest tiles to the pixel position as plain arrays, for callers such as collision
+        that are called often and don't need a `QueryResult`
+        :param x:
+        :param y:
+        :param k: (optional) The number of nearest tiles to look in
+        :param distance_upper_bound: What's the maximum distance we're willing to consider as neighbours
+        :param layers: (optional) only look in these layers
+        :param entity_types: (optional) only return ids of these entity types, see `set_entity_type`.
+        Empty tiles are not returned
+        :param exclude_static: don't return static solids, see `set_static_solid`
+        :param exclude_empty: don't return empty tiles, where the id is 0
+        :return: ids, layers, distances, indexes into the flattened grid - numpy arrays with a value for each layer
+        of each tile, ordered by layer then distance. The ids are integers
+        """
+        # query_result[0] - The distances to the nearest neighbours
+        # query_result[1] - The index locations of the neighbours
         query_result = self.query_tree(x, y, k = k, distance_upper_bound = distance_upper_bound)
+        distances = np.atleast_1d(query_result[0])
+        indexes = np.atleast_1d(query_result[1])
+
+        # filter out infinity, which are the neighbours not found
+        is_valid = distances < np.inf
+        distances = distances[is_valid]
+        indexes = indexes[is_valid]
+
+        # then for the layers get the values at the valid indexes using
+        # numpy array slicing and dicinng and no loops, the values are layer by layer
+        # so repeat the tile fields for each layer
+        layer_numbers = np.arange(self.number_of_layers) if layers is None else np.asarray(layers)
+        ids = np.asarray(self.get_cell_data(indexes, layers)).ravel()
+        number_of_tiles = len(indexes)
+
+        if number_of_tiles == 0:
+            return ids.astype(np.int64), layer_numbers[:0], distances, indexes
+
+        # most tiles are empty, so drop those first and only then work out the layer and tile of what's left
+        positions = np.flatnonzero(ids) if exclude_empty or entity_types is not None else np.arange(len(ids))
+
+        # there are only ever a few entity types to look for, comparing against each is cheaper than `np.isin`
+        if entity_types is not None and len(positions) > 0:
+            types = self.get_entity_types(ids[positions])
+            positions = positions[(types[:, None] == np.asarray(entity_types)).any(axis = 1)]
+
+        tile_positions = positions % number_of_tiles
+        indexes = indexes[tile_positions]
+        ids = ids[positions]
+
+        if exclude_static and self.static_solids is not None:
+            is_moving = self.static_solids.ravel()[indexes] != ids
+            positions, tile_positions, indexes, ids = \
+                positions[is_moving], tile_positions[is_moving], indexes[is_moving], ids[is_moving]
+
+        # the grid holds floats, but ids are ints everywhere else, see `Entity.all`
+        ids = ids.astype(np.int64)
 
-        if k == 1:
-            # if only searching for one neighbour, then lets convert to a tuple of two
-            # numpy arrays as "d has shape tuple if k is one, or tuple+(k,) if k is larger than one"
-            # https://docs.scipy.org/doc/scipy-0.14.0/reference/generated/scipy.spatial.KDTree.query.html
-            query_result = (np.array([query_result[0]]), np.array([query_result[1]]),)
-
-        if query_result:
-            try:
-
-                # filter out infinity
-                index_valid = np.where(query_result[0] < np.inf)[0]
-
-                # then get the indexes in our data that are < np.inf
-                entity_valid_indexes = query_result[1][index_valid]
-
-                # then for every layer get the values at the entity_valid_indexes using
-                # numpy array slicing and dicinng and no loops
-                entity_ids = self.data[0:self.number_of_layers, entity_valid_indexes]
-
-                # the distances we have are for 1 dimenions, expand so that
-                # we have as dimension results for each valid index * number of layers
-                distances = np.broadcast_to(
-                    query_result[0],
-                    (self.number_of_layers, len(query_result[0]))
-                ).T
-
-                # returning into a flattened array so that we there's only
-                # one result we still have an array
-                return list(zip(
-                    np.array(entity_ids).flatten(),
-                    np.array(distances).flatten()
-                ))
-            except IndexError as e:
-                print(e)
-                warning_message = f"IndexError Grid.query({x}, {y}, {k}, {distance_upper_bound})"
-                warn(warning_message)
-                pass
-
-        return None, None       
+        return ids, layer_numbers[positions // number_of_tiles], distances[tile_positions], indexes
+
+    def query_records(
+            self, x, y, k = 1, distance_upper_bound = np.inf, layers = None, entity_types = None, exclude_static = False
+    ):
+        """
+        Get what is in the `k` nearest tiles to the pixel position, see `query_tiles`
+        :param x:
+        :param y:
+        :param k: (optional) The number of nearest tiles to look in
+        :param distance_upper_bound: What's the maximum distance we're willing to consider as neighbours
+        :param layers: (optional) only look in these layers
+        :param entity_types: (optional) only return ids of these entity types, see `set_entity_type`.
+        Empty tiles are not returned
+        :param exclude_static: don't return static solids, see `set_static_solid`
+        :return: QueryResult with a record for each layer of each tile, ordered by layer then distance
+        """
+        ids, layer_numbers, distances, indexes = self.query_tiles(
+            x, y, k, distance_upper_bound, layers, entity_types, exclude_static
+        )
+
+        records = np.zeros(ids.size, dtype = QueryResult.dtype)
+        records["id"] = ids
+        records["layer"] = layer_numbers
+        records["distance"] = distances
+        records["row"], records["col"] = np.divmod(indexes, self.max_columns)
+        records["entity_type"] = self.get_entity_types(ids)
+
+        return QueryResult(records)
+
+    def query(self, x, y, k = 1, distance_upper_bound = np.inf, layers = None, entity_types = None):
+        """
+        Get what is in the `k` nearest tiles to the pixel position as a list, see `query_records`
+        :param x:
+        :param y:
+        :param k: (optional) The number of nearest tiles to look in
+        :param distance_upper_bound: What's the maximum distance we're willing to consider as neighbours
+        :param layers: (optional) only look in these layers
+        :param entity_types: (optional) only return ids of these entity types, see `set_entity_type`
+        :return: List of (id, distance)
+        """
+        return self.query_records(x, y, k, distance_upper_bound, layers, entity_types).to_list()
     
     def get_x_y_distances(self, x, y):
         """
@@ -288,14 +967,14 @@ class Grid:
             x_distances = self.last_x_distances
         else:
             self.last_x = x
-            self.last_x_distances = self.flat_pixel_positions[:, 1] - x
+            self.last_x_distances = self.get_flat_pixel_positions()[:, 1] - x
             x_distances = self.last_x_distances
         
         if y == self.last_y:
             y_distances = self.last_y_distances
         else:
             self.last_y = y
-            self.last_y_distances = self.flat_pixel_positions[:, 0] - y
+            self.last_y_distances = self.get_flat_pixel_positions()[:, 0] - y
             y_distances = self.last_y_distances
         
         return y_distances, x_distances
@@ -308,19 +987,112 @@ class Grid:
         :param column:
         :return:
         """
-        y, x = self.get_pixel_center(row, column)
+        x, y = self.get_pixel_center(row, column)
         return self.get_x_y_distances(x, y)
     
+    def get_fields(self, row, column):
+        """
+        Get the straight line distances and the directions in degrees from the center of the given row, column
+        to all other centers in the grid. The most recently used are cached, see `get_field_cache_info`
+        :param row:
+        :param column:
+        :return: distances, angles - read only numpy arrays of float32 the same length as a layer in the data
+        """
+        key = (int(row), int(column))
+        fields = self.field_cache.get(key)
+
+        if fields is not None:
+            self.field_cache_hits += 1
+            self.field_cache.move_to_end(key)
+            return fields
+
+        self.field_cache_misses += 1
+
+        fields = self.build_fields(row, column)
+        for field in fields:
+            field.setflags(write = False)
+
+        if self.field_cache_size > 0:
+            self.field_cache[key] = fields
+            if len(self.field_cache) > self.field_cache_size:
+                self.field_cache.popitem(last = False)
+
+        return fields
+
+    def build_fields(self, row, column):
+        """
+        Work out the fields for `get_fields`
+        :param row:
+        :param column:
+        :return: distances, angles
+        """
+        row_distances, column_distances = self.get_row_column_distances(row, column)
+        distances = np.sqrt((column_distances * column_distances) + (row_distances * row_distances))
+        angles = np.degrees(np.arctan2(row_distances, column_distances) % (2 * np.pi))
+
+        return distances.astype(np.float32), angles.astype(np.float32)
+
+    def get_field_cache_info(self):
+        """
+        How well the cache of `get_fields` is doing
+        :return: dict of hits, misses, hit_rate and size
+        """
+        lookups = self.field_cache_hits + self.field_cache_misses
+
+        return {
+            "hits": self.field_cache_hits,
+            "misses": self.field_cache_misses,
+            "hit_rate": self.field_cache_hits / lookups if lookups > 0 else 0.0,
+            "size": len(self.field_cache),
+        }
+
+    def get_path_distances(self, row, column):
+        """
+        Get how many steps it takes to walk from the row, column to every other tile, moving in the 4 directions over
+        walkable tiles. The last one is kept until the walkable tiles change
+        :param row:
+        :param column:
+        :return: read only numpy array of float32 the same length as a layer in the data, inf where it can't be reached
+        """
+        key = (int(row), int(column), self.walkability_version)
+        if self.path_distances is not None and self.path_distances[0] == key:
+            return self.path_distances[1]
+
+        neighbour_masks = self.get_neighbour_masks().ravel()
+        self.path_distances = None
+        distances = self.create_tile_array("path_distances", (self.max_rows * self.max_columns,), np.float32, np.inf)
+
+        # breadth first, a whole frontier at a time
+        frontier = np.array([(key[0] * self.max_columns) + key[1]])
+        distances[frontier] = 0
+        step = 0
+
+        while len(frontier) > 0:
+            step += 1
+            neighbours = []
+
+            for bit, offset in enumerate(NEIGHBOUR_OFFSETS[:4]):
+                is_walkable = (neighbour_masks[frontier] & (1 << bit)) != 0
+                neighbours.append(frontier[is_walkable] + (offset[0] * self.max_columns) + offset[1])
+
+            frontier = np.unique(np.concatenate(neighbours))
+            frontier = frontier[np.isinf(distances[frontier])]
+            distances[frontier] = step
+
+        distances.setflags(write = False)
+        self.path_distances = (key, distances)
+
+        return distances
+
     def get_straight_line_distances(self, row, column):
         """
         Get the straight line distance from the center of the given row, column
         to all other centers in the grid.
         :param row:
         :param column:
-        :return:
+        :return: read only numpy array of float32
         """
-        row_distances, column_distances = self.get_row_column_distances(row, column)
-        return np.sqrt((column_distances * column_distances) + (row_distances * row_distances))
+        return self.get_fields(row, column)[0]
     
     def get_straight_line_distance_between_rows_columns(self, start_row, start_column, end_row, end_column):
         """
@@ -356,16 +1128,69 @@ class Grid:
         :param origin_angle:
         :return:
         """
-        row_distances, column_distances = self.get_row_column_distances(row, column)
-        result = origin_angle - np.degrees(np.arctan2(row_distances, column_distances) % (2 * np.pi))
+        result = origin_angle - self.get_fields(row, column)[1]
         result[np.where(result < 0)] += 360
         result[np.where(result >= 360)] -= 360
         return result
     
+    def build_fov_offsets(self, tile_range):
+        """
+        Precompute a table of relative row, column offsets out to `tile_range` tiles from an origin, with the
+        straight line distance and the direction in degrees of each offset. As every tile is the same size the
+        table is the same for every origin, so we only build it once and then only if a larger range is needed.
+        :param tile_range: How many tiles from the origin does the table need to cover
+        :return:
+        """
+        # no offset can be further away than the extent of the grid
+        row_range = int(min(tile_range, self.max_rows - 1))
+        column_range = int(min(tile_range, self.max_columns - 1))
+
+        if self.fov_distances is not None:
+            if row_range <= self.fov_row_range and column_range <= self.fov_column_range:
+                return
+
+            row_range = max(row_range, self.fov_row_range)
+            column_range = max(column_range, self.fov_column_range)
+
+        row_offsets, column_offsets = np.indices((row_range * 2 + 1, column_range * 2 + 1))
+
+        # if the grid is flipped then the pixel positions decrease as the rows, columns increase
+        y_offsets = (row_offsets - row_range) * self.tile_size * (-1 if self.flip_y else 1)
+        x_offsets = (column_offsets - column_range) * self.tile_size * (-1 if self.flip_x else 1)
+
+        self.fov_row_range = row_range
+        self.fov_column_range = column_range
+        self.fov_distances = np.sqrt((x_offsets * x_offsets) + (y_offsets * y_offsets))
+        self.fov_angles = np.degrees(np.arctan2(y_offsets, x_offsets) % (2 * np.pi))
+
+    def get_fov_tile_range(self, tile_distance):
+        """
+        How many tiles from the origin can be within `tile_distance` as used by `get_positions_in_fov`
+        :param tile_distance:
+        :return:
+        """
+        max_distance = (self.half_tile_size * np.max(tile_distance)) - self.half_tile_size
+        return max(int(np.ceil(max_distance / self.tile_size)), 0)
+
+    @staticmethod
+    def is_within_fov(theta, fov):
+        """
+        Given angles already relative to the origin angle are they within the field of view
+        :param theta:
+        :param fov:
+        :return:
+        """
+        theta[np.where(theta < 0)] += 360
+        theta[np.where(theta >= 360)] -= 360
+        half_fov = fov / 2
+
+        return np.logical_or(theta >= (360 - half_fov), theta <= half_fov)
+
     def get_positions_in_fov(self, row, column, origin_angle, fov, tile_distance):
         """
         Get an indexer for grid positions that in the field of view
-        from the center of the given row, column
+        from the center of the given row, column.
+        Only the window of tiles that can be in range is evaluated, using the offsets table from `build_fov_offsets`
         :param row:
         :param column:
         :param fov:
@@ -373,11 +1198,203 @@ class Grid:
         :param tile_distance:
         :return:
         """
-        straight_line_distances = self.get_straight_line_distances(row, column)
-        theta = self.get_angles(row, column, origin_angle)
-        half_fov = fov / 2
-        
-        return np.logical_and(
-            np.logical_or(theta >= (360 - half_fov), theta <= half_fov),
+        tile_range = self.get_fov_tile_range(tile_distance)
+        self.build_fov_offsets(tile_range)
+
+        # the window of the grid that could be in range, clipped to the edges of the grid
+        top = max(row - tile_range, 0)
+        bottom = min(row + tile_range + 1, self.max_rows)
+        left = max(column - tile_range, 0)
+        right = min(column + tile_range + 1, self.max_columns)
+
+        # and the matching window in the offsets table, which is centered on the origin
+        table_rows = slice(top - row + self.fov_row_range, bottom - row + self.fov_row_range)
+        table_columns = slice(left - column + self.fov_column_range, right - column + self.fov_column_range)
+
+        straight_line_distances = self.fov_distances[table_rows, table_columns]
+        theta = origin_angle - self.fov_angles[table_rows, table_columns]
+
+        result = np.zeros((self.max_rows, self.max_columns), dtype = bool)
+        result[top:bottom, left:right] = np.logical_and(
+            self.is_within_fov(theta, fov),
             straight_line_distances < (self.half_tile_size * tile_distance) - self.half_tile_size
         )
+
+        return result.ravel()
+
+    def get_positions_in_fov_batch(self, rows, columns, origin_angles, fov, tile_distance):
+        """
+        Get the field of view indexers for many viewers at once, the result has a row for each viewer
+        which matches the result of calling `get_positions_in_fov` for that viewer.
+        :param rows: The row of each viewer
+        :param columns: The column of each viewer
+        :param origin_angles: The angle each viewer is facing
+        :param fov: The field of view in degrees, either one for all viewers or one per viewer
+        :param tile_distance: How far can the viewers see, either one for all viewers or one per viewer
+        :return: numpy array of bool with shape (number of viewers, number of grid positions)
+        """
+        rows = np.asarray(rows, dtype = int)
+        columns = np.asarray(columns, dtype = int)
+        number_of_viewers = len(rows)
+
+        origin_angles = np.broadcast_to(origin_angles, (number_of_viewers,))
+        fov = np.broadcast_to(fov, (number_of_viewers,))
+        tile_distance = np.broadcast_to(tile_distance, (number_of_viewers,))
+
+        if number_of_viewers == 0:
+            return np.zeros((0, self.max_rows * self.max_columns), dtype = bool)
+
+        self.build_fov_offsets(self.get_fov_tile_range(tile_distance))
+
+        # the offset from every viewer to every position in the grid
+        grid_rows, grid_columns = np.indices((self.max_rows, self.max_columns))
+        row_offsets = grid_rows.ravel()[np.newaxis, :] - rows[:, np.newaxis]
+        column_offsets = grid_columns.ravel()[np.newaxis, :] - columns[:, np.newaxis]
+
+        # anything outside of the offsets table is further than any viewer can see
+        in_table = np.logical_and(
+            np.abs(row_offsets) <= self.fov_row_range,
+            np.abs(column_offsets) <= self.fov_column_range
+        )
+
+        table_rows = np.clip(row_offsets, -self.fov_row_range, self.fov_row_range) + self.fov_row_range
+        table_columns = np.clip(column_offsets, -self.fov_column_range, self.fov_column_range) + self.fov_column_range
+
+        straight_line_distances = self.fov_distances[table_rows, table_columns]
+        theta = origin_angles[:, np.newaxis] - self.fov_angles[table_rows, table_columns]
+        max_distances = (self.half_tile_size * tile_distance) - self.half_tile_size
+
+        return in_table & self.is_within_fov(theta, fov[:, np.newaxis]) & (
+            straight_line_distances < max_distances[:, np.newaxis]
+        )
+
+    def get_visible_positions(self, row, column, tile_radius, origin_angle = None, fov = None):
+        """
+        Get an indexer for grid positions that can be seen from the center of the given row, column.
+        Unlike `get_positions_in_fov` solid tiles block the view of what is behind them.
+        :param row:
+        :param column:
+        :param tile_radius: How many tiles can be seen from the origin
+        :param origin_angle: (optional) The direction in degrees the viewer is facing
+        :param fov: (optional) The field of view in degrees
+        :return:
+        """
+        if self.visibility is None:
+            self.visibility = Visibility(self)
+
+        return self.visibility.get_visible_positions(row, column, tile_radius, origin_angle, fov)
+
+    def line_of_sight(self, starts, ends, use_pixels = True):
+        """
+        For many pairs of points check if there is a clear line between them, that is no solid tiles
+        (as per `get_walkable`) are between the start and the end. The tiles the pairs start and end on are not
+        considered so you can see a solid tile but not what is behind it.
+        Each line is stepped through a tile at a time along its longest axis (DDA) with all the lines stepped
+        through at once. Where a line passes exactly between two tiles it's only blocked if both are solid, unless a
+        solid tile on one side has already been passed exactly, then we're on the edge of what can be seen and a
+        solid tile on the other side blocks it. This is how `Visibility` sees past corners, so for tiles that aren't
+        solid the two agree.
+        :param starts: array like of (x, y) pixel positions or (row, column) if not `use_pixels`
+        :param ends: array like of (x, y) pixel positions or (row, column) if not `use_pixels`
+        :param use_pixels: Are the `starts` and `ends` pixels, if not they are treated as row, columns
+        :return: numpy array of bool, True for each pair that has line of sight
+        """
+        starts = np.atleast_2d(np.asarray(starts))
+        ends = np.atleast_2d(np.asarray(ends))
+
+        if len(starts) == 0:
+            return np.zeros(0, dtype = bool)
+
+        if use_pixels:
+            # the index returned from the tree is the position in the flattened grid
+            start_rows, start_columns = np.divmod(self.tree.query(starts[:, ::-1])[1], self.max_columns)
+            end_rows, end_columns = np.divmod(self.tree.query(ends[:, ::-1])[1], self.max_columns)
+        else:
+            start_rows, start_columns = starts[:, 0].astype(int), starts[:, 1].astype(int)
+            end_rows, end_columns = ends[:, 0].astype(int), ends[:, 1].astype(int)
+
+        row_deltas = end_rows - start_rows
+        column_deltas = end_columns - start_columns
+
+        # step a tile at a time along the longest axis, working out where we are along the other
+        is_row_major = np.abs(row_deltas) >= np.abs(column_deltas)
+        steps = np.where(is_row_major, np.abs(row_deltas), np.abs(column_deltas))
+        max_steps = int(np.max(steps))
+
+        if max_steps < 2:
+            # adjacent or the same tile, so there is nothing in between
+            return np.ones(len(starts), dtype = bool)
+
+        # exclude the first and last tile of each line, lines that are shorter than the
+        # longest line will repeat their last step which is fine as it's excluded anyways
+        step_range = np.minimum(np.arange(1, max_steps)[np.newaxis, :], np.maximum(steps - 1, 0)[:, np.newaxis])
+
+        major = np.where(is_row_major, start_rows, start_columns)[:, np.newaxis] + \
+            (step_range * np.where(is_row_major, np.sign(row_deltas), np.sign(column_deltas))[:, np.newaxis])
+
+        # along the other axis we're at `minor_deltas * step / steps` from the start, in whole numbers so that we
+        # know exactly when we're between two tiles. `upper` is that rounded with ties going up
+        minor_deltas = np.where(is_row_major, column_deltas, row_deltas)[:, np.newaxis]
+        twice_steps = 2 * np.maximum(steps, 1)[:, np.newaxis]
+        numerators = (2 * step_range * minor_deltas) + steps[:, np.newaxis]
+        upper = np.where(is_row_major, start_columns, start_rows)[:, np.newaxis] + (numerators // twice_steps)
+        is_between = (numerators % twice_steps) == 0
+
+        # the walkable bitmap is padded so anything just off the grid is not walkable
+        solid = ~self.get_walkable().ravel()
+        padded_columns = self.max_columns + 2
+        rows = np.clip(np.where(is_row_major[:, np.newaxis], major, upper) + 1, 0, self.max_rows + 1)
+        columns = np.clip(np.where(is_row_major[:, np.newaxis], upper, major) + 1, 0, self.max_columns + 1)
+        upper_indexes = (rows * padded_columns) + columns
+
+        # the tile before `upper` along the other axis, when we're between it and `upper`
+        lower_offsets = np.where(is_row_major, 1, padded_columns)[:, np.newaxis]
+        is_upper_solid = solid[upper_indexes]
+        is_lower_solid = solid[upper_indexes - (lower_offsets * is_between)]
+
+        # passing exactly a solid tile on one side puts us on the edge of what can be seen
+        is_lower_edge = is_between & is_lower_solid & ~is_upper_solid
+        is_upper_edge = is_between & is_upper_solid & ~is_lower_solid
+        was_lower_edge = np.logical_or.accumulate(is_lower_edge, axis = 1)
+        was_upper_edge = np.logical_or.accumulate(is_upper_edge, axis = 1)
+
+        blocked = (is_upper_solid & is_lower_solid) | (is_lower_edge & was_upper_edge) | \
+            (is_upper_edge & was_lower_edge)
+
+        # the lines with less than two steps have been stepping on their start tile
+        blocked[steps < 2] = False
+
+        return ~np.any(blocked, axis = 1)
+
+
+def map_npz_array(path, name):
+    """
+    Memory map an array stored in an uncompressed `.npz` file without reading it in.
+    The map is copy on write so changes are not written to the file.
+    :param path:
+    :param name: The name the array was saved with
+    :return: numpy.memmap or None if the array is compressed and can't be mapped
+    """
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(f"{name}.npy")
+
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+
+    with open(path, "rb") as f:
+        # the local file header is 30 bytes followed by the file name and an extra field
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+        name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+        offset = f.tell()
+
+    return np.memmap(path, dtype = dtype, mode = "c", offset = offset, shape = shape,
+                     order = "F" if fortran_order else "C")
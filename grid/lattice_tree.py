@@ -0,0 +1,164 @@
+import math
+import numpy as np
+
+
+class LatticeTree:
+    """
+    A stand in for `scipy.spatial.KDTree` for the centers of the tiles in a grid. As the tiles are all the same
+    size we can work out the nearest tiles arithmetically rather than storing every center in a tree.
+    Points are (y, x) and indexes are for the flattened grid, matching the `Grid.flat_pixel_positions` KDTree.
+    """
+
+    def __init__(self, max_rows, max_columns, tile_size, flip_x = False, flip_y = False):
+        """
+        :param max_rows:
+        :param max_columns:
+        :param tile_size:
+        :param flip_x:
+        :param flip_y:
+        """
+        self.max_rows = max_rows
+        self.max_columns = max_columns
+        self.tile_size = tile_size
+        self.half_tile_size = tile_size / 2.0
+        self.flip_x = flip_x
+        self.flip_y = flip_y
+        self.n = max_rows * max_columns
+
+    def get_centers(self, rows, columns):
+        """
+        Get the pixel centers of rows and columns
+        :param rows:
+        :param columns:
+        :return: y, x
+        """
+        if self.flip_y:
+            rows = self.max_rows - rows - 1
+        if self.flip_x:
+            columns = self.max_columns - columns - 1
+
+        y = ((rows + 1) * self.tile_size) - self.half_tile_size
+        x = ((columns + 1) * self.tile_size) - self.half_tile_size
+        return y, x
+
+    def get_nearest(self, y, x):
+        """
+        Get the nearest row and column for pixel positions, anything outside the grid is clamped to the edge
+        :param y:
+        :param x:
+        :return: rows, columns
+        """
+        rows = np.clip(np.floor_divide(y, self.tile_size), 0, self.max_rows - 1).astype(int)
+        columns = np.clip(np.floor_divide(x, self.tile_size), 0, self.max_columns - 1).astype(int)
+
+        if self.flip_y:
+            rows = self.max_rows - rows - 1
+        if self.flip_x:
+            columns = self.max_columns - columns - 1
+
+        return rows, columns
+
+    def query(self, x, k = 1, distance_upper_bound = np.inf):
+        """
+        Query for the nearest neighbours, see `scipy.spatial.KDTree.query`
+        :param x: (y, x) pixel position or an array of them
+        :param k: The number of nearest neighbours to return
+        :param distance_upper_bound: Return only neighbours closer than this
+        :return: distances, indexes - missing neighbours have an infinite distance and an index of `n`
+        """
+        points = np.asarray(x, dtype = float)
+        is_single_point = points.ndim == 1
+
+        if is_single_point and k == 1:
+            return self.query_point(points[0], points[1], distance_upper_bound)
+
+        points = np.atleast_2d(points)
+        y = points[:, 0]
+        x = points[:, 1]
+
+        rows, columns = self.get_nearest(y, x)
+
+        if k == 1:
+            center_y, center_x = self.get_centers(rows, columns)
+            distances = np.hypot(center_y - y, center_x - x)
+            indexes = (rows * self.max_columns) + columns
+        else:
+            distances, indexes = self.query_window(y, x, rows, columns, k)
+
+        missing = distances >= distance_upper_bound
+        distances = np.where(missing, np.inf, distances)
+        indexes = np.where(missing, self.n, indexes)
+
+        if is_single_point:
+            return distances[0], indexes[0]
+
+        return distances, indexes
+
+    def query_point(self, y, x, distance_upper_bound = np.inf):
+        """
+        Query for the nearest neighbour of a single point, avoiding the overhead of numpy for a single value
+        :param y:
+        :param x:
+        :param distance_upper_bound:
+        :return: distance, index
+        """
+        row = min(max(int(math.floor(y / self.tile_size)), 0), self.max_rows - 1)
+        column = min(max(int(math.floor(x / self.tile_size)), 0), self.max_columns - 1)
+
+        if self.flip_y:
+            row = self.max_rows - row - 1
+        if self.flip_x:
+            column = self.max_columns - column - 1
+
+        center_y, center_x = self.get_centers(row, column)
+        distance = math.hypot(center_y - y, center_x - x)
+
+        if distance >= distance_upper_bound:
+            return np.inf, self.n
+
+        return distance, (row * self.max_columns) + column
+
+    def query_window(self, y, x, rows, columns, k):
+        """
+        Find the `k` nearest tiles by looking at a window of tiles around the nearest tile,
+        growing the window until it's certain to contain the `k` nearest
+        :param y:
+        :param x:
+        :param rows: The nearest row for each point
+        :param columns: The nearest column for each point
+        :param k:
+        :return: distances, indexes each with shape (number of points, k)
+        """
+        window = int(np.ceil(np.sqrt(k / np.pi))) + 1
+
+        while True:
+            offsets = np.arange(-window, window + 1)
+            window_rows = (rows[:, np.newaxis] + np.repeat(offsets, len(offsets))[np.newaxis, :])
+            window_columns = (columns[:, np.newaxis] + np.tile(offsets, len(offsets))[np.newaxis, :])
+
+            in_grid = (window_rows >= 0) & (window_rows < self.max_rows) & \
+                      (window_columns >= 0) & (window_columns < self.max_columns)
+
+            center_y, center_x = self.get_centers(window_rows, window_columns)
+            distances = np.where(
+                in_grid, np.hypot(center_y - y[:, np.newaxis], center_x - x[:, np.newaxis]), np.inf
+            )
+            indexes = np.where(in_grid, (window_rows * self.max_columns) + window_columns, self.n)
+
+            order = np.argsort(distances, axis = 1, kind = "stable")[:, :k]
+            distances = np.take_along_axis(distances, order, axis = 1)
+            indexes = np.take_along_axis(indexes, order, axis = 1)
+
+            if distances.shape[1] < k:
+                padding = k - distances.shape[1]
+                distances = np.pad(distances, ((0, 0), (0, padding)), constant_values = np.inf)
+                indexes = np.pad(indexes, ((0, 0), (0, padding)), constant_values = self.n)
+
+            # any tile outside of the window is at least this far away from the point
+            window_distance = (window + 0.5) * self.tile_size
+            covers_grid = window >= max(self.max_rows, self.max_columns)
+
+            if covers_grid or np.all(distances[:, -1] <= window_distance):
+                return distances, indexes
+
+            window *= 2
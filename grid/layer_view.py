@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class LayerView:
+    """
+    A read only view of a layer of a grid that doesn't keep its data in a single array, such as `ChunkedGrid`.
+    It can be indexed like a 2d numpy array of (rows, columns), by `[row][column]`, `[row, column]` or
+    `[rows, columns]` where rows and columns are arrays. Values are read with `get_data` of the grid.
+    Comparisons return another view with the comparison applied to the values.
+    """
+
+    def __init__(self, grid, layer, transform = None):
+        """
+        :param grid:
+        :param layer:
+        :param transform: (optional) function applied to values read from the layer
+        """
+        self.grid = grid
+        self.layer = layer
+        self.transform = transform
+        self.shape = (grid.max_rows, grid.max_columns)
+
+    def __len__(self):
+        return self.grid.max_rows
+
+    def __getitem__(self, item):
+        if not isinstance(item, tuple):
+            return LayerViewRow(self, item)
+
+        rows, columns = item
+
+        if np.ndim(rows) == 0 and np.ndim(columns) == 0:
+            return self.get_value(int(rows), int(columns))
+
+        rows, columns = np.broadcast_arrays(rows, columns)
+        values = [self.get_value(int(row), int(column)) for row, column in zip(rows.ravel(), columns.ravel())]
+
+        return np.reshape(np.array(values), rows.shape)
+
+    def get_value(self, row, column):
+        value = self.grid.get_data(self.layer, (row * self.grid.max_columns) + column)
+        if self.transform is not None:
+            return self.transform(value)
+        return value
+
+    def __eq__(self, other):
+        return LayerView(self.grid, self.layer, lambda value: self.apply(value) == other)
+
+    def __ne__(self, other):
+        return LayerView(self.grid, self.layer, lambda value: self.apply(value) != other)
+
+    def apply(self, value):
+        if self.transform is not None:
+            return self.transform(value)
+        return value
+
+
+class LayerViewRow:
+    """
+    A row of a `LayerView`
+    """
+
+    def __init__(self, layer: LayerView, row):
+        self.layer = layer
+        self.row = row
+
+    def __len__(self):
+        return self.layer.grid.max_columns
+
+    def __getitem__(self, column):
+        return self.layer.get_value(self.row, column)
@@ -0,0 +1,323 @@
+import sys
+import numpy as np
+
+
+class QuadTreeNode:
+    """
+    A square region of a `QuadTreeLayer`, either a leaf where every tile has the same `value`
+    or split into four `children`
+    """
+
+    def __init__(self, top, left, size, value = 0):
+        self.top = top
+        self.left = left
+        self.size = size
+        self.value = value
+        self.children = None
+
+    def is_leaf(self):
+        return self.children is None
+
+    def get_child(self, row, column):
+        """
+        Get the child node containing the row, column
+        :param row:
+        :param column:
+        :return:
+        """
+        half_size = self.size // 2
+        index = (2 if row >= self.top + half_size else 0) + (1 if column >= self.left + half_size else 0)
+        return self.children[index]
+
+    def split(self):
+        """
+        Split a leaf into four leaves with the same value
+        :return:
+        """
+        half_size = self.size // 2
+        self.children = [
+            QuadTreeNode(self.top, self.left, half_size, self.value),
+            QuadTreeNode(self.top, self.left + half_size, half_size, self.value),
+            QuadTreeNode(self.top + half_size, self.left, half_size, self.value),
+            QuadTreeNode(self.top + half_size, self.left + half_size, half_size, self.value),
+        ]
+
+    def merge(self):
+        """
+        If all of the children are leaves with the same value then become a leaf with that value
+        :return: True if merged
+        """
+        if self.children is None:
+            return False
+
+        value = self.children[0].value
+        for child in self.children:
+            if not child.is_leaf() or child.value != value:
+                return False
+
+        self.value = value
+        self.children = None
+        return True
+
+
+class QuadTreeLayer:
+    """
+    A region quadtree storing a single layer of grid data, where any square region in which every tile has the
+    same value is stored as a single leaf. So memory and query cost scale with how complex the layer is rather
+    than how large it is.
+
+    The tree covers a power of 2 square large enough for the grid, anything outside of the grid
+    is clipped from the results.
+    """
+
+    def __init__(self, max_rows, max_columns, value = 0):
+        """
+        :param max_rows:
+        :param max_columns:
+        :param value: The value every tile starts with
+        """
+        self.max_rows = max_rows
+        self.max_columns = max_columns
+        self.shape = (max_rows, max_columns)
+
+        size = 1
+        while size < max(max_rows, max_columns):
+            size *= 2
+
+        self.root = QuadTreeNode(0, 0, size, value)
+
+    @classmethod
+    def from_array(cls, array):
+        """
+        Build a quadtree from a 2d array of (rows, columns)
+        :param array:
+        :return: QuadTreeLayer
+        """
+        array = np.asarray(array)
+        result = cls(array.shape[0], array.shape[1])
+
+        def build(node):
+            region = array[node.top:node.top + node.size, node.left:node.left + node.size]
+
+            if region.size == 0:
+                return
+
+            first_value = region.flat[0]
+            # the part of the node outside of the grid takes whatever value is inside
+            if node.size == 1 or np.all(region == first_value):
+                node.value = first_value
+                return
+
+            node.split()
+            for child in node.children:
+                build(child)
+
+            # merge children that are entirely outside the grid into their siblings
+            node.merge()
+
+        build(result.root)
+        return result
+
+    def to_preorder(self, dtype = np.float64):
+        """
+        Flatten the tree for saving, parents come before their children
+        :param dtype: of the values
+        :return: numpy array of bool for if each node is a leaf, numpy array of the value of each node
+        """
+        is_leaf = []
+        values = []
+        nodes = [self.root]
+
+        while nodes:
+            node = nodes.pop()
+            is_leaf.append(node.is_leaf())
+            values.append(node.value)
+
+            if not node.is_leaf():
+                nodes.extend(reversed(node.children))
+
+        return np.array(is_leaf, dtype = bool), np.array(values, dtype = dtype)
+
+    @classmethod
+    def from_preorder(cls, max_rows, max_columns, is_leaf, values):
+        """
+        Build a quadtree from `to_preorder`
+        :param max_rows:
+        :param max_columns:
+        :param is_leaf:
+        :param values:
+        :return: QuadTreeLayer
+        """
+        result = cls(max_rows, max_columns)
+        is_leaf = is_leaf.tolist()
+        values = values.tolist()
+        nodes = [result.root]
+        position = 0
+
+        while nodes:
+            node = nodes.pop()
+            node.value = values[position]
+
+            if not is_leaf[position]:
+                node.split()
+                nodes.extend(reversed(node.children))
+
+            position += 1
+
+        return result
+
+    def to_array(self, dtype = np.float64):
+        """
+        :param dtype:
+        :return: 2d numpy array of (rows, columns)
+        """
+        result = np.zeros(self.shape, dtype = dtype)
+        for top, left, bottom, right, value in self.leaves():
+            result[top:bottom, left:right] = value
+        return result
+
+    def get_leaf(self, row, column):
+        """
+        Get the leaf node containing the row, column
+        :param row:
+        :param column:
+        :return: QuadTreeNode
+        """
+        node = self.root
+        while not node.is_leaf():
+            node = node.get_child(row, column)
+        return node
+
+    def get(self, row, column):
+        """
+        :param row:
+        :param column:
+        :return: The value at row, column
+        """
+        return self.get_leaf(row, column).value
+
+    def set(self, row, column, value):
+        """
+        Set the value at row, column, splitting leaves as needed and merging them back when they become uniform
+        :param row:
+        :param column:
+        :param value:
+        :return:
+        """
+        node = self.root
+        path = []
+
+        while node.size > 1:
+            if node.is_leaf():
+                if node.value == value:
+                    return
+                node.split()
+            path.append(node)
+            node = node.get_child(row, column)
+
+        node.value = value
+
+        for parent in reversed(path):
+            if not parent.merge():
+                break
+
+    def query_region(self, top, left, bottom, right):
+        """
+        Get the leaves that overlap a region, clipped to the region
+        :param top: first row of the region
+        :param left: first column of the region
+        :param bottom: row after the last row of the region
+        :param right: column after the last column of the region
+        :return: List of (top, left, bottom, right, value)
+        """
+        top = max(top, 0)
+        left = max(left, 0)
+        bottom = min(bottom, self.max_rows)
+        right = min(right, self.max_columns)
+
+        result = []
+        if top >= bottom or left >= right:
+            return result
+
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+
+            if node.top >= bottom or node.left >= right or \
+                    node.top + node.size <= top or node.left + node.size <= left:
+                continue
+
+            if node.is_leaf():
+                result.append((
+                    max(node.top, top), max(node.left, left),
+                    min(node.top + node.size, bottom), min(node.left + node.size, right),
+                    node.value
+                ))
+            else:
+                nodes.extend(node.children)
+
+        return result
+
+    def query_region_nodes(self, top, left, bottom, right):
+        """
+        Get the leaf nodes that overlap a region
+        :param top: first row of the region
+        :param left: first column of the region
+        :param bottom: row after the last row of the region
+        :param right: column after the last column of the region
+        :return: List of QuadTreeNode
+        """
+        result = []
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+
+            if node.top >= bottom or node.left >= right or \
+                    node.top + node.size <= top or node.left + node.size <= left:
+                continue
+
+            if node.is_leaf():
+                result.append(node)
+            else:
+                nodes.extend(node.children)
+
+        return result
+
+    def leaves(self):
+        """
+        All of the leaves clipped to the grid
+        :return: List of (top, left, bottom, right, value)
+        """
+        return self.query_region(0, 0, self.max_rows, self.max_columns)
+
+    def node_count(self):
+        """
+        :return: How many nodes, including those that are split, are in the tree
+        """
+        return len(self.get_nodes())
+
+    def get_nodes(self):
+        """
+        :return: List of every node in the tree, including those that are split
+        """
+        result = []
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            result.append(node)
+            if not node.is_leaf():
+                nodes.extend(node.children)
+        return result
+
+    @property
+    def nbytes(self):
+        """
+        Roughly how many bytes the nodes of the tree use
+        :return:
+        """
+        result = 0
+        for node in self.get_nodes():
+            result += sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+            if not node.is_leaf():
+                result += sys.getsizeof(node.children)
+        return result
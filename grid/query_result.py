@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class QueryResult:
+    """
+    The results of `Grid.query_records`, one record for each layer of each tile found, backed by a numpy
+    structured array so that they can be filtered without looping over them in python.
+
+    Fields can be read as arrays with `result["distance"]` or the properties, and indexing with a mask,
+    slice or array of indexes returns another `QueryResult`.
+    """
+
+    dtype = np.dtype([
+        ("id", np.int64),
+        ("layer", np.int16),
+        ("distance", np.float64),
+        ("row", np.int32),
+        ("col", np.int32),
+        ("entity_type", np.int32),
+    ])
+
+    def __init__(self, records = None):
+        """
+        :param records: (optional) numpy structured array with `QueryResult.dtype`
+        """
+        if records is None:
+            records = np.zeros(0, dtype = QueryResult.dtype)
+
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            return self.records[item]
+
+        return QueryResult(np.atleast_1d(self.records[item]))
+
+    def __repr__(self):
+        return f"QueryResult({self.records!r})"
+
+    @property
+    def ids(self):
+        return self.records["id"]
+
+    @property
+    def distances(self):
+        return self.records["distance"]
+
+    @property
+    def entity_types(self):
+        return self.records["entity_type"]
+
+    def filter(
+            self, layers = None, entity_types = None, exclude_ids = None, max_distance = None, exclude_empty = False
+    ):
+        """
+        Get the records that match all of the given conditions
+        :param layers: (optional) only records in these layers
+        :param entity_types: (optional) only records of these entity types
+        :param exclude_ids: (optional) no records with these ids
+        :param max_distance: (optional) only records less than or equal to this distance
+        :param exclude_empty: no records for empty tiles, where the id is 0
+        :return: QueryResult
+        """
+        mask = np.ones(len(self.records), dtype = bool)
+
+        if layers is not None:
+            mask &= np.isin(self.records["layer"], layers)
+        if entity_types is not None:
+            mask &= np.isin(self.records["entity_type"], entity_types)
+        if exclude_ids is not None:
+            mask &= ~np.isin(self.records["id"], exclude_ids)
+        if max_distance is not None:
+            mask &= self.records["distance"] <= max_distance
+        if exclude_empty:
+            mask &= self.records["id"] != 0
+
+        return QueryResult(self.records[mask])
+
+    def sort_by_distance(self):
+        """
+        :return: QueryResult ordered from nearest to furthest
+        """
+        return QueryResult(self.records[np.argsort(self.records["distance"], kind = "stable")])
+
+    def to_list(self):
+        """
+        The results as the list of (id, distance) that `Grid.query` returns
+        :return:
+        """
+        return list(zip(self.records["id"].tolist(), self.records["distance"].tolist()))
@@ -0,0 +1,211 @@
+import numpy as np
+from .grid import Grid
+from .layer_view import LayerView
+from .quadtree import QuadTreeLayer
+from pathfinding import quadtree_astar
+
+
+class SparseGrid(Grid):
+    """
+    A grid for maps that are mostly empty. Each data layer is stored in a `QuadTreeLayer` so that any square region
+    with the same value, such as open floor, takes a single node. Memory and the cost of region queries scale with
+    how complex the map is rather than its area.
+
+    As well as the data layers the solid tiles of the 0 layer are kept in their own quadtree, where neighbouring walls
+    merge together, for `find_path` to search over.
+    As the grid is always `compact` there is no KDTree, tile centers are worked out as they are needed.
+    """
+
+    def __init__(
+            self, x_max, y_max, tile_size, number_of_layers = 3, flip_x = False, flip_y = False,
+            journal_size = 4096, dtype = np.int32
+    ):
+        """
+        :param x_max:
+        :param y_max:
+        :param tile_size:
+        :param number_of_layers:
+        :param flip_x:
+        :param flip_y:
+        :param journal_size: How many changes to the grid data do we keep for `get_changes_since`
+        :param dtype: The data type values are returned as
+        """
+        self.layers = None
+        self.solid = None
+
+        super().__init__(
+            x_max, y_max, tile_size, number_of_layers, flip_x, flip_y, journal_size,
+            compact = True, dtype = dtype
+        )
+
+    def create_data(self, dtype):
+        """
+        There is no dense data, only a quadtree for each layer
+        :param dtype:
+        :return:
+        """
+        self.dtype = np.dtype(dtype)
+        self.layers = [QuadTreeLayer(self.max_rows, self.max_columns) for _ in range(self.number_of_layers)]
+        self.solid = QuadTreeLayer(self.max_rows, self.max_columns, False)
+        return None
+
+    def get_snapshot_arrays(self):
+        """
+        Each quadtree is saved flattened, see `QuadTreeLayer.to_preorder`, rather than as dense data
+        :return: dict of name to numpy array
+        """
+        arrays = super().get_snapshot_arrays()
+        del arrays["data"]
+        arrays["number_of_layers"] = np.array(self.number_of_layers)
+        arrays["dtype"] = np.array(self.dtype.str)
+
+        for layer, tree in enumerate(self.layers):
+            arrays[f"layer_{layer}_is_leaf"], arrays[f"layer_{layer}_values"] = tree.to_preorder(self.dtype)
+
+        arrays["solid_is_leaf"], arrays["solid_values"] = self.solid.to_preorder(bool)
+
+        return arrays
+
+    @classmethod
+    def load(cls, path, mmap = True, journal_size = 4096):
+        """
+        Load a grid saved with `SparseGrid.save`
+        :param path: or a file like object, which is read from its current position
+        :param mmap: there's nothing to map, the quadtrees are rebuilt
+        :param journal_size:
+        :return: SparseGrid
+        """
+        with np.load(path) as snapshot:
+            x_max, y_max = snapshot["dimensions"].tolist()
+            flip_x, flip_y = snapshot["flip"].tolist()
+
+            grid = cls(
+                x_max, y_max, snapshot["tile_size"].item(), int(snapshot["number_of_layers"]), flip_x, flip_y,
+                journal_size, dtype = np.dtype(str(snapshot["dtype"]))
+            )
+
+            grid.layers = [
+                QuadTreeLayer.from_preorder(
+                    y_max, x_max, snapshot[f"layer_{layer}_is_leaf"], snapshot[f"layer_{layer}_values"]
+                )
+                for layer in range(grid.number_of_layers)
+            ]
+            grid.solid = QuadTreeLayer.from_preorder(y_max, x_max, snapshot["solid_is_leaf"], snapshot["solid_values"])
+            grid.restore_snapshot_extras(snapshot)
+
+        grid.rebuild_locations()
+
+        return grid
+
+    def get_data(self, layer, index):
+        """
+        Get the value in the quadtree of the layer
+        :param layer:
+        :param index: index into the flattened grid
+        :return:
+        """
+        row, column = divmod(int(index), self.max_columns)
+        return self.dtype.type(self.layers[layer].get(row, column))
+
+    def get_cell_data(self, indexes, layers = None):
+        """
+        Get the values in every layer for the `indexes` into the flattened grid
+        :param indexes:
+        :param layers: (optional) only get the values in these layers
+        :return: numpy array with shape (number_of_layers or len(layers), len(indexes))
+        """
+        if layers is None:
+            layers = list(range(self.number_of_layers))
+
+        result = np.zeros((len(layers), len(indexes)), dtype = self.dtype)
+
+        for position, index in enumerate(indexes):
+            row, column = divmod(int(index), self.max_columns)
+            for layer_position, layer in enumerate(layers):
+                result[layer_position, position] = self.layers[layer].get(row, column)
+
+        return result
+
+    def store_data(self, layer, index, value):
+        """
+        Store the value in the quadtree of the layer, and for the 0 layer whether the tile is solid,
+        use `set_data` so that changes are recorded
+        :param layer:
+        :param index: index into the flattened grid
+        :param value:
+        :return:
+        """
+        row, column = divmod(int(index), self.max_columns)
+        self.layers[layer].set(row, column, value)
+
+        if layer == 0:
+            self.solid.set(row, column, value != 0)
+
+    def query_region(self, layer, top, left, bottom, right):
+        """
+        Get the regions of a layer with the same value that overlap the rows and columns
+        :param layer:
+        :param top: first row
+        :param left: first column
+        :param bottom: row after the last row
+        :param right: column after the last column
+        :return: List of (top, left, bottom, right, value)
+        """
+        return self.layers[layer].query_region(top, left, bottom, right)
+
+    def rebuild_locations(self):
+        """
+        Rebuild where everything is from the quadtrees
+        :return:
+        """
+        self.locations = {}
+
+        for layer, tree in enumerate(self.layers):
+            for top, left, bottom, right, value in tree.leaves():
+                if value != 0:
+                    self.locations[value] = (layer, (top * self.max_columns) + left)
+
+    def build_walkable(self):
+        """
+        Fill the inside of the `walkable` border from the solid regions
+        :return:
+        """
+        self.walkable[1:-1, 1:-1] = True
+
+        for top, left, bottom, right, value in self.solid.leaves():
+            if value:
+                self.walkable[top + 1:bottom + 1, left + 1:right + 1] = False
+
+    def grid_for_pathing(self):
+        """
+        return a view of the 0 layer which is expected to contain the solid and non-solid tiles for
+        pathing, where > 0 means a solid tile.
+        :return: LayerView
+        """
+        return LayerView(self, 0)
+
+    def find_path(self, start, end, allow_diagonal_movement = False, max_iterations = None):
+        """
+        Search over the solid quadtree so that open areas are crossed in a single step,
+        diagonal movement falls back to searching every tile
+        :param start: (row, column)
+        :param end: (row, column)
+        :param allow_diagonal_movement:
+        :param max_iterations: (optional) give up after this many steps of the search, returning the path so far
+        :return: List of (row, column) or None
+        """
+        if allow_diagonal_movement:
+            return super().find_path(start, end, allow_diagonal_movement, max_iterations)
+
+        return quadtree_astar(self.solid, start, end, max_iterations)
+
+    def memory_footprint(self):
+        """
+        As for `Grid`, with the quadtrees
+        :return: dict of bytes for each array, with the sum under `total`
+        """
+        result = super().memory_footprint()
+        result["quadtrees"] = sum(tree.nbytes for tree in self.layers) + self.solid.nbytes
+        result["total"] += result["quadtrees"]
+
+        return result
@@ -0,0 +1,175 @@
+from collections import OrderedDict
+import numpy as np
+
+
+class Visibility:
+    """
+    Work out which grid positions can be seen from an origin using symmetric shadowcasting over the
+    solid tiles of the grid (the tiles that are not `Grid.get_walkable`).
+    Inspired by https://www.albertford.com/shadowcasting/
+
+    Results are cached per (row, column, tile_radius) and the cache is dropped whenever the
+    `walkability_version` of the grid changes.
+    """
+
+    # each quadrant transforms a (depth, column) in the quadrant to a (row offset, column offset) in the grid
+    QUADRANTS = (
+        (-1, 0, 0, 1),  # north
+        (1, 0, 0, 1),  # south
+        (0, 1, 1, 0),  # east
+        (0, 1, -1, 0),  # west
+    )
+
+    def __init__(self, grid, max_cache_size = 1024):
+        """
+        :param grid: The grid we're determining visibility for
+        :param max_cache_size: How many visibility results to keep, least recently used are dropped first
+        """
+        self.grid = grid
+        self.max_cache_size = max_cache_size
+        self.cache = OrderedDict()
+        self.cache_version = None
+        self.solid = None
+
+    def get_visible_positions(self, row, column, tile_radius, origin_angle = None, fov = None):
+        """
+        Get an indexer for grid positions that can be seen from the center of the given row, column
+        :param row:
+        :param column:
+        :param tile_radius: How many tiles can be seen from the origin
+        :param origin_angle: (optional) The direction in degrees the viewer is facing
+        :param fov: (optional) The field of view in degrees, only considered when `origin_angle` is also given
+        :return: numpy array of bool the same length as a layer in `Grid.data`
+        """
+        if self.cache_version != self.grid.walkability_version:
+            self.cache.clear()
+            self.solid = ~self.grid.get_walkable()[1:-1, 1:-1]
+            self.cache_version = self.grid.walkability_version
+
+        key = (row, column, tile_radius)
+        result = self.cache.get(key)
+
+        if result is None:
+            result = self.shadowcast(row, column, tile_radius)
+            self.cache[key] = result
+            if len(self.cache) > self.max_cache_size:
+                self.cache.popitem(last = False)
+        else:
+            self.cache.move_to_end(key)
+
+        if origin_angle is not None and fov is not None:
+            # `get_positions_in_fov` is exclusive of the tile distance, so pad it out to our radius
+            in_fov = self.grid.get_positions_in_fov(row, column, origin_angle, fov, (tile_radius * 2) + 2)
+            return result & in_fov
+
+        return result.copy()
+
+    def shadowcast(self, row, column, tile_radius):
+        """
+        Cast shadows in each of the four quadrants around the origin. Solid tiles are visible but
+        block the view of whatever is behind them
+        :param row:
+        :param column:
+        :param tile_radius:
+        :return: numpy array of bool the same length as a layer in `Grid.data`
+        """
+        max_rows, max_columns = self.solid.shape
+        visible = np.zeros((max_rows, max_columns), dtype = bool)
+
+        if not (0 <= row < max_rows and 0 <= column < max_columns):
+            return visible.ravel()
+
+        visible[row, column] = True
+        radius_squared = tile_radius * tile_radius
+
+        for row_depth, row_column, column_depth, column_column in self.QUADRANTS:
+
+            def transform(depth, quadrant_column):
+                return (
+                    row + (depth * row_depth) + (quadrant_column * row_column),
+                    column + (depth * column_depth) + (quadrant_column * column_column),
+                )
+
+            def is_wall(tile):
+                if tile is None:
+                    return False
+                tile_row, tile_column = transform(*tile)
+                # beyond the edge of the grid is as good as a wall
+                if not (0 <= tile_row < max_rows and 0 <= tile_column < max_columns):
+                    return True
+                return self.solid[tile_row, tile_column]
+
+            def is_floor(tile):
+                if tile is None:
+                    return False
+                return not is_wall(tile)
+
+            # slopes are kept as (numerator, denominator) pairs so that the comparisons are exact
+            # rows are (depth, start slope, end slope)
+            rows = [(1, (-1, 1), (1, 1))]
+
+            while rows:
+                depth, start_slope, end_slope = rows.pop()
+
+                if depth > tile_radius:
+                    continue
+
+                previous_tile = None
+                min_column = round_ties_up(depth, start_slope)
+                max_column = round_ties_down(depth, end_slope)
+
+                for quadrant_column in range(min_column, max_column + 1):
+                    tile = (depth, quadrant_column)
+
+                    if is_wall(tile) or is_symmetric(depth, quadrant_column, start_slope, end_slope):
+                        if (depth * depth) + (quadrant_column * quadrant_column) <= radius_squared:
+                            tile_row, tile_column = transform(*tile)
+                            if 0 <= tile_row < max_rows and 0 <= tile_column < max_columns:
+                                visible[tile_row, tile_column] = True
+
+                    if is_wall(previous_tile) and is_floor(tile):
+                        start_slope = get_slope(tile)
+
+                    if is_floor(previous_tile) and is_wall(tile):
+                        rows.append((depth + 1, start_slope, get_slope(tile)))
+
+                    previous_tile = tile
+
+                if is_floor(previous_tile):
+                    rows.append((depth + 1, start_slope, end_slope))
+
+        return visible.ravel()
+
+
+def get_slope(tile):
+    """
+    The slope of the left edge of the tile, relative to the origin
+    :param tile: (depth, column)
+    :return: (numerator, denominator)
+    """
+    depth, column = tile
+    return (2 * column) - 1, 2 * depth
+
+
+def round_ties_up(depth, slope):
+    """
+    floor((depth * slope) + 0.5)
+    """
+    numerator, denominator = slope
+    return ((2 * depth * numerator) + denominator) // (2 * denominator)
+
+
+def round_ties_down(depth, slope):
+    """
+    ceil((depth * slope) - 0.5)
+    """
+    numerator, denominator = slope
+    return -((denominator - (2 * depth * numerator)) // (2 * denominator))
+
+
+def is_symmetric(depth, column, start_slope, end_slope):
+    """
+    Is the center of the tile within the start and end slopes, ensuring that if a can see b then b can see a
+    """
+    return (column * start_slope[1]) >= (depth * start_slope[0]) and \
+        (column * end_slope[1]) <= (depth * end_slope[0])
@@ -11,6 +11,7 @@ from consts import Keys
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 TILE_SIZE = 25
+UPDATE_RATE = 1 / 20
 
 COLOUR_MAP = {
     Colour.BLACK.value: arcade.color.BLACK,
@@ -59,7 +60,7 @@ class MyGame(arcade.Window):
     def __init__(self, width, height):
         self.debug = False
         super().__init__(width, height)
-        self.set_update_rate(1 / 20)
+        self.set_update_rate(UPDATE_RATE)
         
         arcade.set_background_color(arcade.color.BLACK)
         
@@ -76,7 +77,9 @@ class MyGame(arcade.Window):
         :return:
         """
         # Create your sprites and sprite lists here
-        self.game: Game = Game(SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE, 1, grid_layers = 4)
+        self.game: Game = Game(
+            SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE, 1, grid_layers = 4, frame_budget = UPDATE_RATE / 2
+        )
         self.game.game_message = "Lead the Rabbit home"
 
         # show the menu so that we see the instructions
@@ -252,20 +255,13 @@ class MyGame(arcade.Window):
             anchor_y = "top",
         )
         
-        items = game.items.copy()
-        for item in items:
-            item.think(0)
+        # thinking is left to `Game.update_game`
+        for item in game.items:
             self.draw_entity(item)
         
-        del items
-        
-        npcs = game.npcs.copy()
-        for npc in npcs:
-            npc.think(0)
+        for npc in game.npcs:
             self.draw_entity(npc)
         
-        del npcs
-        
         self.draw_entity(game.player)
 
         # draw menus last so they appear on top of things
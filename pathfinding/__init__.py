@@ -1 +1,2 @@
 from .astar import astar
+from .quadtree_astar import quadtree_astar
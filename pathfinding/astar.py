@@ -1,6 +1,7 @@
 # Credit for this: Nicholas Swift
 # as found at https://medium.com/@nicholas.w.swift/easy-a-star-pathfinding-7e6689c7f7b2
 from warnings import warn
+from consts.direction import NEIGHBOUR_OFFSETS
 
 
 class Node:
@@ -29,13 +30,17 @@ def return_path(current_node):
     return path[::-1]  # Return reversed path
 
 
-def astar(maze, start, end, allow_diagonal_movement = False):
+def astar(maze, start, end, allow_diagonal_movement = False, neighbour_masks = None, max_iterations = None):
     """
     Returns a list of tuples as a path from the given start to the given end in the given maze
     :param maze:
     :param start:
     :param end:
     :param allow_diagonal_movement: do we allow diagonal steps in our path
+    :param neighbour_masks: (optional) for each position in the maze a bitmask of which of the `NEIGHBOUR_OFFSETS`
+    are walkable, as from `Grid.get_neighbour_masks`. If given the maze is only used for its size
+    :param max_iterations: (optional) how many nodes to look at before giving up and returning the path so far,
+    defaults to a quarter of the area of the maze
     :return:
     """
 
@@ -54,12 +59,13 @@ def astar(maze, start, end, allow_diagonal_movement = False):
     
     # Adding a stop condition
     outer_iterations = 0
-    max_iterations = (len(maze) // 2) ** 2
+    if max_iterations is None:
+        max_iterations = (len(maze) // 2) ** 2
 
     # what squares do we search
-    adjacent_squares = ((0, -1), (0, 1), (-1, 0), (1, 0),)
+    adjacent_squares = NEIGHBOUR_OFFSETS[:4]
     if allow_diagonal_movement:
-        adjacent_squares = ((0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1),)
+        adjacent_squares = NEIGHBOUR_OFFSETS
 
     # Loop until you find the end
     while len(open_list) > 0:
@@ -90,31 +96,39 @@ def astar(maze, start, end, allow_diagonal_movement = False):
         # Generate children
         children = []
         
-        for new_position in adjacent_squares:  # Adjacent squares
-
-            # Get node position
-            node_position = (current_node.position[0] + new_position[0], current_node.position[1] + new_position[1])
-
-            # Make sure within range
-            within_range_criteria = [
-                node_position[0] > (len(maze) - 1),
-                node_position[0] < 0,
-                node_position[1] > (len(maze[len(maze) - 1]) - 1),
-                node_position[1] < 0,
-            ]
+        if neighbour_masks is not None:
+            # the bounds and walkable checks have already been done for us
+            neighbour_mask = neighbour_masks[current_node.position[0], current_node.position[1]]
+            for bit, new_position in enumerate(adjacent_squares):
+                if neighbour_mask & (1 << bit):
+                    node_position = (current_node.position[0] + new_position[0], current_node.position[1] + new_position[1])
+                    children.append(Node(current_node, node_position))
+        else:
+            for new_position in adjacent_squares:  # Adjacent squares
+
+                # Get node position
+                node_position = (current_node.position[0] + new_position[0], current_node.position[1] + new_position[1])
+
+                # Make sure within range
+                within_range_criteria = [
+                    node_position[0] > (len(maze) - 1),
+                    node_position[0] < 0,
+                    node_position[1] > (len(maze[len(maze) - 1]) - 1),
+                    node_position[1] < 0,
+                ]
             
-            if any(within_range_criteria):
-                continue
+                if any(within_range_criteria):
+                    continue
 
-            # Make sure walkable terrain
-            if maze[node_position[0]][node_position[1]] != 0:
-                continue
+                # Make sure walkable terrain
+                if maze[node_position[0]][node_position[1]] != 0:
+                    continue
 
-            # Create new node
-            new_node = Node(current_node, node_position)
+                # Create new node
+                new_node = Node(current_node, node_position)
 
-            # Append
-            children.append(new_node)
+                # Append
+                children.append(new_node)
 
         # Loop through children
         for child in children:
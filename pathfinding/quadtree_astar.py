@@ -0,0 +1,182 @@
+import heapq
+from warnings import warn
+
+
+def get_rectangle(tree, position):
+    """
+    Get the leaf of the tree containing the position, clipped to the grid
+    :param tree: QuadTreeLayer
+    :param position: (row, column)
+    :return: (top, left, bottom, right, value)
+    """
+    node = tree.get_leaf(position[0], position[1])
+    return (
+        node.top, node.left,
+        min(node.top + node.size, tree.max_rows), min(node.left + node.size, tree.max_columns),
+        node.value
+    )
+
+
+def get_neighbours(tree, rectangle, position):
+    """
+    Get the walkable leaves next to a leaf, and where we'd cross into each of them from the position
+    :param tree: QuadTreeLayer
+    :param rectangle: (top, left, bottom, right, value) of the leaf
+    :param position: (row, column) where we are in the leaf
+    :return: List of (neighbour rectangle, exit position in our leaf, entry position in the neighbour)
+    """
+    top, left, bottom, right, _ = rectangle
+    row, column = position
+    result = []
+
+    # the strips of tiles just outside each edge of the leaf, and if they're above or below it
+    strips = [
+        (top - 1, left, top, right, True),
+        (bottom, left, bottom + 1, right, True),
+        (top, left - 1, bottom, left, False),
+        (top, right, bottom, right + 1, False),
+    ]
+
+    for strip_top, strip_left, strip_bottom, strip_right, is_vertical in strips:
+        for neighbour in tree.query_region(strip_top, strip_left, strip_bottom, strip_right):
+            if neighbour[4] != 0:
+                continue
+
+            neighbour_top, neighbour_left, neighbour_bottom, neighbour_right, _ = neighbour
+
+            if is_vertical:
+                # crossing a top or bottom edge, pick the column along the edge nearest to us
+                crossing_column = min(max(column, neighbour_left), neighbour_right - 1)
+                exit_position = (top if strip_top < top else bottom - 1, crossing_column)
+                entry_position = (strip_top, crossing_column)
+            else:
+                crossing_row = min(max(row, neighbour_top), neighbour_bottom - 1)
+                exit_position = (crossing_row, left if strip_left < left else right - 1)
+                entry_position = (crossing_row, strip_left)
+
+            # the neighbour's full rectangle rather than just the part within the strip
+            result.append((get_rectangle(tree, entry_position), exit_position, entry_position))
+
+    return result
+
+
+def get_manhattan_distance(start, end):
+    return abs(start[0] - end[0]) + abs(start[1] - end[1])
+
+
+def get_steps_within(start, end):
+    """
+    Get the steps from start to end within a leaf, as every tile in a leaf is walkable we can go along the
+    rows then along the columns
+    :param start: (row, column)
+    :param end: (row, column)
+    :return: List of (row, column) not including start
+    """
+    result = []
+    row, column = start
+    row_step = 1 if end[0] > row else -1
+    column_step = 1 if end[1] > column else -1
+
+    while row != end[0]:
+        row += row_step
+        result.append((row, column))
+
+    while column != end[1]:
+        column += column_step
+        result.append((row, column))
+
+    return result
+
+
+def quadtree_astar(tree, start, end, max_iterations = None):
+    """
+    Returns a list of tuples as a path from the given start to the given end, searching over the leaves of a
+    quadtree rather than every tile. Each leaf of walkable tiles, however large, is a single step in the search
+    so the cost scales with how complex the map is rather than how large it is. The path is then expanded back out
+    to every tile along the way, moving only in the 4 directions.
+    The path is not always the shortest, as it crosses each leaf between the points nearest to where it entered.
+    :param tree: QuadTreeLayer where 0 is a walkable tile
+    :param start: (row, column)
+    :param end: (row, column)
+    :param max_iterations: (optional) how many leaves to look at before giving up and returning the path to the
+    leaf we were looking at, which won't contain the destination
+    :return: List of (row, column) or None if there is no path
+    """
+    start = (int(start[0]), int(start[1]))
+    end = (int(end[0]), int(end[1]))
+
+    end_rectangle = get_rectangle(tree, end)
+    if end_rectangle[4] != 0:
+        return None
+
+    start_rectangle = get_rectangle(tree, start)
+
+    # for each leaf reached, keyed by its top left, the position we entered it, the cost to get there and
+    # the leaf and exit position we came from
+    entries = {start_rectangle[:2]: (start, 0, None, None)}
+    closed = set()
+
+    # (estimated total cost, cost so far, order added, rectangle)
+    order = 0
+    open_heap = [(get_manhattan_distance(start, end), 0, order, start_rectangle)]
+
+    while open_heap:
+        _, cost, _, rectangle = heapq.heappop(open_heap)
+        key = rectangle[:2]
+
+        if key in closed:
+            continue
+        closed.add(key)
+
+        position = entries[key][0]
+
+        if key == end_rectangle[:2]:
+            return expand_path(entries, key, end)
+
+        if max_iterations is not None and len(closed) > max_iterations:
+            warn("giving up on pathfinding too many iterations")
+            return expand_path(entries, key, position)
+
+        for neighbour, exit_position, entry_position in get_neighbours(tree, rectangle, position):
+            neighbour_key = neighbour[:2]
+            if neighbour_key in closed:
+                continue
+
+            neighbour_cost = cost + get_manhattan_distance(position, exit_position) + 1
+            existing = entries.get(neighbour_key)
+
+            if existing is not None and existing[1] <= neighbour_cost:
+                continue
+
+            entries[neighbour_key] = (entry_position, neighbour_cost, key, exit_position)
+            order += 1
+            heapq.heappush(open_heap, (
+                neighbour_cost + get_manhattan_distance(entry_position, end), neighbour_cost, order, neighbour
+            ))
+
+    return None
+
+
+def expand_path(entries, key, end):
+    """
+    Expand the leaves we went through into every tile along the way
+    :param entries: see `quadtree_astar`
+    :param key: the top left of the leaf containing the end
+    :param end: (row, column)
+    :return: List of (row, column)
+    """
+    # work backwards through the leaves collecting the steps within each of them
+    sections = []
+    target = end
+
+    while key is not None:
+        entry_position, _, previous_key, previous_exit = entries[key]
+        sections.append([entry_position] + get_steps_within(entry_position, target))
+        key = previous_key
+        target = previous_exit
+
+    path = []
+    for section in reversed(sections):
+        path.extend(section)
+
+    return path
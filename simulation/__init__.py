@@ -0,0 +1,3 @@
+from .think_scheduler import ThinkScheduler
+from .ai_lod import AiLod, LodTier, DEFAULT_LOD_TIERS
+from .load_governor import LoadGovernor, SheddingStep
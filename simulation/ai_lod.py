@@ -0,0 +1,184 @@
+import math
+import numpy as np
+from entity import Entity, MovableEntity, ScoutingEntity
+
+
+class LodTier:
+    """
+    How much an npc does once it's at least `distance` cells from the focus, such as the player
+    """
+
+    def __init__(self, distance, tick_rate_scale = 1.0, search_range_scale = 1.0, max_path_iterations = None):
+        """
+        :param distance: in cells, from which this tier applies
+        :param tick_rate_scale: stretches the npc's tick rate, so larger means thinking less often
+        :param search_range_scale: multiplies the tile range a `ScoutingEntity` searches
+        :param max_path_iterations: (optional) cap how hard the npc looks for a path, None for the grid's default
+        """
+        self.distance = distance
+        self.tick_rate_scale = tick_rate_scale
+        self.search_range_scale = search_range_scale
+        self.max_path_iterations = max_path_iterations
+
+    def __repr__(self):
+        return f"LodTier({self.distance}, {self.tick_rate_scale}, {self.search_range_scale}, " \
+               f"{self.max_path_iterations})"
+
+
+DEFAULT_LOD_TIERS = [
+    LodTier(0),
+    LodTier(20, tick_rate_scale = 2, search_range_scale = 0.5, max_path_iterations = 200),
+    LodTier(40, tick_rate_scale = 4, search_range_scale = 0, max_path_iterations = 50),
+]
+
+
+class AiLod:
+    """
+    Level of detail for npcs, the further they are from the focus the less often they think, the less far they
+    scout and the less hard they look for a path.
+    An npc only moves to a further tier once it's `hysteresis` cells past where the tier starts, and back to a nearer
+    tier once it's `hysteresis` cells inside it, so one moving back and forth over a boundary doesn't flip between them.
+    A tier stretches the npc's tick rate with its `tick_rate_scale` rather than changing its `tick_rate`, so changes to
+    the tick rate from elsewhere are kept.
+    """
+
+    def __init__(self, tiers = None, hysteresis = 2, use_path_distance = False):
+        """
+        :param tiers: (optional) List of LodTier ordered by distance, the first should be at 0,
+        defaults to `DEFAULT_LOD_TIERS`
+        :param hysteresis: in cells
+        :param use_path_distance: measure distance by walking the grid rather than in a straight line
+        """
+        self.tiers = DEFAULT_LOD_TIERS if tiers is None else sorted(tiers, key = lambda tier: tier.distance)
+        self.hysteresis = hysteresis
+        self.use_path_distance = use_path_distance
+
+        # entity_id to [tier index, base search tile range]
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.entries
+
+    def add(self, entity: MovableEntity):
+        """
+        Start managing the level of detail of an npc, what it has now is what it has at the nearest tier
+        :param entity:
+        :return:
+        """
+        search_tile_range = entity.search_tile_range if isinstance(entity, ScoutingEntity) else None
+        self.entries[entity.id] = [None, search_tile_range]
+
+    def remove(self, entity_id):
+        """
+        Stop managing an npc, it's put back to the nearest tier
+        :param entity_id:
+        :return:
+        """
+        entry = self.entries.get(entity_id)
+        entity = Entity.all.get(entity_id)
+
+        if entry is not None and entity is not None:
+            self.apply_tier(entity, entry, 0)
+
+        self.entries.pop(entity_id, None)
+
+    def get_tier_index(self, current, distance):
+        """
+        :param current: the tier index the npc is in, or None if it doesn't have one yet
+        :param distance: in cells
+        :return: the tier index the npc should be in
+        """
+        tiers = self.tiers
+
+        if current is None:
+            tier_index = 0
+            while tier_index + 1 < len(tiers) and distance >= tiers[tier_index + 1].distance:
+                tier_index += 1
+            return tier_index
+
+        tier_index = current
+        while tier_index + 1 < len(tiers) and distance >= tiers[tier_index + 1].distance + self.hysteresis:
+            tier_index += 1
+        while tier_index > 0 and distance < tiers[tier_index].distance - self.hysteresis:
+            tier_index -= 1
+
+        return tier_index
+
+    def get_distances(self, focus_x, focus_y, entities):
+        """
+        :param focus_x:
+        :param focus_y:
+        :param entities: List of Entity
+        :return: numpy array of the distance in cells of each entity from the focus
+        """
+        grid = Entity.grid
+
+        # there are only ever a few npcs, so this is quicker without building arrays of their positions
+        if not self.use_path_distance:
+            return np.array([math.hypot(entity.x - focus_x, entity.y - focus_y) for entity in entities]) / grid.tile_size
+
+        x = np.array([entity.x for entity in entities])
+        y = np.array([entity.y for entity in entities])
+
+        # the grid keeps the walking distances until the focus changes cell or the walls change
+        focus_row, focus_column = grid.get_column_row_for_pixels(focus_x, focus_y)
+        rows, columns = grid.get_rows_columns_for_pixels(x, y)
+        indexes = (np.asarray(rows, dtype = int) * grid.max_columns) + np.asarray(columns, dtype = int)
+
+        return grid.get_path_distances(focus_row, focus_column)[indexes]
+
+    def update(self, focus_x, focus_y):
+        """
+        Move npcs between tiers for how far they are from the focus
+        :param focus_x: pixel position of the focus, such as the player
+        :param focus_y:
+        :return: dict of entity_id to the tier index for those that changed tier
+        """
+        entities = [Entity.all.get(entity_id) for entity_id in self.entries]
+        entities = [entity for entity in entities if entity is not None]
+
+        if not entities:
+            return {}
+
+        changed = {}
+
+        for entity, distance in zip(entities, self.get_distances(focus_x, focus_y, entities).tolist()):
+            entry = self.entries[entity.id]
+            tier_index = self.get_tier_index(entry[0], distance)
+
+            if tier_index != entry[0]:
+                self.apply_tier(entity, entry, tier_index)
+                changed[entity.id] = tier_index
+
+        return changed
+
+    def apply_tier(self, entity: MovableEntity, entry, tier_index):
+        """
+        :param entity:
+        :param entry: the entry of the entity in `entries`
+        :param tier_index:
+        :return:
+        """
+        tier = self.tiers[tier_index]
+        entry[0] = tier_index
+
+        entity.set_tick_rate_scale(tier.tick_rate_scale)
+        entity.max_path_iterations = tier.max_path_iterations
+
+        if entry[1] is not None:
+            entity.search_tile_range = int(round(entry[1] * tier.search_range_scale))
+            entity.search_distance = Entity.grid.tile_size * entity.search_tile_range
+
+    def get_tier_counts(self):
+        """
+        :return: List of how many npcs are in each tier
+        """
+        counts = [0] * len(self.tiers)
+        for entry in self.entries.values():
+            if entry[0] is not None:
+                counts[entry[0]] += 1
+
+        return counts
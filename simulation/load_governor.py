@@ -0,0 +1,181 @@
+import time
+from collections import deque
+
+
+class SheddingStep:
+    """
+    Something the governor can stop doing, or do less of, when frames are over budget
+    """
+
+    def __init__(self, name, shed, restore):
+        """
+        :param name:
+        :param shed: function called with no arguments to start shedding
+        :param restore: function called with no arguments to go back to normal
+        """
+        self.name = name
+        self.shed = shed
+        self.restore = restore
+        self.is_active = False
+        self.started = None
+        self.times_shed = 0
+        self.frames_shed = 0
+        self.seconds_shed = 0.0
+
+    def __repr__(self):
+        return f"SheddingStep({self.name!r}, is_active={self.is_active})"
+
+
+class LoadGovernor:
+    """
+    Keep the time spent simulating each frame within a budget. When the smoothed frame time goes over the budget
+    the next step is shed, in the order they were added, waiting `cooldown_frames` between steps to see what
+    difference it made. When there's been headroom for `restore_frames` frames in a row the last step shed is
+    restored.
+    """
+
+    def __init__(self, budget = 1 / 40, smoothing = 0.2, restore_ratio = 0.6, cooldown_frames = 10,
+                 restore_frames = 30, history_size = 100):
+        """
+        :param budget: seconds of simulation per frame
+        :param smoothing: how much each frame counts towards the smoothed frame time, between 0 and 1
+        :param restore_ratio: the smoothed frame time has to be under this fraction of the budget to restore
+        :param cooldown_frames: frames to wait after shedding or restoring before doing so again
+        :param restore_frames: frames in a row with headroom before restoring
+        :param history_size: how many of the latest sheds and restores to keep in `history`
+        """
+        self.budget = budget
+        self.smoothing = smoothing
+        self.restore_ratio = restore_ratio
+        self.cooldown_frames = cooldown_frames
+        self.restore_frames = restore_frames
+
+        self.steps = []
+        self.frame_time = None
+        self.frame_count = 0
+        self.frames_with_headroom = 0
+        self.last_change_frame = -cooldown_frames
+        # (step name, "shed" or "restore", frame, smoothed frame time)
+        self.history = deque(maxlen = history_size)
+
+    def add_step(self, name, shed, restore):
+        """
+        Add something to shed, after those already added
+        :param name:
+        :param shed: function called with no arguments to start shedding
+        :param restore: function called with no arguments to go back to normal
+        :return: SheddingStep
+        """
+        step = SheddingStep(name, shed, restore)
+        self.steps.append(step)
+        return step
+
+    def get_active_steps(self):
+        """
+        :return: List of the SheddingStep being shed, in the order they were shed
+        """
+        return [step for step in self.steps if step.is_active]
+
+    def record_frame(self, seconds):
+        """
+        Record how long a frame took to simulate, and shed or restore if needed
+        :param seconds:
+        :return: the SheddingStep shed or restored this frame, or None
+        """
+        self.frame_count += 1
+
+        if self.frame_time is None:
+            self.frame_time = seconds
+        else:
+            self.frame_time += (seconds - self.frame_time) * self.smoothing
+
+        for step in self.steps:
+            if step.is_active:
+                step.frames_shed += 1
+
+        if self.frame_time > self.budget:
+            self.frames_with_headroom = 0
+        elif self.frame_time < self.budget * self.restore_ratio:
+            self.frames_with_headroom += 1
+        else:
+            self.frames_with_headroom = 0
+
+        if self.frame_count - self.last_change_frame < self.cooldown_frames:
+            return None
+
+        if self.frame_time > self.budget:
+            return self.shed_next()
+
+        if self.frames_with_headroom >= self.restore_frames:
+            return self.restore_last()
+
+        return None
+
+    def shed_next(self):
+        """
+        Shed the next step that isn't already shed
+        :return: SheddingStep or None if everything is already shed
+        """
+        for step in self.steps:
+            if not step.is_active:
+                step.shed()
+                step.is_active = True
+                step.started = time.perf_counter()
+                step.times_shed += 1
+                self.record_change(step, "shed")
+                return step
+
+        return None
+
+    def restore_last(self):
+        """
+        Restore the last step that was shed
+        :return: SheddingStep or None if nothing is shed
+        """
+        for step in reversed(self.steps):
+            if step.is_active:
+                step.restore()
+                step.is_active = False
+                step.seconds_shed += time.perf_counter() - step.started
+                step.started = None
+                self.frames_with_headroom = 0
+                self.record_change(step, "restore")
+                return step
+
+        return None
+
+    def restore_all(self):
+        """
+        Go back to normal, such as when the level changes
+        :return:
+        """
+        while self.restore_last() is not None:
+            pass
+
+    def record_change(self, step, change):
+        """
+        Start the cooldown and add the change to `history`, dropping the oldest when it's full
+        :param step: SheddingStep
+        :param change: "shed" or "restore"
+        :return:
+        """
+        self.last_change_frame = self.frame_count
+        self.history.append((step.name, change, self.frame_count, self.frame_time))
+
+    def get_report(self):
+        """
+        What has been shed and for how long
+        :return: List of dict, one for each step
+        """
+        now = time.perf_counter()
+
+        return [
+            {
+                "name": step.name,
+                "is_active": step.is_active,
+                "times_shed": step.times_shed,
+                "frames_shed": step.frames_shed,
+                "seconds_shed": step.seconds_shed + (now - step.started if step.is_active else 0),
+            }
+            for step in self.steps
+        ]
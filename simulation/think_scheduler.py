@@ -0,0 +1,215 @@
+import heapq
+from itertools import count
+
+# time is a running total of the frame times, so rounding can make an entity look due a frame before it would be by
+# adding up the frame times since it last thought
+TIME_EPSILON = 1e-9
+
+
+class ThinkScheduler:
+    """
+    Decide which entities are due to think, rather than every entity accumulating its own `last_tick` every frame.
+    Entities are kept in a heap by the time they're next due, so each frame only looks at those that are due.
+    An entity is due once more than its `tick_rate` has passed since it last thought, the same as `Entity.can_think`,
+    and thinks on the first frame after it's added.
+
+    Changing an entity's tick rate with `reschedule` or removing it leaves its old heap entry behind, which is skipped
+    when it comes up.
+
+    Each entity returned by `advance` can think once, see `take_due`, so for the entities we schedule we're the only
+    way to think.
+
+    Entities with nothing to do can be put to `sleep`, which takes them out of the heap until something calls `wake`,
+    so the cost of a frame is down to the entities that are awake.
+
+    A group's tick rates can be stretched with `set_group_tick_rate_scale`, such as when the game is over budget,
+    which takes effect from the next time each of its entities thinks.
+    """
+
+    def __init__(self):
+        self.time = 0
+        # (due, group, order, entity_id, version)
+        self.heap = []
+        # entity_id to [tick_rate, last_think, version, group, order, is_asleep]
+        self.entries = {}
+        self.awake_count = 0
+        # group to how much the tick rates of its entities are stretched by
+        self.group_tick_rate_scales = {}
+        self.orders = count()
+        self.versions = count()
+        # the ids from the last `advance` that haven't thought yet
+        self.due_ids = set()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.entries
+
+    def push(self, entity_id, due):
+        """
+        Put an entity in the heap, any entry it already has there is now out of date
+        :param entity_id:
+        :param due:
+        :return:
+        """
+        entry = self.entries[entity_id]
+        entry[2] = next(self.versions)
+        heapq.heappush(self.heap, (due, entry[3], entry[4], entity_id, entry[2]))
+
+    def get_tick_rate(self, entity_id):
+        """
+        :param entity_id:
+        :return: the tick rate of the entity stretched by the scale of its group
+        """
+        entry = self.entries[entity_id]
+        return entry[0] * self.group_tick_rate_scales.get(entry[3], 1)
+
+    def set_group_tick_rate_scale(self, group, scale):
+        """
+        Stretch the tick rates of every entity in a group, each is due at its new rate after it next thinks
+        :param group:
+        :param scale: 1 for their own tick rate
+        :return:
+        """
+        if scale == 1:
+            self.group_tick_rate_scales.pop(group, None)
+        else:
+            self.group_tick_rate_scales[group] = scale
+
+    def add(self, entity_id, tick_rate, group = 0, is_asleep = False):
+        """
+        Add an entity, it's due straight away unless it's asleep
+        :param entity_id:
+        :param tick_rate:
+        :param group: entities due in the same frame think in order of group, then in the order they were added
+        :param is_asleep: add it asleep, it won't think until it's woken
+        :return:
+        """
+        self.remove(entity_id)
+        self.entries[entity_id] = [tick_rate, None, None, group, next(self.orders), True]
+
+        if not is_asleep:
+            self.wake(entity_id)
+
+    def remove(self, entity_id):
+        """
+        Stop scheduling an entity
+        :param entity_id:
+        :return:
+        """
+        entry = self.entries.pop(entity_id, None)
+
+        if entry is not None and not entry[5]:
+            self.awake_count -= 1
+
+    def is_asleep(self, entity_id):
+        """
+        :param entity_id:
+        :return: bool
+        """
+        entry = self.entries.get(entity_id)
+        return entry is not None and entry[5]
+
+    def sleep(self, entity_id):
+        """
+        Take an entity out of the heap, it won't think until it's woken
+        :param entity_id:
+        :return:
+        """
+        entry = self.entries.get(entity_id)
+        if entry is None or entry[5]:
+            return
+
+        entry[5] = True
+        # anything left in the heap for it is now out of date
+        entry[2] = next(self.versions)
+        self.awake_count -= 1
+
+    def wake(self, entity_id):
+        """
+        Wake a sleeping entity, it's due straight away and thinks in the next `advance`
+        :param entity_id:
+        :return: bool - was it asleep
+        """
+        entry = self.entries.get(entity_id)
+        if entry is None or not entry[5]:
+            return False
+
+        entry[5] = False
+        entry[1] = None
+        self.awake_count += 1
+        self.push(entity_id, -float("inf"))
+
+        return True
+
+    def reschedule(self, entity_id, tick_rate):
+        """
+        Change the tick rate of an entity, it's next due its new tick rate after it last thought
+        :param entity_id:
+        :param tick_rate:
+        :return:
+        """
+        entry = self.entries.get(entity_id)
+        if entry is None:
+            return
+
+        entry[0] = tick_rate
+
+        # if it hasn't thought yet it's still due straight away, if it's asleep it's due when it wakes
+        if entry[1] is not None and not entry[5]:
+            self.push(entity_id, entry[1] + self.get_tick_rate(entity_id))
+
+    def get_due_time(self, entity_id):
+        """
+        :param entity_id:
+        :return: when the entity is next due, or None if it isn't scheduled or is asleep
+        """
+        entry = self.entries.get(entity_id)
+        if entry is None or entry[5]:
+            return None
+
+        return -float("inf") if entry[1] is None else entry[1] + self.get_tick_rate(entity_id)
+
+    def advance(self, delta_time):
+        """
+        Move time on and get the entities that are due to think, they're scheduled again from now
+        :param delta_time:
+        :return: List of entity ids in the order they should think
+        """
+        previous_time = self.time
+        self.time += delta_time
+
+        due = []
+        heap = self.heap
+        entries = self.entries
+
+        while heap and heap[0][0] < self.time - TIME_EPSILON:
+            due_time, group, order, entity_id, version = heapq.heappop(heap)
+            entry = entries.get(entity_id)
+
+            if entry is None or entry[2] != version:
+                continue
+
+            # like `Entity.can_think` the first frame's time counts towards the next think
+            entry[1] = previous_time if entry[1] is None else self.time
+            due.append((group, order, entity_id))
+
+        for _, _, entity_id in due:
+            self.push(entity_id, entries[entity_id][1] + self.get_tick_rate(entity_id))
+
+        due.sort()
+        self.due_ids = {entity_id for _, _, entity_id in due}
+        return [entity_id for _, _, entity_id in due]
+
+    def take_due(self, entity_id):
+        """
+        Let an entity think if it was due in the last `advance` and hasn't already, so it only thinks once
+        :param entity_id:
+        :return: bool - can it think
+        """
+        if entity_id not in self.due_ids:
+            return False
+
+        self.due_ids.discard(entity_id)
+        return True
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from entity import Entity
+from grid import Grid
+
+
+@pytest.fixture
+def grid():
+    """
+    A small grid for entities to live on, the state every entity shares is put back afterwards
+    """
+    shared = Entity.grid, Entity.collision_world, Entity.collision_matrix, Entity.scheduler
+    Entity.grid = Grid(10, 10, 25, 3)
+
+    yield Entity.grid
+
+    Entity.grid, Entity.collision_world, Entity.collision_matrix, Entity.scheduler = shared
+
+
+@pytest.fixture
+def make_walled_grid():
+    """
+    :return: function of (seed, size, density) that makes a square grid with solid tiles scattered over it
+    """
+    def make_walled_grid(seed, size = 16, density = 0.3):
+        random = np.random.default_rng(seed)
+        walled_grid = Grid(size, size, 25, 3)
+
+        for row, column in np.argwhere(random.random((size, size)) < density).tolist():
+            x, y = walled_grid.get_pixel_center(row, column)
+            walled_grid[(x, y, 0)] = 1000 + (row * size) + column
+
+        return walled_grid
+
+    return make_walled_grid
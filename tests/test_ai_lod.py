@@ -0,0 +1,87 @@
+import pytest
+from consts.colour import Colour
+from entity import Entity, ScoutingEntity
+from simulation import AiLod, LodTier, ThinkScheduler
+
+
+TIERS = [
+    LodTier(0),
+    LodTier(4, tick_rate_scale = 2, search_range_scale = 0.5, max_path_iterations = 20),
+    LodTier(8, tick_rate_scale = 4, search_range_scale = 0, max_path_iterations = 5),
+]
+
+
+def make_scout(grid, row, column):
+    # out of layer 0 so it isn't in the way of walking
+    return ScoutingEntity(
+        *grid.get_pixel_center(row, column), 20, 20, Colour.BLUE, tick_rate = 5, grid_layer = 1, search_tile_range = 4
+    )
+
+
+def move_to(scout, grid, row, column):
+    scout.x, scout.y = grid.get_pixel_center(row, column)
+
+
+def test_tiers_stretch_the_tick_rate_with_a_scale(grid):
+    scheduler = Entity.scheduler = ThinkScheduler()
+    scout = make_scout(grid, 0, 0)
+    scheduler.add(scout.id, scout.get_tick_rate())
+    lod = AiLod(TIERS, hysteresis = 1)
+    lod.add(scout)
+    focus = grid.get_pixel_center(0, 0)
+
+    assert lod.update(*focus) == {scout.id: 0}
+
+    move_to(scout, grid, 0, 5)
+    assert lod.update(*focus) == {scout.id: 1}
+    assert scout.tick_rate == 5
+    assert scout.get_tick_rate() == 10
+    assert scheduler.get_tick_rate(scout.id) == 10
+    assert scout.search_tile_range == 2
+    assert scout.search_distance == grid.tile_size * 2
+    assert scout.max_path_iterations == 20
+
+    # a tick rate changed elsewhere is kept under the scale
+    scout.set_tick_rate(3)
+    assert scout.get_tick_rate() == 6
+
+    lod.remove(scout.id)
+    assert scout.get_tick_rate() == 3
+    assert scout.search_tile_range == 4
+    assert scout.max_path_iterations is None
+
+
+def test_hysteresis(grid):
+    scout = make_scout(grid, 0, 0)
+    lod = AiLod(TIERS, hysteresis = 1)
+    lod.add(scout)
+    focus = grid.get_pixel_center(0, 0)
+    lod.update(*focus)
+
+    # only moves out once past the boundary by the hysteresis
+    move_to(scout, grid, 0, 4)
+    assert lod.update(*focus) == {}
+    move_to(scout, grid, 0, 5)
+    assert lod.update(*focus) == {scout.id: 1}
+
+    # and back once inside it by the hysteresis
+    move_to(scout, grid, 0, 3)
+    assert lod.update(*focus) == {}
+    move_to(scout, grid, 0, 2)
+    assert lod.update(*focus) == {scout.id: 0}
+    assert lod.get_tier_counts() == [1, 0, 0]
+
+
+def test_straight_line_and_path_distances(grid):
+    # a wall between the focus and the scout, with a gap at the bottom
+    for row in range(9):
+        grid[(*grid.get_pixel_center(row, 2), 0)] = 1000 + row
+
+    scout = make_scout(grid, 0, 4)
+    focus = grid.get_pixel_center(0, 0)
+
+    assert AiLod(TIERS).get_distances(*focus, [scout]).tolist() == [4]
+    assert AiLod(TIERS, use_path_distance = True).get_distances(*focus, [scout]).tolist() == [22]
+
+    x, y = grid.get_pixel_center(3, 0)
+    assert AiLod(TIERS).get_distances(x, y, [scout]).tolist() == pytest.approx([5])
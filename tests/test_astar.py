@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from pathfinding import astar
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("allow_diagonal_movement", [False, True])
+def test_neighbour_masks_find_the_same_path(make_walled_grid, seed, allow_diagonal_movement):
+    walled_grid = make_walled_grid(seed, size = 12)
+    maze = walled_grid.grid_for_pathing()
+    neighbour_masks = walled_grid.get_neighbour_masks()
+
+    walkable = np.argwhere(maze == 0).tolist()
+    random = np.random.default_rng(seed)
+
+    for start, end in random.choice(walkable, size = (8, 2)).tolist():
+        without_masks = astar(maze, tuple(start), tuple(end), allow_diagonal_movement, max_iterations = 1000)
+        with_masks = astar(
+            maze, tuple(start), tuple(end), allow_diagonal_movement,
+            neighbour_masks = neighbour_masks, max_iterations = 1000
+        )
+
+        assert with_masks == without_masks
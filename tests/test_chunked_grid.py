@@ -0,0 +1,89 @@
+import gc
+import os
+import shutil
+import numpy as np
+import pytest
+from grid import Grid, ChunkedGrid
+
+
+@pytest.fixture
+def grids():
+    dense = Grid(70, 50, 25, 3)
+    chunked = ChunkedGrid(70, 50, 25, 3, chunk_size = 16, max_resident_chunks = 2)
+    random = np.random.default_rng(0)
+
+    for value in range(1, 300):
+        row, column, layer = random.integers(50), random.integers(70), random.integers(3)
+        for grid in (dense, chunked):
+            x, y = grid.get_pixel_center(row, column)
+            grid[(x, y, layer)] = value
+
+    yield dense, chunked
+
+    chunked.close()
+
+
+def test_same_as_dense(grids):
+    dense, chunked = grids
+    indexes = np.random.default_rng(1).integers(70 * 50, size = 500)
+
+    np.testing.assert_array_equal(dense.get_cell_data(indexes), chunked.get_cell_data(indexes))
+    np.testing.assert_array_equal(dense.get_cell_data(indexes, [2, 0]), chunked.get_cell_data(indexes, [2, 0]))
+    np.testing.assert_array_equal(dense.get_walkable(), chunked.get_walkable())
+    np.testing.assert_array_equal(dense.get_neighbour_masks(), chunked.get_neighbour_masks())
+    np.testing.assert_array_equal(dense.get_path_distances(3, 4), chunked.get_path_distances(3, 4))
+
+    for dense_field, chunked_field in zip(dense.get_fields(20, 30), chunked.get_fields(20, 30)):
+        np.testing.assert_allclose(dense_field, chunked_field, rtol = 1e-6)
+
+    assert len(chunked.chunks) <= 2
+
+
+def test_tile_arrays_are_not_in_memory(grids):
+    dense, chunked = grids
+
+    assert isinstance(chunked.get_walkable(), np.memmap)
+    assert isinstance(chunked.get_path_distances(3, 4), np.memmap)
+
+
+def test_close_removes_what_it_made(grids):
+    dense, chunked = grids
+    chunked.get_walkable()
+    directories = [chunked.chunk_directory, chunked.scratch_directory]
+    assert all(os.path.isdir(directory) for directory in directories)
+
+    chunked.close()
+
+    assert not any(os.path.exists(directory) for directory in directories)
+
+
+def test_garbage_collected_removes_what_it_made():
+    with ChunkedGrid(10, 10, 25) as chunked:
+        chunk_directory = chunked.chunk_directory
+
+    assert not os.path.exists(chunk_directory)
+
+    chunked = ChunkedGrid(10, 10, 25)
+    chunked[(12.5, 12.5, 0)] = 1
+    chunked.get_walkable()
+    directories = [chunked.chunk_directory, chunked.scratch_directory]
+
+    del chunked
+    gc.collect()
+
+    assert not any(os.path.exists(directory) for directory in directories)
+
+
+def test_saved_chunks_are_kept(grids, tmp_path):
+    dense, chunked = grids
+    chunked.save(tmp_path / "grid.npz")
+    chunked.close()
+
+    loaded = ChunkedGrid.load(tmp_path / "grid.npz")
+    indexes = np.arange(70 * 50)
+    np.testing.assert_array_equal(dense.get_cell_data(indexes), loaded.get_cell_data(indexes))
+
+    loaded.close()
+    assert os.path.isdir(loaded.chunk_directory)
+
+    shutil.rmtree(loaded.chunk_directory)
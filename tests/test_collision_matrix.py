@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from collision import CollisionMatrix
+from consts import Colour, Layer, EntityType
+from entity import Entity
+
+
+@pytest.fixture
+def pair(grid):
+    """
+    A player and a carrot next to each other, with a list of what's collided with the carrot
+    """
+    Entity.collision_matrix = CollisionMatrix()
+
+    player = Entity(*grid.get_pixel_center(2, 2), 20, 20, Colour.BLUE, grid_layer = Layer.PLAYER.value,
+                    entity_type_id = EntityType.PLAYER.value)
+    item = Entity(*grid.get_pixel_center(2, 3), 20, 20, Colour.ORANGE, grid_layer = Layer.NPC.value,
+                  entity_type_id = EntityType.CARROT.value)
+
+    collided_with = []
+    item.on_collide = lambda entity, other: collided_with.append(other.id)
+
+    return player, item, collided_with
+
+
+def test_disabled_layers_skip_collide(pair):
+    player, item, collided_with = pair
+    called = []
+    Entity.collision_matrix.set_interaction(
+        Layer.NPC, Layer.PLAYER, False, callback = lambda entity, other: called.append(other.id)
+    )
+
+    assert player.collide(item.id, 0) == []
+    assert collided_with == []
+    assert called == []
+
+    Entity.collision_matrix.set_interaction(Layer.NPC, Layer.PLAYER, True)
+
+    assert player.collide(item.id, 0) == [item]
+    assert collided_with == [player.id]
+    assert called == [player.id]
+
+
+def test_disabled_entity_types_skip_collide(pair):
+    player, item, collided_with = pair
+    Entity.collision_matrix.set_interaction(EntityType.CARROT, EntityType.PLAYER, False)
+
+    assert player.collide(item.id, 0) == []
+    assert collided_with == []
+
+    # only the pair was disabled, so other types can still collide with the carrot
+    assert Entity.collision_matrix.can_interact(
+        Layer.NPC.value, EntityType.RABBIT.value, np.array([Layer.ITEMS.value]), np.array([EntityType.CARROT.value])
+    ).tolist() == [True]
+
+
+def test_pairs_checked_at_once():
+    collision_matrix = CollisionMatrix()
+    collision_matrix.set_interaction(Layer.WORLD, Layer.ITEMS, False)
+    collision_matrix.set_interaction(EntityType.RABBIT, EntityType.CARROT, False)
+
+    assert collision_matrix.can_interact(
+        np.array([Layer.ITEMS.value, Layer.ITEMS.value, Layer.NPC.value, 9]),
+        np.array([EntityType.RABBIT.value, EntityType.RABBIT.value, EntityType.RABBIT.value, EntityType.RABBIT.value]),
+        np.array([Layer.WORLD.value, Layer.NPC.value, Layer.ITEMS.value, Layer.WORLD.value]),
+        np.array([EntityType.WORLD.value, EntityType.WORLD.value, EntityType.CARROT.value, EntityType.WORLD.value]),
+    ).tolist() == [False, True, False, True]
+
+    with pytest.raises(ValueError):
+        collision_matrix.set_interaction(Layer.WORLD, EntityType.WORLD, False)
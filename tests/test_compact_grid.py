@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from grid import Grid
+
+
+def make_grids(flip_x, flip_y):
+    grids = [Grid(12, 9, 25, 3, flip_x, flip_y, compact = compact) for compact in (False, True)]
+    random = np.random.default_rng(0)
+
+    for value, (row, column, layer) in enumerate(zip(
+            random.integers(9, size = 40).tolist(), random.integers(12, size = 40).tolist(),
+            random.integers(3, size = 40).tolist()
+    ), start = 1):
+        for grid in grids:
+            x, y = grid.get_pixel_center(row, column)
+            grid[(x, y, layer)] = value
+
+    return grids
+
+
+def get_sorted_records(records):
+    return sorted(zip(
+        records["layer"].tolist(), records["id"].tolist(), np.round(records["distance"], 6).tolist(),
+        records["row"].tolist(), records["col"].tolist()
+    ))
+
+
+@pytest.mark.parametrize("flip_x, flip_y", [(False, False), (True, False), (False, True), (True, True)])
+def test_queries_are_the_same(flip_x, flip_y):
+    dense, compact = make_grids(flip_x, flip_y)
+    assert dense.flat_pixel_positions is not None and compact.flat_pixel_positions is None
+
+    # which of the tiles tied at the kth nearest are returned can differ, so either ask for the nearest where there
+    # isn't a tie or for every tile within a distance
+    for x, y in [(12.5, 12.5), (101.0, 81.0), (163.0, 137.5), (290.0, 215.0), (-5.0, 400.0)]:
+        for k, distance_upper_bound in [(1, np.inf), (9 * 12, 40), (9 * 12, 75), (9 * 12, np.inf)]:
+            assert get_sorted_records(dense.query_records(x, y, k, distance_upper_bound)) == \
+                get_sorted_records(compact.query_records(x, y, k, distance_upper_bound))
+
+        assert dense.get_column_row_for_pixels(x, y) == compact.get_column_row_for_pixels(x, y)
+
+
+def test_pixel_centers_are_the_same():
+    dense, compact = make_grids(True, False)
+    rows, columns = np.divmod(np.arange(9 * 12), 12)
+
+    np.testing.assert_array_equal(dense.get_pixel_centers(rows, columns), compact.get_pixel_centers(rows, columns))
+    np.testing.assert_array_equal(dense.get_flat_pixel_positions(), compact.get_flat_pixel_positions())
+
+
+def test_compact_uses_less_memory():
+    dense = Grid(200, 200, 25, 3)
+    compact = Grid(200, 200, 25, 3, compact = True)
+
+    assert compact.memory_footprint()["total"] * 4 < dense.memory_footprint()["total"]
@@ -0,0 +1,69 @@
+import gc
+from consts.entity_id import get_entity_index, get_entity_generation, make_entity_id, GENERATION_MASK
+from entity.entity_registry import EntityRegistry
+
+
+class Thing:
+    pass
+
+
+def test_despawned_index_is_reused_with_the_next_generation():
+    registry = EntityRegistry()
+    first = Thing()
+    first_id = registry.spawn(first)
+
+    assert registry[first_id] is first
+    assert registry.despawn(first_id)
+    assert first_id not in registry
+    assert registry.get(first_id) is None
+    assert not registry.despawn(first_id)
+
+    second = Thing()
+    second_id = registry.spawn(second)
+
+    assert get_entity_index(second_id) == get_entity_index(first_id)
+    assert get_entity_generation(second_id) == get_entity_generation(first_id) + 1
+    # the old id doesn't find what took its place
+    assert first_id not in registry
+    assert registry[second_id] is second
+    assert len(registry) == 1
+    assert list(registry) == [second]
+
+
+def test_index_is_released_when_nothing_else_holds_the_entity():
+    registry = EntityRegistry()
+    kept = Thing()
+    kept_id = registry.spawn(kept)
+    dropped_id = registry.spawn(Thing())
+    gc.collect()
+
+    assert dropped_id not in registry
+    assert len(registry) == 1
+
+    reused_id = registry.spawn(Thing())
+    assert get_entity_index(reused_id) == get_entity_index(dropped_id)
+    assert registry.is_alive(kept_id)
+
+
+def test_stale_reference_does_not_release_a_new_id():
+    registry = EntityRegistry()
+    first = Thing()
+    first_id = registry.spawn(first)
+    first_reference = registry.entities[get_entity_index(first_id)]
+    registry.despawn(first_id)
+
+    second = Thing()
+    second_id = registry.spawn(second)
+
+    assert not registry.release(first_id, first_reference)
+    assert registry.is_alive(second_id)
+
+
+def test_generation_wraps():
+    registry = EntityRegistry()
+    things = [Thing(), Thing()]
+    registry.spawn(things[0])
+    registry.generations[1] = GENERATION_MASK
+    assert registry.despawn(make_entity_id(1, GENERATION_MASK))
+
+    assert get_entity_generation(registry.spawn(things[1])) == 0
@@ -0,0 +1,57 @@
+import pytest
+from consts import Colour
+from entity import Entity
+from entity.moveable_entity import MovableEntity
+from entity.scouting_entity import ScoutingEntity
+
+BOUNDING_POINTS = {
+    "top_left": (-1, -1),
+    "top_middle": (0, -1),
+    "top_right": (1, -1),
+    "middle_left": (-1, 0),
+    "middle": (0, 0),
+    "middle_right": (1, 0),
+    "bottom_left": (-1, 1),
+    "bottom_middle": (0, 1),
+    "bottom_right": (1, 1),
+}
+
+
+@pytest.fixture
+def cache_bounding_points():
+    cache_bounding_points = Entity.cache_bounding_points
+
+    yield
+
+    Entity.cache_bounding_points = cache_bounding_points
+
+
+@pytest.mark.parametrize("entity_class", [Entity, MovableEntity, ScoutingEntity])
+def test_slotted_entities_reject_unknown_attributes(grid, entity_class):
+    entity = entity_class(*grid.get_pixel_center(3, 3), 20, 16, Colour.BLUE, grid_layer = 1)
+
+    assert not hasattr(entity, "__dict__")
+    with pytest.raises(AttributeError):
+        entity.top_left_corner = (0, 0)
+
+
+def check_bounding_points(entity):
+    for name, (x_side, y_side) in BOUNDING_POINTS.items():
+        assert getattr(entity, name) == (entity.x + (x_side * 8), entity.y + (y_side * 10)), name
+
+
+@pytest.mark.parametrize("is_cached", [False, True])
+def test_bounds_are_worked_out_when_asked_for(grid, cache_bounding_points, is_cached):
+    Entity.cache_bounding_points = is_cached
+    entity = MovableEntity(*grid.get_pixel_center(3, 3), 20, 16, Colour.BLUE, grid_layer = 1)
+
+    # nothing is worked out until a point is asked for
+    assert entity.bounding_points is None
+
+    check_bounding_points(entity)
+    assert (entity.bounding_points is not None) == is_cached
+
+    # and moving gives points from the new position, not the cached ones
+    entity.x += 25
+    entity.y -= 25
+    check_bounding_points(entity)
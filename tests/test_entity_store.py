@@ -0,0 +1,91 @@
+import gc
+import numpy as np
+import pytest
+from consts.colour import Colour
+from consts.direction import MovementDirection
+from entity import Entity
+from entity.entity_store import EntityStore
+from entity.moveable_entity import MovableEntity
+
+
+@pytest.fixture
+def store(grid):
+    shared = Entity.store
+    Entity.store = EntityStore(capacity = 2)
+
+    yield Entity.store
+
+    Entity.store = shared
+
+
+def make_movers(grid, row = 2):
+    movers = []
+
+    for column, direction in enumerate([MovementDirection.EAST, MovementDirection.SOUTH, MovementDirection.NONE]):
+        mover = MovableEntity(*grid.get_pixel_center(row, column * 2), 20, 20, Colour.BLUE, grid_layer = 1)
+        mover.set_direction(direction)
+        movers.append(mover)
+
+    return movers
+
+
+def test_entities_are_views_over_the_store(store, grid):
+    mover = make_movers(grid)[0]
+
+    mover.x = 100
+    mover.speed = 3
+    assert store.get(mover.id, "x") == 100
+    assert store.get(mover.id, "speed") == 3
+
+    store.set(mover.id, "y", 40)
+    assert mover.y == 40
+    assert (store.get(mover.id, "direction_x"), store.get(mover.id, "direction_y")) == (1, 0)
+
+    assert mover.last_tick is None
+    mover.last_tick = 0.25
+    assert store.get(mover.id, "last_tick") == 0.25
+
+    assert store.get_bounds([mover.id]).tolist() == [[*mover.top_left, *mover.bottom_right]]
+
+
+def test_integrate_matches_moving_one_at_a_time(store, grid):
+    movers = make_movers(grid)
+    one_at_a_time = make_movers(grid, row = 5)
+
+    moved = store.integrate(ids = [mover.id for mover in movers])
+
+    for mover in one_at_a_time:
+        mover.update_effective_speed()
+        direction_x, direction_y = store.get(mover.id, "direction_x"), store.get(mover.id, "direction_y")
+        mover.x += direction_x * mover.speed
+        mover.y += direction_y * mover.speed
+
+    assert moved.tolist() == [movers[0].id, movers[1].id]
+
+    for mover, expected in zip(movers, one_at_a_time):
+        assert (mover.x - mover.original_x, mover.y - mover.original_y, mover.speed, mover.acceleration) == \
+            pytest.approx((expected.x - expected.original_x, expected.y - expected.original_y, expected.speed,
+                           expected.acceleration))
+
+
+def test_advance_ticks_matches_can_think(store, grid):
+    entity = Entity(*grid.get_pixel_center(5, 5), 20, 20, Colour.BLUE, tick_rate = 0.5)
+    other = Entity(*grid.get_pixel_center(6, 6), 20, 20, Colour.BLUE, tick_rate = 0.5)
+
+    for _ in range(6):
+        assert (entity.id in store.advance_ticks(0.2, [entity.id])) == other.can_think(0.2)
+        assert entity.last_tick == pytest.approx(other.last_tick)
+
+
+def test_leaving_the_store_keeps_it_packed(store, grid):
+    movers = make_movers(grid)
+    first_id = movers[0].id
+
+    del movers[0]
+    gc.collect()
+
+    assert len(store) == 2
+    assert first_id not in store
+    assert sorted(store["id"].tolist()) == sorted([movers[0].id, movers[1].id])
+    np.testing.assert_array_equal(store.get_bounds([movers[1].id])[0], [*movers[1].top_left, *movers[1].bottom_right])
+    assert movers[1].x == grid.get_pixel_center(2, 4)[0]
@@ -0,0 +1,71 @@
+import math
+import numpy as np
+import pytest
+from grid import Grid
+
+
+def brute_force_fov(grid, row, column, origin_angle, fov, tile_distance):
+    """
+    Check every tile of the grid against the viewer one at a time
+    """
+    origin_x, origin_y = grid.get_pixel_center(row, column)
+    max_distance = (grid.half_tile_size * tile_distance) - grid.half_tile_size
+    result = []
+
+    for tile_row in range(grid.max_rows):
+        for tile_column in range(grid.max_columns):
+            x, y = grid.get_pixel_center(tile_row, tile_column)
+            angle = math.degrees(math.atan2(y - origin_y, x - origin_x)) % 360
+            theta = (origin_angle - angle) % 360
+
+            result.append(
+                (theta >= 360 - (fov / 2) or theta <= fov / 2) and
+                math.hypot(x - origin_x, y - origin_y) < max_distance
+            )
+
+    return np.array(result)
+
+
+# angles and distances that don't land exactly on the edge of a tile, where float32 and float64 could disagree
+VIEWERS = [
+    (0, 0, 10, 75, 6),
+    (4, 7, 100, 75, 8),
+    (8, 2, 200, 130, 6),
+    (5, 5, 290, 360, 8),
+    (2, 11, 170, 40, 30),
+]
+
+
+@pytest.mark.parametrize("flip", [False, True])
+@pytest.mark.parametrize("row, column, origin_angle, fov, tile_distance", VIEWERS)
+def test_fov_matches_checking_every_tile(flip, row, column, origin_angle, fov, tile_distance):
+    grid = Grid(12, 9, 25, 1, flip_x = flip, flip_y = flip)
+
+    expected = brute_force_fov(grid, row, column, origin_angle, fov, tile_distance)
+
+    np.testing.assert_array_equal(grid.get_positions_in_fov(row, column, origin_angle, fov, tile_distance), expected)
+
+
+def test_fov_batch_matches_checking_every_tile():
+    grid = Grid(12, 9, 25, 1)
+    rows, columns, origin_angles, fovs, tile_distances = zip(*VIEWERS)
+
+    result = grid.get_positions_in_fov_batch(rows, columns, origin_angles, fovs, tile_distances)
+
+    assert result.shape == (len(VIEWERS), grid.max_rows * grid.max_columns)
+    for viewer, expected in zip(VIEWERS, result):
+        np.testing.assert_array_equal(expected, brute_force_fov(grid, *viewer))
+
+
+def test_row_column_distances_are_from_the_tile_center():
+    # more columns than rows, so that mixing up x and y would look somewhere else
+    grid = Grid(12, 5, 25, 1)
+    origin_x, origin_y = grid.get_pixel_center(1, 9)
+
+    rows, columns = np.divmod(np.arange(grid.max_rows * grid.max_columns), grid.max_columns)
+    x, y = grid.get_pixel_centers(rows, columns)
+
+    row_distances, column_distances = grid.get_row_column_distances(1, 9)
+
+    np.testing.assert_allclose(column_distances, x - origin_x)
+    np.testing.assert_allclose(row_distances, y - origin_y)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from grid import Grid
+
+
+def test_fields_are_cached_by_tile(grid):
+    distances, angles = grid.get_fields(2, 3)
+
+    assert grid.get_fields(2, 3)[0] is distances
+    assert grid.get_fields(2, 3)[1] is angles
+    assert grid.get_field_cache_info() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "size": 1}
+
+    with pytest.raises(ValueError):
+        distances[0] = 0
+
+
+def test_least_recently_used_fields_are_dropped():
+    grid = Grid(10, 10, 25, 1, field_cache_size = 2)
+
+    first = grid.get_fields(0, 0)
+    grid.get_fields(1, 1)
+    grid.get_fields(0, 0)
+    grid.get_fields(2, 2)
+
+    assert grid.get_fields(0, 0)[0] is first[0]
+    assert grid.get_field_cache_info()["size"] == 2
+
+    grid.get_fields(1, 1)
+    assert grid.get_field_cache_info()["misses"] == 4
+
+
+def test_fields_stay_valid_when_the_data_changes(grid):
+    distances, angles = grid.get_fields(4, 4)
+
+    # the fields only depend on where the tiles are, so what's stored in them doesn't invalidate the cache
+    grid[(*grid.get_pixel_center(4, 5), 0)] = 7
+    grid.store_data(1, 12, 3)
+
+    assert grid.get_fields(4, 4)[0] is distances
+    assert grid.get_field_cache_info()["hits"] == 1
+
+    expected_distances, expected_angles = grid.build_fields(4, 4)
+    np.testing.assert_array_equal(distances, expected_distances)
+    np.testing.assert_array_equal(angles, expected_angles)
+
+
+def test_fields_match_the_tile_centers(grid):
+    origin_x, origin_y = grid.get_pixel_center(6, 1)
+    rows, columns = np.divmod(np.arange(grid.max_rows * grid.max_columns), grid.max_columns)
+    x, y = grid.get_pixel_centers(rows, columns)
+
+    distances, angles = grid.get_fields(6, 1)
+
+    np.testing.assert_allclose(distances, np.hypot(x - origin_x, y - origin_y), rtol = 1e-6)
+    np.testing.assert_allclose(angles, np.degrees(np.arctan2(y - origin_y, x - origin_x)) % 360, atol = 1e-4)
@@ -0,0 +1,61 @@
+from grid import Grid
+
+
+def set_tile(grid, row, column, layer, value):
+    x, y = grid.get_pixel_center(row, column)
+    grid[(x, y, layer)] = value
+
+
+def test_versions_count_changes(grid):
+    set_tile(grid, 1, 1, 0, 5)
+    set_tile(grid, 2, 2, 1, 6)
+
+    assert grid.version == 2
+    assert grid.layer_versions == [1, 2, 0]
+    assert grid.walkability_version == 1
+
+    # writing what's already there isn't a change
+    set_tile(grid, 2, 2, 1, 6)
+    assert grid.version == 2
+
+
+def test_only_the_zero_layer_changes_walkability(grid):
+    set_tile(grid, 1, 1, 1, 5)
+    set_tile(grid, 1, 1, 2, 6)
+
+    assert grid.walkability_version == 0
+
+
+def test_changes_since(grid):
+    set_tile(grid, 1, 1, 0, 5)
+    version = grid.version
+    set_tile(grid, 2, 3, 1, 6)
+    set_tile(grid, 1, 1, 0, 0)
+
+    assert grid.get_changes_since(version) == [(2, 1, (2, 3), 0, 6), (3, 0, (1, 1), 5, 0)]
+    assert grid.get_changes_since(version, layers = [1]) == [(2, 1, (2, 3), 0, 6)]
+    assert grid.get_changes_since(grid.version) == []
+
+
+def test_changes_since_before_the_journal_starts():
+    grid = Grid(10, 10, 25, 3, journal_size = 2)
+
+    for value in range(1, 5):
+        set_tile(grid, value, value, 0, value)
+
+    assert grid.get_changes_since(0) is None
+    assert grid.get_changes_since(2) == [(3, 0, (3, 3), 0, 3), (4, 0, (4, 4), 0, 4)]
+
+
+def test_walkable_follows_the_journal(grid):
+    # once built, the walkable bitmap is brought up to date from the changes rather than rebuilt
+    grid.get_walkable()
+    set_tile(grid, 4, 5, 0, 7)
+    set_tile(grid, 0, 0, 0, 8)
+    set_tile(grid, 0, 0, 0, 0)
+
+    rebuilt = Grid(10, 10, 25, 3)
+    set_tile(rebuilt, 4, 5, 0, 7)
+
+    assert (grid.get_walkable() == rebuilt.get_walkable()).all()
+    assert (grid.get_neighbour_masks() == rebuilt.get_neighbour_masks()).all()
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+
+def add_solids(grid, positions):
+    for row, column in positions:
+        x, y = grid.get_pixel_center(row, column)
+        grid[(x, y, 0)] = 1
+
+
+@pytest.mark.parametrize("seed, density", [(0, 0.1), (1, 0.3), (2, 0.45)])
+def test_agrees_with_shadowcasting(make_walled_grid, seed, density):
+    grid = make_walled_grid(seed, density = density)
+    size = grid.max_rows
+    floors = np.argwhere(grid.get_walkable()[1:-1, 1:-1])
+
+    for row, column in floors.tolist():
+        visible = grid.get_visible_positions(row, column, size * 2).reshape(size, size)
+        starts = np.repeat([[row, column]], len(floors), axis = 0)
+
+        expected = visible[floors[:, 0], floors[:, 1]]
+        np.testing.assert_array_equal(grid.line_of_sight(starts, floors, use_pixels = False), expected)
+
+
+def test_passing_between_a_solid_and_a_walkable_tile(grid):
+    # the line from (0, 5) to (1, 7) passes exactly between (0, 6) and (1, 6)
+    add_solids(grid, [(1, 6)])
+    assert grid.line_of_sight([(0, 5)], [(1, 7)], use_pixels = False)[0]
+
+    add_solids(grid, [(0, 6)])
+    assert not grid.line_of_sight([(0, 5)], [(1, 7)], use_pixels = False)[0]
+
+
+def test_edges_on_both_sides_block(grid):
+    # the line from (0, 6) to (4, 4) passes exactly by (1, 5) on one side then (3, 5) on the other
+    add_solids(grid, [(1, 5)])
+    assert grid.line_of_sight([(0, 6)], [(4, 4)], use_pixels = False)[0]
+
+    add_solids(grid, [(3, 5)])
+    assert not grid.line_of_sight([(0, 6)], [(4, 4)], use_pixels = False)[0]
+    assert not grid.get_visible_positions(0, 6, 8).reshape(grid.max_rows, grid.max_columns)[4, 4]
+
+
+def test_pixels_and_cells_agree(grid):
+    add_solids(grid, [(4, 4), (4, 5)])
+    starts = [(1, 1), (8, 8), (0, 9)]
+    ends = [(7, 7), (0, 0), (9, 0)]
+
+    pixel_starts = [grid.get_pixel_center(row, column) for row, column in starts]
+    pixel_ends = [grid.get_pixel_center(row, column) for row, column in ends]
+
+    np.testing.assert_array_equal(
+        grid.line_of_sight(pixel_starts, pixel_ends), grid.line_of_sight(starts, ends, use_pixels = False)
+    )
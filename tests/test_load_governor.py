@@ -0,0 +1,76 @@
+from simulation import LoadGovernor
+
+
+def make_governor(**kwargs):
+    calls = []
+    governor = LoadGovernor(budget = 1, smoothing = 1, **kwargs)
+
+    for name in ["scouting", "pathfinding"]:
+        governor.add_step(
+            name, lambda name = name: calls.append(("shed", name)), lambda name = name: calls.append(("restore", name))
+        )
+
+    return governor, calls
+
+
+def record(governor, seconds, frames):
+    return [getattr(governor.record_frame(seconds), "name", None) for _ in range(frames)]
+
+
+def test_sheds_in_order_then_restores_in_reverse():
+    governor, calls = make_governor(cooldown_frames = 2, restore_frames = 3)
+
+    # waiting out the cooldown between steps, and nothing left to shed at the end
+    assert record(governor, 2, 5) == ["scouting", None, "pathfinding", None, None]
+    assert [step.name for step in governor.get_active_steps()] == ["scouting", "pathfinding"]
+
+    assert record(governor, 0.1, 6) == [None, None, "pathfinding", None, None, "scouting"]
+    assert governor.get_active_steps() == []
+    assert calls == [
+        ("shed", "scouting"), ("shed", "pathfinding"), ("restore", "pathfinding"), ("restore", "scouting")
+    ]
+    assert [change[:3] for change in governor.history] == [
+        ("scouting", "shed", 1), ("pathfinding", "shed", 3), ("pathfinding", "restore", 8), ("scouting", "restore", 11)
+    ]
+
+
+def test_only_restores_after_headroom_in_a_row():
+    governor, _ = make_governor(cooldown_frames = 1, restore_frames = 3)
+    record(governor, 2, 1)
+
+    # near the budget isn't headroom
+    assert record(governor, 0.1, 2) + record(governor, 0.8, 1) + record(governor, 0.1, 2) == [None] * 5
+    assert record(governor, 0.1, 1) == ["scouting"]
+
+
+def test_smoothing_ignores_a_single_slow_frame():
+    governor, _ = make_governor()
+    governor.smoothing = 0.2
+    record(governor, 0.5, 20)
+
+    assert record(governor, 2, 1) == [None]
+    assert record(governor, 2, 1) == ["scouting"]
+
+
+def test_restore_all_and_report():
+    governor, calls = make_governor(cooldown_frames = 0)
+    record(governor, 2, 2)
+    governor.restore_all()
+
+    assert governor.get_active_steps() == []
+    assert calls[-2:] == [("restore", "pathfinding"), ("restore", "scouting")]
+    assert [(step["name"], step["times_shed"], step["is_active"]) for step in governor.get_report()] == [
+        ("scouting", 1, False), ("pathfinding", 1, False)
+    ]
+
+
+def test_history_keeps_the_latest_changes():
+    governor, _ = make_governor(cooldown_frames = 0, restore_frames = 1, history_size = 3)
+
+    for _ in range(3):
+        record(governor, 2, 1)
+        record(governor, 0.1, 1)
+
+    assert [change[:3] for change in governor.history] == [
+        ("scouting", "restore", 4), ("scouting", "shed", 5), ("scouting", "restore", 6)
+    ]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from grid import Grid
+
+
+@pytest.fixture(params = [
+    {},
+    {"flip_x": True, "flip_y": True},
+    {"compact": True},
+])
+def conversion_grid(request):
+    return Grid(11, 7, 25, 1, **request.param)
+
+
+def test_pixel_centers_match_one_at_a_time(conversion_grid):
+    rows, columns = np.divmod(np.arange(conversion_grid.max_rows * conversion_grid.max_columns),
+                              conversion_grid.max_columns)
+
+    x, y = conversion_grid.get_pixel_centers(rows, columns)
+
+    np.testing.assert_array_equal(np.column_stack([x, y]), [
+        conversion_grid.get_pixel_center(row, column) for row, column in zip(rows.tolist(), columns.tolist())
+    ])
+
+
+def test_pixels_to_positions_match_one_at_a_time(conversion_grid):
+    random = np.random.default_rng(0)
+    x = random.uniform(-20, conversion_grid.max_columns * 25 + 20, 50)
+    y = random.uniform(-20, conversion_grid.max_rows * 25 + 20, 50)
+
+    rows, columns = conversion_grid.get_rows_columns_for_pixels(x, y)
+    center_x, center_y = conversion_grid.get_positions_for_pixels(x, y)
+
+    for i in range(len(x)):
+        assert (rows[i], columns[i]) == conversion_grid.get_column_row_for_pixels(x[i], y[i])
+        assert (center_x[i], center_y[i]) == conversion_grid.get_pos_for_pixels(x[i], y[i])
+
+
+def test_path_to_pixels(conversion_grid):
+    path = [(0, 0), (0, 1), (1, 1), (6, 10)]
+
+    assert conversion_grid.convert_path_to_pixels(path) == [
+        conversion_grid.get_pixel_center(row, column) for row, column in path
+    ]
+    assert conversion_grid.convert_path_to_pixels([]) == []
@@ -0,0 +1,75 @@
+import pytest
+from consts.colour import Colour
+from entity import MovableEntity
+
+
+def make_mover(grid):
+    # out of layer 0 so it isn't in the way of walking
+    return MovableEntity(*grid.get_pixel_center(1, 1), 20, 20, Colour.BLUE, grid_layer = 1)
+
+
+def test_only_plans_again_when_something_changes(grid):
+    mover = make_mover(grid)
+    destination = grid.get_pixel_center(1, 5)
+
+    changed, path = mover.plan_path(destination)
+    assert changed
+    assert path[-1] == destination
+
+    assert mover.plan_path(destination) == (False, path)
+
+    # the walls
+    grid[(*grid.get_pixel_center(1, 3), 0)] = 1000
+    changed, around = mover.plan_path(destination)
+    assert changed
+    assert grid.get_pixel_center(1, 3) not in around
+
+    # where we're going
+    changed, _ = mover.plan_path(grid.get_pixel_center(5, 5))
+    assert changed
+
+    # where we are
+    mover.x, mover.y = grid.get_pixel_center(2, 1)
+    mover.refresh_dimensions()
+    changed, _ = mover.plan_path(grid.get_pixel_center(5, 5))
+    assert changed
+    assert not mover.plan_path(grid.get_pixel_center(5, 5))[0]
+
+
+def test_looking_harder_plans_again(grid, monkeypatch):
+    mover = make_mover(grid)
+    destination = grid.get_pixel_center(8, 8)
+
+    # not looking hard enough to get there
+    mover.max_path_iterations = 2
+    with pytest.warns(UserWarning):
+        changed, partial = mover.plan_path(destination)
+    assert changed
+    assert partial is None or partial[-1] != destination
+    assert not mover.plan_path(destination)[0]
+
+    mover.max_path_iterations = None
+    changed, path = mover.plan_path(destination)
+    assert changed
+    assert path[-1] == destination
+
+    # the cap is part of how hard we look
+    monkeypatch.setattr(MovableEntity, "max_path_iterations_cap", 2)
+    assert mover.get_max_path_iterations() == 2
+    with pytest.warns(UserWarning):
+        assert mover.plan_path(destination)[0]
+
+    mover.max_path_iterations = 1
+    assert mover.get_max_path_iterations() == 1
+
+
+def test_failing_to_find_a_path_is_kept(grid):
+    mover = make_mover(grid)
+
+    # walled in
+    for row, column in [(0, 1), (2, 1), (1, 0), (1, 2)]:
+        grid[(*grid.get_pixel_center(row, column), 0)] = 1000 + (row * 10) + column
+
+    destination = grid.get_pixel_center(5, 5)
+    assert mover.plan_path(destination) == (True, None)
+    assert mover.plan_path(destination) == (False, None)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def filled_grid(grid):
+    for value, (row, column, layer) in enumerate([(1, 1, 0), (1, 2, 1), (2, 1, 2), (2, 2, 1), (5, 5, 0)], start = 1):
+        grid[(*grid.get_pixel_center(row, column), layer)] = value
+
+    grid.set_entity_type(2, 3)
+    grid.set_entity_type(4, 3)
+    grid.set_static_solid(1, *grid.get_pixel_center(1, 1))
+
+    return grid
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"layers": [1, 2]},
+    {"entity_types": [3]},
+    {"exclude_static": True},
+])
+def test_tiles_and_records_agree(filled_grid, options):
+    x, y = filled_grid.get_pixel_center(1, 1)
+    ids, layers, distances, indexes = filled_grid.query_tiles(x, y, k = 9, distance_upper_bound = 40, **options)
+    records = filled_grid.query_records(x, y, k = 9, distance_upper_bound = 40, **options)
+
+    np.testing.assert_array_equal(ids, records["id"])
+    np.testing.assert_array_equal(layers, records["layer"])
+    np.testing.assert_array_equal(distances, records["distance"])
+    np.testing.assert_array_equal(np.divmod(indexes, filled_grid.max_columns), (records["row"], records["col"]))
+    np.testing.assert_array_equal(filled_grid.get_entity_types(ids), records["entity_type"])
+
+
+def test_filters(filled_grid):
+    x, y = filled_grid.get_pixel_center(1, 1)
+
+    assert sorted(filled_grid.query_tiles(x, y, k = 9, distance_upper_bound = 40, exclude_empty = True)[0]) == \
+        [1, 2, 3, 4]
+    assert sorted(filled_grid.query_tiles(x, y, k = 9, distance_upper_bound = 40, entity_types = [3])[0]) == [2, 4]
+    assert 1 not in filled_grid.query_tiles(x, y, k = 9, distance_upper_bound = 40, exclude_static = True)[0]
+
+
+def test_ids_are_integers(filled_grid):
+    x, y = filled_grid.get_pixel_center(1, 1)
+
+    assert filled_grid.query_tiles(x, y, k = 9, distance_upper_bound = 40)[0].dtype == np.int64
+    assert filled_grid.query_tiles(x, y, k = 9, distance_upper_bound = 40, entity_types = [3])[0].dtype == np.int64
+    assert filled_grid.query_tiles(-500, -500, distance_upper_bound = 1)[0].dtype == np.int64
+
+
+def test_query_is_a_list_of_tuples(filled_grid):
+    x, y = filled_grid.get_pixel_center(5, 5)
+
+    assert filled_grid.query(x, y) == [(5, 0.0), (0, 0.0), (0, 0.0)]
+    assert filled_grid.query(x, y, layers = [0]) == [(5, 0.0)]
+
+
+def test_nearest_tile_with_and_without_a_bound(grid):
+    for x, y in [(37.5, 37.5), (50, 50), (-12.5, 12.5), (-12.4, 12.5), (37.5, 37.5), (300, 300)]:
+        for distance_upper_bound in [np.inf, grid.tile_size, 5]:
+            expected = grid.tree.query([y, x], distance_upper_bound = distance_upper_bound)
+            assert grid.query_tree(x, y, distance_upper_bound = distance_upper_bound) == expected
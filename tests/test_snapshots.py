@@ -0,0 +1,63 @@
+import io
+import numpy as np
+import pytest
+from grid import Grid, SparseGrid
+
+
+def fill(grid):
+    random = np.random.default_rng(0)
+
+    for value in range(1, 60):
+        row, column, layer = random.integers(grid.max_rows), random.integers(grid.max_columns), random.integers(3)
+        x, y = grid.get_pixel_center(row, column)
+        grid[(x, y, layer)] = value
+
+    grid.set_entity_type(7, 4)
+    grid.set_static_solid(9, *grid.get_pixel_center(2, 3))
+
+    return grid
+
+
+def assert_same(grid, loaded):
+    indexes = np.arange(grid.max_rows * grid.max_columns)
+
+    assert type(loaded) is type(grid)
+    assert (loaded.max_columns, loaded.max_rows, loaded.flip_x, loaded.flip_y) == \
+        (grid.max_columns, grid.max_rows, grid.flip_x, grid.flip_y)
+    np.testing.assert_array_equal(grid.get_cell_data(indexes), loaded.get_cell_data(indexes))
+    np.testing.assert_array_equal(grid.static_solids, loaded.static_solids)
+    np.testing.assert_array_equal(grid.get_entity_types([7, 9]), loaded.get_entity_types([7, 9]))
+    np.testing.assert_array_equal(grid.get_walkable(), loaded.get_walkable())
+    assert loaded.locations == grid.locations
+
+
+@pytest.mark.parametrize("grid_class", [Grid, SparseGrid])
+def test_save_and_load_a_file(grid_class, tmp_path):
+    grid = fill(grid_class(20, 15, 25, 3, flip_y = True))
+    grid.save(tmp_path / "grid.npz")
+
+    assert_same(grid, grid_class.load(tmp_path / "grid.npz"))
+    assert_same(grid, grid_class.load(str(tmp_path / "grid.npz"), mmap = False))
+
+
+@pytest.mark.parametrize("grid_class", [Grid, SparseGrid])
+def test_save_and_load_in_memory(grid_class):
+    grid = fill(grid_class(20, 15, 25, 3))
+    snapshot = io.BytesIO()
+    grid.save(snapshot)
+
+    # a snapshot can be loaded again and again, such as to restart a level
+    for _ in range(2):
+        snapshot.seek(0)
+        assert_same(grid, grid_class.load(snapshot))
+
+
+def test_changes_after_loading_are_not_in_the_snapshot(tmp_path):
+    grid = fill(Grid(20, 15, 25, 3))
+    grid.save(tmp_path / "grid.npz")
+
+    loaded = Grid.load(tmp_path / "grid.npz")
+    loaded[(12.5, 12.5, 0)] = 99
+    loaded.static_solids[2, 3] = 0
+
+    assert_same(grid, Grid.load(tmp_path / "grid.npz"))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from grid import SparseGrid
+
+
+def make_sparse_copy(dense):
+    """
+    A SparseGrid with the same walls as the dense grid
+    """
+    sparse = SparseGrid(dense.max_columns, dense.max_rows, dense.tile_size, dense.number_of_layers)
+    maze = dense.grid_for_pathing()
+
+    for row, column in np.argwhere(maze != 0).tolist():
+        sparse[(*sparse.get_pixel_center(row, column), 0)] = int(maze[row, column])
+
+    return sparse
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("density", [0.1, 0.35])
+def test_paths_are_walkable_steps_and_agree_with_the_dense_grid(make_walled_grid, seed, density):
+    dense = make_walled_grid(seed, size = 24, density = density)
+    sparse = make_sparse_copy(dense)
+    maze = dense.grid_for_pathing()
+
+    np.testing.assert_array_equal(sparse.get_walkable(), dense.get_walkable())
+
+    walkable = np.argwhere(maze == 0).tolist()
+    random = np.random.default_rng(seed)
+
+    for start, end in random.choice(walkable, size = (10, 2)).tolist():
+        start, end = tuple(start), tuple(end)
+        path = sparse.find_path(start, end)
+        is_reachable = dense.get_path_distances(*start).reshape(maze.shape)[end] < np.inf
+
+        if not is_reachable:
+            assert path is None
+            continue
+
+        assert path[0] == start
+        assert path[-1] == end
+        assert all(maze[position] == 0 for position in path)
+
+        steps = np.abs(np.diff(np.array(path), axis = 0)).sum(axis = 1)
+        assert (steps == 1).all()
@@ -0,0 +1,72 @@
+import math
+import numpy as np
+import pytest
+from grid import Grid
+
+TILE_SIZE = 25
+
+
+def get_static_solid(grid, x, y):
+    """
+    The static solid at a pixel, looked up through the tile centers rather than from the pixel position directly.
+    The center of the tile the pixel is in is used, as pixels on the edge of a tile are as near to the next one
+    """
+    if not (0 <= x < grid.max_columns * TILE_SIZE and 0 <= y < grid.max_rows * TILE_SIZE):
+        return 0
+
+    half_tile_size = TILE_SIZE / 2
+    row, column = grid.get_column_row_for_pixels(
+        (math.floor(x / TILE_SIZE) * TILE_SIZE) + half_tile_size,
+        (math.floor(y / TILE_SIZE) * TILE_SIZE) + half_tile_size
+    )
+    return int(grid.static_solids[row, column])
+
+
+def step_pixel_by_pixel(grid, x, y, x_magnitude, y_magnitude):
+    """
+    Walk the leading edge a pixel at a time, including the pixel just past where it would end up
+    """
+    is_horizontal = x_magnitude != 0
+    magnitude = x_magnitude if is_horizontal else y_magnitude
+    step = 1 if magnitude > 0 else -1
+    edge = x if is_horizontal else y
+
+    for distance in range(1, abs(magnitude) + 2):
+        pixel = edge + (distance * step)
+        entity_id = get_static_solid(grid, pixel, y) if is_horizontal else get_static_solid(grid, x, pixel)
+
+        if entity_id != 0:
+            # stop a pixel before the side of the tile we'd have gone into
+            side = math.floor(pixel / TILE_SIZE) * TILE_SIZE
+            if step < 0:
+                side += TILE_SIZE
+            clamp = side - step - edge
+
+            return (clamp, 0, entity_id) if is_horizontal else (0, clamp, entity_id)
+
+    return None
+
+
+@pytest.mark.parametrize("flip_x, flip_y", [(False, False), (True, False), (False, True), (True, True)])
+def test_static_collision_matches_stepping_pixel_by_pixel(flip_x, flip_y):
+    grid = Grid(8, 6, TILE_SIZE, 1, flip_x = flip_x, flip_y = flip_y)
+    random = np.random.default_rng(0)
+
+    for row, column in np.argwhere(random.random((grid.max_rows, grid.max_columns)) < 0.3).tolist():
+        grid.set_static_solid(100 + (row * grid.max_columns) + column, *grid.get_pixel_center(row, column))
+
+    for _ in range(300):
+        x = int(random.integers(-10, grid.max_columns * TILE_SIZE + 10))
+        y = int(random.integers(-10, grid.max_rows * TILE_SIZE + 10))
+        magnitude = int(random.integers(-60, 61))
+        x_magnitude, y_magnitude = (magnitude, 0) if random.random() < 0.5 else (0, magnitude)
+
+        assert grid.get_static_collision(x, y, x_magnitude, y_magnitude) == \
+            (step_pixel_by_pixel(grid, x, y, x_magnitude, y_magnitude) if magnitude != 0 else None), \
+            (x, y, x_magnitude, y_magnitude)
+
+
+def test_no_static_solids():
+    grid = Grid(8, 6, TILE_SIZE, 1)
+
+    assert grid.get_static_collision(30, 30, 50, 0) is None
@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+from collision import swept_aabb, get_swept_bounds, CollisionWorld
+from collision.collision_world import BRUTE_FORCE_COUNT
+from consts.colour import Colour
+from consts.direction import MovementDirection
+from entity import Entity
+from entity.moveable_entity import MovableEntity
+
+
+def test_time_of_impact_and_normal():
+    # a 10px box moving 20px right towards one 5px away
+    times, normals = swept_aabb([[0, 0, 10, 10]], [[20, 0]], [[15, 0, 25, 10]])
+
+    assert times.tolist() == [0.25]
+    assert normals.tolist() == [[-1, 0]]
+
+
+def test_time_of_impact_diagonal():
+    times, normals = swept_aabb([[0, 0, 10, 10]], [[20, 40]], [[5, 30, 15, 40]])
+
+    assert times.tolist() == [0.5]
+    assert normals.tolist() == [[0, -1]]
+
+
+def test_misses():
+    times, normals = swept_aabb(
+        [[0, 0, 10, 10], [0, 0, 10, 10], [0, 0, 10, 10]],
+        [[4, 0], [20, 0], [-20, 0]],
+        [[15, 0, 25, 10], [15, 11, 25, 21], [15, 0, 25, 10]],
+    )
+
+    assert np.isinf(times).all()
+    assert (normals == 0).all()
+
+
+def test_overlapping_at_the_start_is_not_a_contact():
+    times, _ = swept_aabb([[0, 0, 10, 10]], [[5, 0]], [[5, 0, 15, 10]])
+
+    assert np.isinf(times).all()
+
+
+def test_both_moving():
+    times, _ = swept_aabb([[0, 0, 10, 10]], [[10, 0]], [[20, 0, 30, 10]], [[-10, 0]])
+
+    assert times.tolist() == [0.5]
+
+
+def test_swept_bounds():
+    swept = get_swept_bounds([[0, 0, 10, 10], [0, 0, 10, 10]], [[5, -5], [-5, 5]])
+
+    assert swept.tolist() == [[0, -5, 15, 10], [-5, 0, 10, 15]]
+
+
+def test_world_sweep_is_ordered_by_time():
+    world = CollisionWorld(capacity = 2)
+    world.set_bounds(1, 0, 0, 10, 10)
+
+    for entity_id, min_x in [(2, 60), (3, 20), (4, 40)]:
+        world.set_bounds(entity_id, min_x, 0, min_x + 10, 10)
+
+    # one that is out of the way
+    world.set_bounds(5, 30, 20, 40, 30)
+
+    contacts = world.sweep(1, 100, 0)
+
+    assert world.capacity == 8
+    assert contacts["second"].tolist() == [3, 4, 2]
+    assert contacts["time"].tolist() == [0.1, 0.3, 0.5]
+    assert (contacts["first"] == 1).all()
+
+
+def test_world_sweep_after_removing():
+    world = CollisionWorld()
+    world.set_bounds(1, 0, 0, 10, 10)
+    world.set_bounds(2, 20, 0, 30, 10)
+    world.set_bounds(3, 40, 0, 50, 10)
+    world.remove(2)
+
+    assert world.sweep(1, 100, 0)["second"].tolist() == [3]
+    assert len(world.sweep(2, 100, 0)) == 0
+
+
+def test_sorted_and_brute_force_queries_agree():
+    random = np.random.default_rng(0)
+    world = CollisionWorld()
+
+    for entity_id in range(1, (BRUTE_FORCE_COUNT * 4) + 1):
+        x, y = random.uniform(0, 500, 2)
+        width, height = random.uniform(5, 40, 2)
+        world.set_bounds(entity_id, x, y, x + width, y + height)
+
+    for min_x, min_y in random.uniform(0, 500, (50, 2)).tolist():
+        bounds = (min_x, min_y, min_x + 30, min_y + 30)
+        candidates = world.bounds[:world.count]
+        expected = np.flatnonzero(
+            (candidates[:, 0] <= bounds[2]) & (candidates[:, 2] >= bounds[0]) &
+            (candidates[:, 1] <= bounds[3]) & (candidates[:, 3] >= bounds[1])
+        )
+
+        assert sorted(world.query(*bounds).tolist()) == expected.tolist()
+
+
+@pytest.fixture
+def world(grid):
+    Entity.collision_world = CollisionWorld()
+
+    return grid
+
+
+def make_entity(cls, row, column, layer, is_solid = True):
+    x, y = Entity.grid.get_pixel_center(row, column)
+    entity = cls(x, y, 20, 20, Colour.BLUE, is_solid = is_solid, grid_layer = layer)
+    collided = []
+    entity.on_collide = lambda entity, other: collided.append(other.id)
+
+    return entity, collided
+
+
+def test_sweep_stops_at_the_first_solid(world):
+    mover, _ = make_entity(MovableEntity, 1, 1, 1)
+    near, near_collided = make_entity(Entity, 1, 3, 1)
+    far, far_collided = make_entity(Entity, 1, 4, 1)
+
+    collisions = mover.check_collision_sweep(MovementDirection.EAST, 100, 0)
+
+    assert collisions == [near]
+    assert near_collided == [mover.id]
+    assert far_collided == []
+    # up to the first with a pixel to spare
+    assert mover.bottom_right[0] == near.top_left[0] - 1
+
+
+def test_sweep_collides_with_items_once_over_them(world):
+    mover, _ = make_entity(MovableEntity, 1, 1, 1)
+    item, item_collided = make_entity(Entity, 1, 2, 2, is_solid = False)
+    solid, _ = make_entity(Entity, 1, 5, 1)
+
+    # just touching the edge of the item isn't enough
+    assert mover.check_collision_sweep(MovementDirection.EAST, 5, 0) == []
+    assert item_collided == []
+
+    # once we'd be over it
+    assert mover.check_collision_sweep(MovementDirection.EAST, 15, 0) == []
+    assert item_collided == [mover.id]
+
+    assert mover.check_collision_sweep(MovementDirection.EAST, 100, 0) == [solid]
@@ -0,0 +1,121 @@
+import pytest
+from consts.colour import Colour
+from entity import Entity
+from simulation import ThinkScheduler
+
+
+def test_thinks_straight_away_then_after_its_tick_rate():
+    scheduler = ThinkScheduler()
+    scheduler.add(1, 0.5)
+
+    thought = [bool(scheduler.advance(0.2)) for _ in range(10)]
+
+    # like `Entity.can_think` once more than the tick rate has passed
+    assert thought == [True, False, True, False, False, True, False, False, True, False]
+
+
+def test_due_in_order_of_group_then_added():
+    scheduler = ThinkScheduler()
+    scheduler.add(1, 1, group = 2)
+    scheduler.add(2, 1, group = 0)
+    scheduler.add(3, 1, group = 1)
+    scheduler.add(4, 1, group = 0)
+
+    assert scheduler.advance(0.1) == [2, 4, 3, 1]
+    assert scheduler.advance(0.5) == []
+    assert scheduler.advance(0.5) == [2, 4, 3, 1]
+
+
+def test_faster_tick_rates_think_more():
+    scheduler = ThinkScheduler()
+    scheduler.add(1, 0.25)
+    scheduler.add(2, 1)
+
+    counts = {1: 0, 2: 0}
+    for _ in range(40):
+        for entity_id in scheduler.advance(0.1):
+            counts[entity_id] += 1
+
+    assert counts == {1: 14, 2: 4}
+
+
+def test_reschedule_and_group_scale():
+    scheduler = ThinkScheduler()
+    scheduler.add(1, 1, group = 1)
+    scheduler.advance(0.1)
+
+    scheduler.reschedule(1, 2)
+    assert scheduler.get_due_time(1) == pytest.approx(2)
+
+    scheduler.set_group_tick_rate_scale(1, 3)
+    assert scheduler.get_tick_rate(1) == 6
+
+    # takes effect from the next think
+    assert scheduler.advance(2) == [1]
+    assert scheduler.get_due_time(1) == pytest.approx(8.1)
+
+
+def test_asleep_until_woken():
+    scheduler = ThinkScheduler()
+    scheduler.add(1, 0.5)
+    scheduler.add(2, 0.5, is_asleep = True)
+
+    assert scheduler.advance(0.1) == [1]
+    assert scheduler.awake_count == 1
+
+    scheduler.sleep(1)
+    assert scheduler.is_asleep(1)
+    assert scheduler.get_due_time(1) is None
+    assert scheduler.advance(1) == []
+    assert scheduler.awake_count == 0
+
+    # woken things think in the next advance, in the order they were added
+    assert scheduler.wake(2)
+    assert scheduler.wake(1)
+    assert not scheduler.wake(1)
+    assert scheduler.advance(0.1) == [1, 2]
+    assert scheduler.awake_count == 2
+
+
+def test_removed_while_asleep():
+    scheduler = ThinkScheduler()
+    scheduler.add(1, 0.5)
+    scheduler.sleep(1)
+    scheduler.remove(1)
+
+    assert 1 not in scheduler
+    assert not scheduler.wake(1)
+    assert scheduler.awake_count == 0
+    assert scheduler.advance(1) == []
+
+
+def test_collisions_wake_entities(grid):
+    scheduler = Entity.scheduler = ThinkScheduler()
+    item = Entity(*grid.get_pixel_center(1, 1), 20, 20, Colour.BLUE, is_solid = False, grid_layer = 1)
+    mover = Entity(*grid.get_pixel_center(1, 2), 20, 20, Colour.BLUE)
+    scheduler.add(item.id, 0.5, is_asleep = True)
+
+    mover.collide(item.id, 0)
+
+    assert not scheduler.is_asleep(item.id)
+    assert scheduler.advance(0.1) == [item.id]
+
+
+def test_scheduled_entities_only_think_when_due(grid):
+    scheduler = Entity.scheduler = ThinkScheduler()
+    entity = Entity(*grid.get_pixel_center(1, 1), 20, 20, Colour.BLUE, tick_rate = 0.5)
+    scheduler.add(entity.id, 0.5)
+
+    # calling think outside of the scheduler doesn't skip the wait
+    assert not entity.think(1)
+
+    assert scheduler.advance(0.1) == [entity.id]
+    assert entity.think(0.1)
+    assert entity.last_tick == 0
+
+    # once for each time it's due
+    assert not entity.think(0.1)
+    assert scheduler.advance(0.3) == []
+    assert not entity.think(0.3)
+    assert scheduler.advance(0.3) == [entity.id]
+    assert entity.think(0.3)
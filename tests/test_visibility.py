@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_shadowcast_is_symmetric(make_walled_grid, seed):
+    grid = make_walled_grid(seed)
+    size = grid.max_rows
+    floors = np.argwhere(grid.get_walkable()[1:-1, 1:-1]).tolist()
+
+    visible = {
+        (row, column): grid.get_visible_positions(row, column, 8).reshape(size, size) for row, column in floors
+    }
+
+    for row, column in floors:
+        for other_row, other_column in floors:
+            assert visible[(row, column)][other_row, other_column] == \
+                visible[(other_row, other_column)][row, column], ((row, column), (other_row, other_column))
+
+
+def test_solid_tiles_are_seen_but_hide_what_is_behind_them(grid):
+    x, y = grid.get_pixel_center(5, 3)
+    grid[(x, y, 0)] = 1
+
+    visible = grid.get_visible_positions(5, 1, 8).reshape(grid.max_rows, grid.max_columns)
+
+    assert visible[5, 3]
+    assert not visible[5, 4]
+    assert visible[4, 4]
+
+
+def test_visibility_changes_with_the_walls(grid):
+    before = grid.get_visible_positions(5, 1, 8).reshape(grid.max_rows, grid.max_columns)
+
+    x, y = grid.get_pixel_center(5, 3)
+    grid[(x, y, 0)] = 1
+    after = grid.get_visible_positions(5, 1, 8).reshape(grid.max_rows, grid.max_columns)
+
+    assert before[5, 4]
+    assert not after[5, 4]